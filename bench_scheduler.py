@@ -0,0 +1,49 @@
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from src.PhysicalTopology import PhysicalTopology
+from src.TrafficGenerator import TrafficGenerator
+from src.EventScheduler import EventScheduler
+from src.CalendarEventScheduler import CalendarEventScheduler
+from src.FlowArrivalEvent import FlowArrivalEvent
+from src.FlowDepartureEvent import FlowDepartureEvent
+
+
+def run(scheduler, traffic: TrafficGenerator, pt: PhysicalTopology, seed: int, streaming: bool):
+    """Pops every event of the generated traffic, as SimulationRunner does, without any RSA work"""
+    if streaming:
+        scheduler.add_stream(traffic.flow_events(pt, seed))
+    else:
+        scheduler.add_events(event for pair in traffic.flow_events(pt, seed) for event in pair)
+    pending = 0
+    begin = time.perf_counter()
+    event = scheduler.pop_event()
+    while event is not None:
+        pending = max(pending, len(scheduler))
+        event = scheduler.pop_event()
+    return time.perf_counter() - begin, pending
+
+
+if __name__ == '__main__':
+    # python bench_scheduler.py [config.xml] [calls]
+    config = sys.argv[1] if len(sys.argv) > 1 else "xml/ccl.xml"
+    calls = sys.argv[2] if len(sys.argv) > 2 else "100000"
+    min_load = 10
+    max_load = 200
+    step = 20
+    seed = 1
+
+    root = ET.parse(config).getroot()
+    pt = PhysicalTopology(root.find("physical-topology"), False)
+    xml_traffic = root.find("traffic")
+    xml_traffic.set("calls", calls)
+
+    print(f"{'load':>6} {'mode':>9} {'pending':>8} {'heap (s)':>10} {'calendar (s)':>13} {'speedup':>8}")
+    for load in range(min_load, max_load + 1, step):
+        for streaming in (False, True):
+            traffic = TrafficGenerator(xml_traffic, load, False)
+            heap_time, pending = run(EventScheduler(), traffic, pt, seed, streaming)
+            calendar_time, _ = run(CalendarEventScheduler(), traffic, pt, seed, streaming)
+            mode = "streaming" if streaming else "preloaded"
+            print(f"{load:>6} {mode:>9} {pending:>8} {heap_time:>10.3f} {calendar_time:>13.3f} {heap_time / calendar_time:>8.2f}")
@@ -0,0 +1,116 @@
+import heapq
+from typing import List, Tuple
+
+from src.Event import Event
+from src.EventScheduler import EventScheduler
+
+
+class CalendarEventScheduler(EventScheduler):
+    """
+    Calendar queue (R. Brown, 1988): events are hashed by time into `buckets` days of `width` time
+    units, the calendar wrapping around every year of buckets * width. Dequeue scans forward from the
+    current day, so enqueue and dequeue are amortized O(1) as long as the width follows the event
+    spacing; the number of buckets doubles or halves with the queue size and the width is then
+    re-estimated from the earliest events.
+
+    Each day is a small heap of (time, seq, event) entries, giving the same order as EventScheduler.
+
+    Selected with <scheduler type="calendar"/>, the heap staying the default: bench_scheduler.py with 20000
+    calls on ccl.xml runs it at 0.5 to 1.0 times the speed of the heapq based EventScheduler at every load
+    from 10 to 190, preloaded or streamed, the queue never holding enough events for the O(log n) of the C
+    heap to cost more than the Python bucket scan.
+    """
+
+    MIN_BUCKETS = 16
+
+    def __init__(self):
+        super().__init__()
+        self.width = 1.0
+        self.buckets: List[List[Tuple[float, int, Event]]] = [[] for _ in range(CalendarEventScheduler.MIN_BUCKETS)]
+        self.size = 0
+        # absolute number of the day being scanned, its bucket being day % buckets
+        self.day = 0
+
+    def day_of(self, time: float) -> int:
+        return int(time / self.width)
+
+    def set_current(self, time: float) -> None:
+        self.day = self.day_of(time)
+
+    def push(self, entry: Tuple[float, int, Event]):
+        day = self.day_of(entry[0])
+        heapq.heappush(self.buckets[day % len(self.buckets)], entry)
+        self.size += 1
+        if day < self.day:
+            # earlier than the day being scanned, move back to it
+            self.day = day
+        if self.size > 2 * len(self.buckets):
+            self.resize(2 * len(self.buckets))
+
+    def push_all(self, entries: List[Tuple[float, int, Event]]):
+        entries.extend(self.entries())
+        self.size = len(entries)
+        buckets = CalendarEventScheduler.MIN_BUCKETS
+        while buckets < self.size // 2:
+            buckets *= 2
+        self.rebuild(entries, buckets)
+
+    def first(self) -> Tuple[float, int, Event]:
+        if self.size == 0:
+            return None
+        buckets = self.buckets
+        n = len(buckets)
+        for day in range(self.day, self.day + n):
+            bucket = buckets[day % n]
+            if bucket and self.day_of(bucket[0][0]) <= day:
+                self.day = day
+                return bucket[0]
+        # nothing in the coming year: jump straight to the earliest event
+        entry = min(bucket[0] for bucket in buckets if bucket)
+        self.set_current(entry[0])
+        return entry
+
+    def pop_first(self) -> Tuple[float, int, Event]:
+        if self.first() is None:
+            return None
+        entry = heapq.heappop(self.buckets[self.day % len(self.buckets)])
+        self.size -= 1
+        if len(self.buckets) > CalendarEventScheduler.MIN_BUCKETS and self.size < len(self.buckets) // 2:
+            self.resize(len(self.buckets) // 2)
+        return entry
+
+    def clear(self):
+        super().clear()
+        self.buckets = [[] for _ in range(CalendarEventScheduler.MIN_BUCKETS)]
+        self.size = 0
+        self.day = 0
+
+    def entries(self) -> List[Tuple[float, int, Event]]:
+        return [entry for bucket in self.buckets for entry in bucket]
+
+    def resize(self, buckets: int) -> None:
+        self.rebuild(self.entries(), buckets)
+
+    def rebuild(self, entries: List[Tuple[float, int, Event]], buckets: int) -> None:
+        earliest = heapq.nsmallest(min(len(entries), 25), entries)
+        self.width = self.estimate_width([entry[0] for entry in earliest])
+        self.buckets = [[] for _ in range(buckets)]
+        for entry in entries:
+            self.buckets[self.day_of(entry[0]) % buckets].append(entry)
+        for bucket in self.buckets:
+            heapq.heapify(bucket)
+        self.set_current(earliest[0][0] if earliest else 0.0)
+
+    def estimate_width(self, times: List[float]) -> float:
+        """Three times the mean gap between the earliest events, ignoring gaps over twice the mean"""
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        if not gaps:
+            return self.width
+        mean = sum(gaps) / len(gaps)
+        kept = [gap for gap in gaps if gap <= 2 * mean]
+        if kept and sum(kept) > 0:
+            mean = sum(kept) / len(kept)
+        return 3 * mean if mean > 0 else self.width
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,455 @@
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from src.Event import Event
+from src.Flow import Flow
+from src.FlowArrivalEvent import FlowArrivalEvent
+from src.FlowDepartureEvent import FlowDepartureEvent
+from src.LightPath import LightPath
+from src.PCycle import PCycle
+from src.ProtectingLightPath import ProtectingLightPath
+from src.Slot import Slot
+
+
+class Checkpoint:
+    """
+    Periodic snapshot of a running simulation, written as one .npz of plain numeric arrays (no pickled
+    objects) so that an interrupted run resumes where it stopped and ends with the same results.
+
+    A checkpoint holds the pending events with their seq, the flows they refer to, the state of the
+    traffic stream and its distributions, the spectrum masks, the lightpaths and p-cycles of the virtual
+    topology, the flows of the control plane, the attributes listed in STATE of the statistics, its
+    warm-up detector and stopping rule, the RSA and the simulator, and the dots of the graphs. Ragged
+    lists are stored as <name>_offsets / <name>_values pairs. The trace file is not part of it.
+
+    It is enabled with <checkpoint every="N" file="..."/>: the SimulationRunner calls save() every N
+    events and the Simulator resumes from the file when it exists and was written for the same XML,
+    load and number of simulations.
+    """
+
+    FORMAT = 2
+    ARRIVAL = 0
+    DEPARTURE = 1
+
+    # class name -> (attributes saved, attributes set up again from the XML and the other objects); save()
+    # refuses an object whose class is missing or that has an attribute in neither list
+    STATE: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+        "Simulator": (("total_requests", "accepted_requests", "acceptance_rate"),
+                      ("rsa", "trace", "traffic", "virtual_topology", "physical_topology", "graphs", "scheduler",
+                       "batch_departures", "checkpoint", "warmup", "statistics")),
+        "MyStatistics": (("min_number_arrivals", "number_arrivals", "arrivals", "departures", "accepted", "blocked",
+                          "required_bandwidth", "blocked_bandwidth", "total_power_consumed", "sim_time",
+                          "data_transmitted", "num_p_cycles", "num_p_cycles_reused", "avg_bits_per_symbol",
+                          "avg_bits_per_symbol_count", "arrivals_pairs", "blocked_pairs", "required_bandwidth_pairs",
+                          "blocked_bandwidth_pairs", "arrivals_diff", "blocked_diff", "required_bandwidth_diff",
+                          "blocked_bandwidth_diff", "arrivals_pairs_diff", "blocked_pairs_diff",
+                          "required_bandwidth_pairs_diff", "blocked_bandwidth_pairs_diff",
+                          "number_of_used_transponders"),
+                         ("verbose", "plotter", "pt", "traffic", "warmup", "stopping", "periodical_interval",
+                          "num_nodes", "load")),
+        "WarmupDetector": (("blocking", "utilization", "batch_arrivals", "batch_blocked", "batch_utilization",
+                            "cutoff", "start"),
+                           ("check_every", "min_batches")),
+        "ConfidenceStop": (("batch_start", "bp_batches", "bbr_batches", "stopped"),
+                           ("precision", "batch_size", "min_batches", "use_bbr")),
+        "ImageRCSA": ((), ("pt", "vt", "cp", "graph")),
+        "PP": ((), ("pt", "vt", "cp", "graph")),
+        "NewRSA": ((), ("pt", "vt", "cp", "graph")),
+        "BfsRSA": ((), ("pt", "vt", "cp", "graph")),
+        "FIPPFlex": ((), ("pt", "vt", "cp", "graph")),
+        "FIPPBFS": ((), ("pt", "vt", "cp", "graph")),
+        "SIFIPPBFS": (("new_pcycles", "reused_pcycles"), ("pt", "vt", "cp", "graph", "full_bitmap")),
+    }
+
+    def __init__(self, file_name: str, every: int, key: str):
+        assert every > 0, "Checkpoint interval must be positive"
+        self.file_name = file_name
+        self.every = every
+        self.key = key
+        self.seed = 0
+        self.simulator = None
+        self.pt = None
+        self.vt = None
+        self.cp = None
+        self.traffic = None
+        self.events = None
+
+    @staticmethod
+    def config_key(sim_config_file: str, load: float, num_simulations: int) -> str:
+        with open(sim_config_file, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        return f"{digest}:{load}:{num_simulations}"
+
+    def attach(self, seed: int, simulator, pt, vt, cp, traffic, events) -> None:
+        """Sets the objects of the simulation `seed`, the ones save() reads and restore() writes"""
+        self.seed = seed
+        self.simulator = simulator
+        self.pt = pt
+        self.vt = vt
+        self.cp = cp
+        self.traffic = traffic
+        self.events = events
+
+    def load(self) -> Optional[Dict[str, np.ndarray]]:
+        """Reads the checkpoint file, None if there is none or it was written for another run"""
+        if not os.path.isfile(self.file_name):
+            return None
+        with np.load(self.file_name, allow_pickle=False) as data:
+            state = {name: data[name] for name in data.files}
+        if int(state["format"]) != Checkpoint.FORMAT or str(state["key"]) != self.key:
+            print(f"Checkpoint {self.file_name} belongs to another run, ignored")
+            return None
+        return state
+
+    def remove(self) -> None:
+        if os.path.isfile(self.file_name):
+            os.remove(self.file_name)
+
+    def save(self, events_done: int) -> None:
+        """Writes the state after `events_done` events of the attached simulation, replacing the file atomically"""
+        arrays = {
+            "format": np.array(Checkpoint.FORMAT),
+            "key": np.array(self.key),
+            "seed": np.array(self.seed),
+            "events_done": np.array(events_done),
+        }
+        self.save_events(arrays)
+        self.save_spectrum(arrays)
+        self.save_virtual_topology(arrays)
+        st = self.cp.st
+        for prefix, obj in self.state_objects():
+            Checkpoint.put_state(arrays, prefix, obj)
+        for graph in st.plotter.graphs:
+            # values keep their int or float type, the graph files print them as they are
+            data_set = graph.get_data_set()
+            arrays["dots." + graph.get_name()] = np.array(data_set.dots, dtype=np.float64).reshape(-1, data_set.dimension)
+            arrays["dots_int." + graph.get_name()] = np.array([[isinstance(value, int) for value in dot] for dot in data_set.dots],
+                                                              dtype=bool).reshape(-1, data_set.dimension)
+
+        tmp = self.file_name + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, self.file_name)
+
+    def restore(self, state: Dict[str, np.ndarray]) -> int:
+        """Puts the attached, freshly set up simulation in the saved state and returns its events_done"""
+        assert int(state["seed"]) == self.seed, "Checkpoint of another simulation"
+        flows = self.restore_flows(state)
+        self.restore_events(state, flows)
+        self.restore_spectrum(state)
+        self.restore_virtual_topology(state, flows)
+        st = self.cp.st
+        for prefix, obj in self.state_objects():
+            Checkpoint.get_state(state, prefix, obj)
+        for graph in st.plotter.graphs:
+            name = "dots." + graph.get_name()
+            if name in state:
+                graph.get_data_set().dots = [[int(value) if is_int else value for value, is_int in zip(dot, ints)] for dot, ints in
+                                             zip(state[name].tolist(), state["dots_int." + graph.get_name()].tolist())]
+        return int(state["events_done"])
+
+    def state_objects(self) -> List[tuple]:
+        """(prefix, object) of the objects whose STATE attributes are saved"""
+        objects = [("sim", self.simulator), ("st", self.cp.st), ("rsa", self.cp.rsa)]
+        if self.cp.st.warmup is not None:
+            objects.append(("warmup", self.cp.st.warmup))
+        if self.cp.st.stopping is not None:
+            objects.append(("stopping", self.cp.st.stopping))
+        return objects
+
+    # events and flows
+
+    def save_events(self, arrays: Dict[str, np.ndarray]) -> None:
+        entries = self.events.entries()
+        head = self.events.stream_head or ()
+        flows: Dict[int, Flow] = {}
+        for event in [entry[2] for entry in entries] + list(head):
+            flows.setdefault(event.get_flow().get_id(), event.get_flow())
+        for flow in list(self.cp.active_flows.values()) + list(self.cp.mapped_flows):
+            flows.setdefault(flow.get_id(), flow)
+        Checkpoint.put_flows(arrays, list(flows.values()))
+
+        Checkpoint.put_events(arrays, "queue", [entry[2] for entry in entries])
+        arrays["queue.seq"] = np.array([entry[1] for entry in entries], dtype=np.int64)
+        arrays["next_seq"] = np.array(self.events.next_seq())
+        Checkpoint.put_events(arrays, "head", head)
+        arrays["active_flows"] = np.array(list(self.cp.active_flows), dtype=np.int64)
+
+        if self.traffic.distributions or self.traffic.replayed():
+            # a replayed stream has no distribution states
+            next_id, time = self.traffic.stream_position
+            states = self.traffic.distribution_states()
+            arrays["traffic.next_id"] = np.array(next_id)
+            arrays["traffic.time"] = np.array(time)
+            arrays["traffic.rng"] = np.array([seed for seed, _ in states], dtype=np.int64)
+            arrays["traffic.gaussian"] = np.array([np.nan if g is None else g for _, g in states], dtype=np.float64)
+
+    def restore_flows(self, state: Dict[str, np.ndarray]) -> Dict[int, Flow]:
+        flows = {}
+        columns = [state["flow." + name].tolist() for name in
+                   ("id", "src", "dst", "time", "bw", "duration", "cos", "deadline", "accepted", "modulation", "groomed", "routed")]
+        links = Checkpoint.get_ragged(state, "flow.links")
+        slots = Checkpoint.get_slot_lists(state, "flow.slots")
+        for i, (id, src, dst, time, bw, duration, cos, deadline, accepted, modulation, groomed, routed) in enumerate(zip(*columns)):
+            flow = Flow(id, src, dst, time, bw, duration, cos, deadline)
+            flow.set_accepted(accepted)
+            flow.set_modulation_level(modulation)
+            flow.set_groomed(groomed)
+            if routed:
+                flow.set_links(links[i])
+                flow.set_slot_list(slots[i])
+            flows[id] = flow
+        self.cp.active_flows = {id: flows[id] for id in state["active_flows"].tolist()}
+        return flows
+
+    def restore_events(self, state: Dict[str, np.ndarray], flows: Dict[int, Flow]) -> None:
+        queued = Checkpoint.get_events(state, "queue", flows)
+        self.events.restore([(event.get_time(), seq, event) for event, seq in zip(queued, state["queue.seq"].tolist())],
+                            int(state["next_seq"]))
+        head = Checkpoint.get_events(state, "head", flows)
+        if head and "traffic.next_id" in state:
+            states = [(seed, None if np.isnan(g) else g) for seed, g in
+                      zip(state["traffic.rng"].tolist(), state["traffic.gaussian"].tolist())]
+            resume = (int(state["traffic.next_id"]), float(state["traffic.time"]), states)
+            self.events.stream = self.traffic.flow_events(self.pt, self.seed, resume)
+            self.events.stream_head = tuple(head)
+
+    @staticmethod
+    def put_flows(arrays: Dict[str, np.ndarray], flows: List[Flow]) -> None:
+        # a flow not routed yet still has the placeholder lists set by the Flow constructor
+        routed = [all(isinstance(link, int) for link in flow.get_links()) and
+                  all(isinstance(slot, Slot) for slot in flow.get_slot_list()) for flow in flows]
+        arrays["flow.id"] = np.array([flow.get_id() for flow in flows], dtype=np.int64)
+        arrays["flow.src"] = np.array([flow.get_source() for flow in flows], dtype=np.int64)
+        arrays["flow.dst"] = np.array([flow.get_destination() for flow in flows], dtype=np.int64)
+        arrays["flow.time"] = np.array([flow.get_time() for flow in flows], dtype=np.float64)
+        arrays["flow.bw"] = np.array([flow.get_rate() for flow in flows], dtype=np.int64)
+        arrays["flow.duration"] = np.array([flow.get_duration() for flow in flows], dtype=np.float64)
+        arrays["flow.cos"] = np.array([flow.get_cos() for flow in flows], dtype=np.int64)
+        arrays["flow.deadline"] = np.array([flow.get_deadline() for flow in flows], dtype=np.float64)
+        arrays["flow.accepted"] = np.array([flow.is_accepted() for flow in flows], dtype=bool)
+        arrays["flow.modulation"] = np.array([flow.get_modulation_level() for flow in flows], dtype=np.int64)
+        arrays["flow.groomed"] = np.array([flow.is_groomed() for flow in flows], dtype=bool)
+        arrays["flow.routed"] = np.array(routed, dtype=bool)
+        Checkpoint.put_ragged(arrays, "flow.links", [flow.get_links() if r else [] for flow, r in zip(flows, routed)])
+        Checkpoint.put_slot_lists(arrays, "flow.slots", [flow.get_slot_list() if r else [] for flow, r in zip(flows, routed)])
+
+    @staticmethod
+    def put_events(arrays: Dict[str, np.ndarray], name: str, events: Sequence[Event]) -> None:
+        kinds = []
+        for event in events:
+            if isinstance(event, FlowArrivalEvent):
+                kinds.append(Checkpoint.ARRIVAL)
+            elif isinstance(event, FlowDepartureEvent):
+                kinds.append(Checkpoint.DEPARTURE)
+            else:
+                raise TypeError("Cannot checkpoint event " + type(event).__name__)
+        arrays[name + ".kind"] = np.array(kinds, dtype=np.int8)
+        arrays[name + ".time"] = np.array([event.get_time() for event in events], dtype=np.float64)
+        arrays[name + ".flow"] = np.array([event.get_flow().get_id() for event in events], dtype=np.int64)
+        arrays[name + ".id"] = np.array([event.get_id() if isinstance(event, FlowDepartureEvent) else -1
+                                         for event in events], dtype=np.int64)
+        arrays[name + ".cancelled"] = np.array([event.is_cancelled() for event in events], dtype=bool)
+
+    @staticmethod
+    def get_events(state: Dict[str, np.ndarray], name: str, flows: Dict[int, Flow]) -> List[Event]:
+        events = []
+        for kind, time, flow_id, id, cancelled in zip(*(state[name + "." + column].tolist() for column in
+                                                        ("kind", "time", "flow", "id", "cancelled"))):
+            flow = flows[flow_id]
+            if kind == Checkpoint.ARRIVAL:
+                event = FlowArrivalEvent(time, flow)
+            else:
+                event = FlowDepartureEvent(time, id, flow)
+                flow.set_departure_event(event)
+            if cancelled:
+                event.cancel()
+            events.append(event)
+        return events
+
+    # spectrum
+
+    def save_spectrum(self, arrays: Dict[str, np.ndarray]) -> None:
+        links = sorted(self.pt.occupied)
+        width = (self.pt.get_num_slots() + 7) // 8
+        packed = b"".join(mask.to_bytes(width, "little") for link_id in links for mask in self.pt.occupied[link_id])
+        arrays["spectrum.links"] = np.array(links, dtype=np.int64)
+        arrays["spectrum.masks"] = np.frombuffer(packed, dtype=np.uint8).reshape(len(links), self.pt.get_cores(), width)
+
+    def restore_spectrum(self, state: Dict[str, np.ndarray]) -> None:
+        # through update_link(), so the free block index, the tensor and the crosstalk counts follow
+        for link_id, masks in zip(state["spectrum.links"].tolist(), state["spectrum.masks"]):
+            current = self.pt.occupied[link_id]
+            saved = [int.from_bytes(row.tobytes(), "little") for row in masks]
+            released = {core: current[core] & ~mask for core, mask in enumerate(saved) if current[core] & ~mask}
+            reserved = {core: mask & ~current[core] for core, mask in enumerate(saved) if mask & ~current[core]}
+            if released:
+                self.pt.update_link(link_id, released, False)
+            if reserved:
+                self.pt.update_link(link_id, reserved, True)
+
+    # virtual topology
+
+    def save_virtual_topology(self, arrays: Dict[str, np.ndarray]) -> None:
+        # lightpaths of the graph first, then the ones only the control plane still maps
+        lightpaths: Dict[int, LightPath] = {}
+        for _, _, data in self.vt.g_lightpath.edges(data=True):
+            if "lightpath" in data:
+                lightpaths.setdefault(id(data["lightpath"]), data["lightpath"])
+        in_graph = len(lightpaths)
+        for lp in self.cp.mapped_flows.values():
+            lightpaths.setdefault(id(lp), lp)
+        lightpaths = list(lightpaths.values())
+
+        # p-cycles of the virtual topology first, then the ones only referred to by lightpaths
+        p_cycles: Dict[int, PCycle] = {id(p_cycle): p_cycle for p_cycle in self.vt.p_cycles}
+        listed = len(p_cycles)
+        for lp in lightpaths:
+            for p_cycle in [lp.get_p_cycle()] + list(lp.get_list_be_protected()):
+                if p_cycle is not None:
+                    p_cycles.setdefault(id(p_cycle), p_cycle)
+        p_cycle_index = {key: i for i, key in enumerate(p_cycles)}
+        p_cycles = list(p_cycles.values())
+
+        protecting: Dict[int, ProtectingLightPath] = {}
+        for p_cycle in p_cycles:
+            for plp in p_cycle.get_protected_lightpaths() + p_cycle.be_protection:
+                protecting.setdefault(id(plp), plp)
+        protecting_index = {key: i for i, key in enumerate(protecting)}
+        protecting = list(protecting.values())
+
+        arrays["vt.next_lightpath_id"] = np.array(self.vt.next_lightpath_id)
+        arrays["lp.id"] = np.array([lp.get_id() for lp in lightpaths], dtype=np.int64)
+        arrays["lp.src"] = np.array([lp.get_source() for lp in lightpaths], dtype=np.int64)
+        arrays["lp.dst"] = np.array([lp.get_destination() for lp in lightpaths], dtype=np.int64)
+        arrays["lp.modulation"] = np.array([lp.get_modulation_level() for lp in lightpaths], dtype=np.int64)
+        arrays["lp.in_graph"] = np.arange(len(lightpaths)) < in_graph
+        arrays["lp.p_cycle"] = np.array([-1 if lp.get_p_cycle() is None else p_cycle_index[id(lp.get_p_cycle())]
+                                         for lp in lightpaths], dtype=np.int64)
+        Checkpoint.put_ragged(arrays, "lp.links", [lp.get_links() for lp in lightpaths])
+        Checkpoint.put_slot_lists(arrays, "lp.slots", [lp.get_slot_list() for lp in lightpaths])
+        Checkpoint.put_ragged(arrays, "lp.be_protected", [[p_cycle_index[id(p_cycle)] for p_cycle in lp.get_list_be_protected()]
+                                                          for lp in lightpaths])
+        lp_index = {id(lp): i for i, lp in enumerate(lightpaths)}
+        mapped = list(self.cp.mapped_flows.items())
+        arrays["mapped.flow"] = np.array([flow.get_id() for flow, _ in mapped], dtype=np.int64)
+        arrays["mapped.lp"] = np.array([lp_index[id(lp)] for _, lp in mapped], dtype=np.int64)
+
+        arrays["pc.listed"] = np.arange(len(p_cycles)) < listed
+        arrays["pc.reserved_slots"] = np.array([p_cycle.get_reserved_slots() for p_cycle in p_cycles], dtype=np.int64)
+        Checkpoint.put_ragged(arrays, "pc.links", [p_cycle.get_cycle_links() for p_cycle in p_cycles])
+        Checkpoint.put_ragged(arrays, "pc.nodes", [p_cycle.nodes for p_cycle in p_cycles])
+        Checkpoint.put_slot_lists(arrays, "pc.slots", [p_cycle.get_slot_list() for p_cycle in p_cycles])
+        Checkpoint.put_ragged(arrays, "pc.protected", [[protecting_index[id(plp)] for plp in p_cycle.get_protected_lightpaths()]
+                                                       for p_cycle in p_cycles])
+        Checkpoint.put_ragged(arrays, "pc.be_protection", [[protecting_index[id(plp)] for plp in p_cycle.be_protection]
+                                                           for p_cycle in p_cycles])
+
+        arrays["plp.id"] = np.array([plp.get_id() for plp in protecting], dtype=np.int64)
+        arrays["plp.src"] = np.array([plp.get_source() for plp in protecting], dtype=np.int64)
+        arrays["plp.dst"] = np.array([plp.get_destination() for plp in protecting], dtype=np.int64)
+        arrays["plp.fss"] = np.array([plp.get_fss() for plp in protecting], dtype=np.int64)
+        arrays["plp.backup_count"] = np.array([len(plp.get_backup_paths()) for plp in protecting], dtype=np.int64)
+        Checkpoint.put_ragged(arrays, "plp.links", [plp.get_links() for plp in protecting])
+        Checkpoint.put_ragged(arrays, "plp.backup_paths", [path for plp in protecting for path in plp.get_backup_paths()])
+
+    def restore_virtual_topology(self, state: Dict[str, np.ndarray], flows: Dict[int, Flow]) -> None:
+        backup_paths = Checkpoint.get_ragged(state, "plp.backup_paths")
+        protecting = []
+        first = 0
+        for id, src, dst, links, fss, count in zip(state["plp.id"].tolist(), state["plp.src"].tolist(),
+                                                   state["plp.dst"].tolist(), Checkpoint.get_ragged(state, "plp.links"),
+                                                   state["plp.fss"].tolist(), state["plp.backup_count"].tolist()):
+            protecting.append(ProtectingLightPath(id, src, dst, links, fss, backup_paths[first:first + count]))
+            first += count
+
+        p_cycles = []
+        for links, nodes, slots, reserved, protected, be_protection in zip(
+                Checkpoint.get_ragged(state, "pc.links"), Checkpoint.get_ragged(state, "pc.nodes"),
+                Checkpoint.get_slot_lists(state, "pc.slots"), state["pc.reserved_slots"].tolist(),
+                Checkpoint.get_ragged(state, "pc.protected"), Checkpoint.get_ragged(state, "pc.be_protection")):
+            p_cycle = PCycle(links, nodes, slots, reserved)
+            # rebuilds id_links along with the protected lightpaths
+            for i in protected:
+                p_cycle.add_protected_lightpath(protecting[i])
+            p_cycle.be_protection = [protecting[i] for i in be_protection]
+            p_cycles.append(p_cycle)
+        self.vt.p_cycles = [p_cycle for p_cycle, listed in zip(p_cycles, state["pc.listed"].tolist()) if listed]
+
+        lightpaths = []
+        graph = self.vt.g_lightpath
+        graph.remove_edges_from(list(graph.edges(keys=True)))
+        for id, src, dst, links, slots, modulation, p_cycle, be_protected, in_graph in zip(
+                state["lp.id"].tolist(), state["lp.src"].tolist(), state["lp.dst"].tolist(),
+                Checkpoint.get_ragged(state, "lp.links"), Checkpoint.get_slot_lists(state, "lp.slots"),
+                state["lp.modulation"].tolist(), state["lp.p_cycle"].tolist(),
+                Checkpoint.get_ragged(state, "lp.be_protected"), state["lp.in_graph"].tolist()):
+            lp = LightPath(id, src, dst, links, slots, modulation, None if p_cycle < 0 else p_cycles[p_cycle],
+                           [p_cycles[i] for i in be_protected])
+            if in_graph:
+                graph.add_edge(src, dst, key=id, lightpath=lp)
+            lightpaths.append(lp)
+        self.vt.next_lightpath_id = int(state["vt.next_lightpath_id"])
+        self.cp.mapped_flows = {flows[flow_id]: lightpaths[i] for flow_id, i in
+                                zip(state["mapped.flow"].tolist(), state["mapped.lp"].tolist())}
+
+    # encodings
+
+    @staticmethod
+    def state_lists(obj) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """STATE of the class of `obj`, checked against its attributes"""
+        name = type(obj).__name__
+        if name not in Checkpoint.STATE:
+            raise TypeError("Cannot checkpoint " + name + ", its state is not listed in Checkpoint.STATE")
+        saved, set_up = Checkpoint.STATE[name]
+        unlisted = sorted(set(vars(obj)) - set(saved) - set(set_up))
+        if unlisted:
+            raise TypeError(f"Cannot checkpoint {name}, attributes not listed in Checkpoint.STATE: {', '.join(unlisted)}")
+        return saved, set_up
+
+    @staticmethod
+    def put_state(arrays: Dict[str, np.ndarray], prefix: str, obj) -> None:
+        """Saves the STATE attributes of `obj`, each a bool, a number or a (nested, rectangular) list of numbers"""
+        saved, _ = Checkpoint.state_lists(obj)
+        for name in saved:
+            value = getattr(obj, name)
+            try:
+                array = np.array(value) if isinstance(value, (int, float, list)) else None
+            except (ValueError, OverflowError):
+                array = None
+            if array is None or array.dtype.kind not in "biuf":
+                raise TypeError(f"Cannot checkpoint {type(obj).__name__}.{name}, "
+                                f"not a number or a rectangular list of numbers: {value!r:.80}")
+            arrays[prefix + "." + name] = array
+
+    @staticmethod
+    def get_state(state: Dict[str, np.ndarray], prefix: str, obj) -> None:
+        saved, _ = Checkpoint.state_lists(obj)
+        for name in saved:
+            setattr(obj, name, state[prefix + "." + name].tolist())
+
+    @staticmethod
+    def put_ragged(arrays: Dict[str, np.ndarray], name: str, rows: List[List[int]]) -> None:
+        values = [value for row in rows for value in row]
+        wrong = [value for value in values if not isinstance(value, (int, np.integer))]
+        if wrong:
+            raise TypeError(f"Cannot checkpoint {name}, not lists of integers: {wrong[0]!r:.80}")
+        arrays[name + "_offsets"] = np.cumsum([0] + [len(row) for row in rows], dtype=np.int64)
+        arrays[name + "_values"] = np.array(values, dtype=np.int64)
+
+    @staticmethod
+    def get_ragged(state: Dict[str, np.ndarray], name: str) -> List[List[int]]:
+        offsets = state[name + "_offsets"].tolist()
+        values = state[name + "_values"].tolist()
+        return [values[begin:end] for begin, end in zip(offsets, offsets[1:])]
+
+    @staticmethod
+    def put_slot_lists(arrays: Dict[str, np.ndarray], name: str, slot_lists: List[List[Slot]]) -> None:
+        Checkpoint.put_ragged(arrays, name, [[value for slot in slot_list for value in (slot.core, slot.slot)]
+                                             for slot_list in slot_lists])
+
+    @staticmethod
+    def get_slot_lists(state: Dict[str, np.ndarray], name: str) -> List[List[Slot]]:
+        return [[Slot(row[i], row[i + 1]) for i in range(0, len(row), 2)] for row in Checkpoint.get_ragged(state, name)]
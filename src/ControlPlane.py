@@ -1,7 +1,8 @@
 import xml.etree.ElementTree as ET
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from src.LightPath import LightPath
+from src.Slot import Slot
 from src.ControlPlaneForRSA import ControlPlaneForRSA
 from src.EventScheduler import EventScheduler
 from src.PhysicalTopology import PhysicalTopology
@@ -10,21 +11,26 @@ from src.TrafficGenerator import TrafficGenerator
 from src.Flow import Flow
 from src.Tracer import Tracer
 from src.MyStatistics import MyStatistics
+from src.HookBus import HookBus
 from src.Event import Event
 from src.FlowArrivalEvent import FlowArrivalEvent
 from src.FlowDepartureEvent import FlowDepartureEvent
 # from src.rsa import *
 from src.rsa.ImageRCSA import ImageRCSA
-from src.rsa.FIPP import FIPP
 from src.rsa.PP import PP
 from src.rsa.NewRSA import NewRSA
 from src.rsa.BfsRSA import BfsRSA
 from src.rsa.FIPPFlex import FIPPFlex
 from src.rsa.FIPPBFS import FIPPBFS
+from src.rsa.SIFIPP import SIFIPPBFS
 
 class ControlPlane(ControlPlaneForRSA):
+    # <rsa module="..."/> -> RSA class
+    RSA_MODULES = {"ImageRCSA": ImageRCSA, "PP": PP, "NewRSA": NewRSA, "BfsRSA": BfsRSA, "FIPPFlex": FIPPFlex,
+                   "FIPPBFS": FIPPBFS, "SIFIPPBFS": SIFIPPBFS}
+
     def __init__(self, xml: ET.Element, event_scheduler: EventScheduler, rsa_module: str, pt: PhysicalTopology,
-                 vt: VirtualTopology, traffic: TrafficGenerator):
+                 vt: VirtualTopology, traffic: TrafficGenerator, hooks: HookBus = None):
         self.rsa = None
         self.pt = pt
         self.vt = vt
@@ -32,33 +38,56 @@ class ControlPlane(ControlPlaneForRSA):
         self.active_flows = {}
         self.tr = Tracer.get_tracer_object()
         self.st = MyStatistics.get_my_statistics()
+        # observers of arrivals, accepts and blocks, shared with the virtual topology by default
+        self.hooks = hooks if hooks is not None else vt.hooks
 
         try:
-            # RSAClass  = globals()[rsa_module]
-            # self.rsa = RSAClass()
-            # self.rsa.simulation_interface(xml, pt, vt, self, traffic)
-            # self.rsa = ImageRCSA()
-            # self.rsa = NewRSA()
-            #self.rsa = BfsRSA()
-            # self.rsa = FIPP()
-            #self.rsa = FIPPFlex()
-            #self.rsa = FIPPBFS()
-            self.rsa = SIFIPPBFS()
+            assert rsa_module in ControlPlane.RSA_MODULES, "Unknown RSA module " + rsa_module
+            self.rsa = ControlPlane.RSA_MODULES[rsa_module]()
             self.rsa.simulation_interface(xml, pt, vt, self, traffic)
         except Exception as e:
             print("Error in ControlPlane: ", e)
             raise e 
     def new_event(self, event: Event):
         if isinstance(event, FlowArrivalEvent):
-            self.new_flow(event.get_flow())
-            self.rsa.flow_arrival(event.get_flow())
-            self.simulator.total_requests += 1
+            self.flow_arrived(event)
 
         elif isinstance(event, FlowDepartureEvent):
-            removed_flow = self.remove_flow(event.get_id())
+            self.flow_departed(event)
+
+    def flow_arrived(self, event: FlowArrivalEvent) -> None:
+        self.new_flow(event.get_flow())
+        hook = self.hooks.arrival
+        if hook is not None:
+            hook(event.get_flow())
+        self.rsa.flow_arrival(event.get_flow())
+        self.simulator.total_requests += 1
+
+    def flow_departed(self, event: FlowDepartureEvent) -> None:
+        removed_flow = self.remove_flow(event.get_id())
+        self.rsa.flow_departure(removed_flow)
+        self.log_departure()
+
+    def log_departure(self) -> None:
+        print("Flow departed")
+        self.vt.print_light_paths()
+
+    def flows_departed(self, events: List[FlowDepartureEvent]) -> None:
+        """
+        Handles departures in a row like flow_departed(), in order, except that the slots of all their
+        lightpaths and released p-cycles are freed at the end, with one update per link
+        """
+        released: List[Tuple[List[int], List[Slot]]] = []
+        for event in events:
+            removed_flow = self.remove_flow(event.get_id(), released)
             self.rsa.flow_departure(removed_flow)
-            print("Flow departed")
-            self.vt.print_light_paths()
+            self.log_departure()
+        self.pt.release_paths(released)
+
+    def register_handlers(self, dispatcher) -> None:
+        """Registers the event handlers with an EventDispatcher"""
+        dispatcher.register(FlowArrivalEvent, self.flow_arrived)
+        dispatcher.register(FlowDepartureEvent, self.flow_departed)
 
     def get_flow(self, id: int) -> Flow:
         return self.active_flows.get(id)
@@ -70,13 +99,17 @@ class ControlPlane(ControlPlaneForRSA):
             raise ValueError("Flow not found")
 
         flow = self.active_flows.get(id)
-        if not self.can_add_flow_to_pt(flow, light_paths):
+        if not self.add_flow_to_pt(flow, light_paths):
             return False
 
-        self.add_flow_to_pt(flow, light_paths)
         self.mapped_flows[flow] = light_paths
-        self.tr.accept_flow(flow, light_paths)
-        self.st.accept_flow(flow, light_paths, p_reuse)
+        hook = self.hooks.accept
+        if hook is not None:
+            hook(flow, light_paths, p_reuse)
+        if p_reuse:
+            hook = self.hooks.p_cycle_reused
+            if hook is not None:
+                hook(light_paths.get_p_cycle(), flow)
         flow.set_accepted(True)
         self.simulator.accepted_requests += 1
 
@@ -93,8 +126,13 @@ class ControlPlane(ControlPlaneForRSA):
             return False
 
         self.active_flows.pop(id)
-        self.tr.block_flow(flow)
-        self.st.block_flow(flow)
+        # nothing to release when a blocked flow leaves, so its departure is never delivered; the block hook
+        # traces and counts it instead
+        if flow.get_departure_event() is not None:
+            flow.get_departure_event().cancel()
+        hook = self.hooks.block
+        if hook is not None:
+            hook(flow)
         return True
 
     def reroute_flow(self, id: int, light_path: LightPath) -> bool:
@@ -108,48 +146,49 @@ class ControlPlane(ControlPlaneForRSA):
                 return False
             old_path = self.mapped_flows.get(flow)
             self.remove_flow_from_pt(flow, light_path)
-            if not self.can_add_flow_to_pt(flow, light_path):
+            if not self.add_flow_to_pt(flow, light_path):
                 self.add_flow_to_pt(flow, old_path)
                 return False
-            self.add_flow_to_pt(flow, light_path)
             self.mapped_flows[flow] = light_path
             return True
 
     def new_flow(self, flow: Flow) -> None:
         self.active_flows[flow.get_id()] = flow
 
-    def remove_flow(self, id: int) -> Flow:
+    def remove_flow(self, id: int, released: List[Tuple[List[int], List[Slot]]] = None) -> Flow:
         if id in self.active_flows:
             flow = self.active_flows.get(id)
             if flow in self.mapped_flows:
                 light_path = self.mapped_flows.get(flow)
-                self.remove_flow_from_pt(flow, light_path)
+                self.remove_flow_from_pt(flow, light_path, released)
                 self.mapped_flows.pop(flow)
             self.active_flows.pop(id)
             return flow
         return None
 
-    def remove_flow_from_pt(self, flow: Flow, light_paths: LightPath) -> None:
-        links = light_paths.get_links()
-        for j in range(0, len(links), 1):
-            self.pt.release_slots(self.pt.get_src_link(links[j]), self.pt.get_dst_link(links[j]), light_paths.get_slot_list())
-            # self.pt.update_noise(self.pt.get_src_link(links[j]), self.pt.get_dst_link(links[j]), light_paths.get_slot_list(), flow.get_modulation_level())
+    def remove_flow_from_pt(self, flow: Flow, light_paths: LightPath, released: List[Tuple[List[int], List[Slot]]] = None) -> None:
+        """Frees the lightpath of `flow`; with `released`, the (links, slots) to free are appended to it instead"""
+        if released is not None:
+            released.append((light_paths.get_links(), light_paths.get_slot_list()))
+            self.vt.detach_light_path(light_paths)
+            self.vt.remove_lp_p_cycle(light_paths, released)
+            return
+        self.pt.release_path(light_paths.get_links(), light_paths.get_slot_list())
+        # self.pt.update_noise(self.pt.get_src_link(links[j]), self.pt.get_dst_link(links[j]), light_paths.get_slot_list(), flow.get_modulation_level())
         self.vt.remove_light_path(light_paths.get_id())
         self.vt.remove_lp_p_cycle(light_paths)
         # self.vt.print_light_paths()
 
 
-    def can_add_flow_to_pt(self, flow: Flow, light_paths: LightPath) -> bool:
-        links = light_paths.get_links()
-        for j in range(0, len(links), 1):
-            if self.pt.are_slots_available(self.pt.get_src_link(links[j]), self.pt.get_dst_link(links[j]), light_paths.get_slot_list()):
-                return False
-        return True
-    def add_flow_to_pt(self, flow: Flow, light_paths: LightPath) -> None:
-        links = light_paths.get_links()
-        for j in range(0, len(links), 1):
-            self.pt.reserve_slots(self.pt.get_src_link(links[j]), self.pt.get_dst_link(links[j]), light_paths.get_slot_list())
-            # self.pt.get_link(links[j]).update_noise(light_paths.get_slot_list(), flow.get_modulation_level())
+    def add_flow_to_pt(self, flow: Flow, light_paths: LightPath) -> bool:
+        """
+        Puts the lightpath of `flow` in the physical topology, False if its slots cannot all be reserved;
+        a lightpath of the virtual topology holds its slots already
+        """
+        if self.vt.has_light_path(light_paths):
+            return True
+        return self.pt.reserve_path(light_paths.get_links(), light_paths.get_slot_list())
+        # self.pt.get_link(links[j]).update_noise(light_paths.get_slot_list(), flow.get_modulation_level())
 
     def get_path(self, flow: Flow) -> LightPath:
         return self.mapped_flows.get(flow)
@@ -161,6 +200,5 @@ class ControlPlane(ControlPlaneForRSA):
         raise NotImplementedError
 
     def groom_flow(self, flow: Flow, lp: LightPath) -> None:
-        for link_id in lp.get_links():
-            self.pt.reserve_slots(self.pt.get_src_link(link_id), self.pt.get_dst_link(link_id), lp.get_slot_list())
+        self.pt.reserve_path(lp.get_links(), lp.get_slot_list())
         self.groom_flow(flow)
@@ -5,6 +5,8 @@ class Event(ABC):
 
     def __init__(self, time: float):
         self.time = time
+        # cancelled events stay queued but are dropped by the EventScheduler instead of being delivered
+        self.cancelled = False
 
     def set_time(self, time: float) -> None:
         self.time = time
@@ -12,6 +14,12 @@ class Event(ABC):
     def get_time(self) -> float:
         return self.time
 
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled
+
     def __eq__(self, other):
         return self.get_time() == other.get_time()
 
@@ -0,0 +1,31 @@
+from typing import Callable, Dict, List, Tuple, Type
+
+from src.Event import Event
+
+
+class EventDispatcher:
+    """
+    Event type -> handler table. Subsystems register one handler per event class they care about and
+    the handler list of each concrete event class is resolved once, in registration order, so the
+    simulation loop only does one dict lookup per event.
+    """
+
+    def __init__(self):
+        self.registry: List[Tuple[Type[Event], Callable[[Event], None]]] = []
+        self.resolved: Dict[Type[Event], List[Callable[[Event], None]]] = {}
+
+    def register(self, event_class: Type[Event], handler: Callable[[Event], None]) -> None:
+        """Adds `handler` for `event_class` and its subclasses, after the handlers already registered"""
+        self.registry.append((event_class, handler))
+        self.resolved = {}
+
+    def handlers_for(self, event_class: Type[Event]) -> List[Callable[[Event], None]]:
+        handlers = self.resolved.get(event_class)
+        if handlers is None:
+            handlers = [handler for cls, handler in self.registry if issubclass(event_class, cls)]
+            self.resolved[event_class] = handlers
+        return handlers
+
+    def dispatch(self, event: Event) -> None:
+        for handler in self.handlers_for(type(event)):
+            handler(event)
@@ -1,35 +1,128 @@
-from queue import PriorityQueue, Empty
+import heapq
+from itertools import count
+from typing import Iterable, Iterator, List, Sequence, Tuple
 
 from src.Event import Event
 
 
-# class EventSort(Event):
-#     def __eq__(self, other):
-#         return self.get_time() == other.get_time()
-#
-#     def __lt__(self, other):
-#         return self.get_time() < other.get_time()
-#
-#     def __gt__(self, other):
-#         return self.get_time() > other.get_time()
-#
-#     def __le__(self, other):
-#         return self.get_time() <= other.get_time()
-#
-#     def __ge__(self, other):
-#         return self.get_time() >= other.get_time()
+class EventScheduler:
+    """
+    Single threaded event queue kept as a binary heap of (time, seq, event) entries.
 
+    seq grows with every insertion, so events with the same time come out in the order they were
+    added and the events themselves are never compared.
+    An optional stream of event groups is pulled lazily, see add_stream(). Cancelled events are
+    dropped when they reach the front of the queue.
+    Other queue structures override push(), push_all(), first(), pop_first() and __len__().
+    """
 
-class EventScheduler:
     def __init__(self):
-        # self.event_sort = EventSort
-        self.event_queue = PriorityQueue()
+        self.event_queue: List[Tuple[float, int, Event]] = []
+        self.seq = count()
+        self.stream: Iterator[Sequence[Event]] = None
+        self.stream_head: Sequence[Event] = None
+
+    def push(self, entry: Tuple[float, int, Event]):
+        heapq.heappush(self.event_queue, entry)
+
+    def push_all(self, entries: List[Tuple[float, int, Event]]):
+        self.event_queue.extend(entries)
+        heapq.heapify(self.event_queue)
+
+    def first(self) -> Tuple[float, int, Event]:
+        """Returns the earliest entry without removing it, None if the queue is empty"""
+        return self.event_queue[0] if self.event_queue else None
+
+    def pop_first(self) -> Tuple[float, int, Event]:
+        """Removes and returns the earliest entry, None if the queue is empty"""
+        return heapq.heappop(self.event_queue) if self.event_queue else None
 
     def add_event(self, event: Event):
-        self.event_queue.put(event)
+        self.push((event.get_time(), next(self.seq), event))
+
+    def add_events(self, events: Iterable[Event]):
+        """Adds a batch of events at once, with one heapify instead of one push per event"""
+        seq = self.seq
+        self.push_all([(event.get_time(), next(seq), event) for event in events])
+
+    def add_stream(self, stream: Iterable[Sequence[Event]]):
+        """
+        Adds events lazily. Each item of `stream` is a group of events whose first one is the earliest,
+        items coming in order of that first time; a group is queued once its first event is due.
+        """
+        self.stream = iter(stream)
+        self.stream_head = next(self.stream, None)
+
+    def refill(self, time: float = None):
+        """Queues the stream groups due before the earliest queued event, or up to `time` if given"""
+        head = self.stream_head
+        while head is not None:
+            if time is None:
+                entry = self.first()
+                if entry is not None and head[0].get_time() > entry[0]:
+                    break
+            elif head[0].get_time() > time:
+                break
+            for event in head:
+                self.add_event(event)
+            head = next(self.stream, None)
+        self.stream_head = head
 
     def pop_event(self) -> Event:
-        try:
-            return self.event_queue.get_nowait()
-        except Empty:
-            return None
+        while True:
+            if self.stream_head is not None:
+                self.refill()
+            entry = self.pop_first()
+            if entry is None:
+                return None
+            if not entry[2].cancelled:
+                return entry[2]
+
+    def peek(self) -> Event:
+        """Returns the next event without removing it, None if the queue is empty"""
+        while True:
+            if self.stream_head is not None:
+                self.refill()
+            entry = self.first()
+            if entry is None:
+                return None
+            if not entry[2].cancelled:
+                return entry[2]
+            self.pop_first()
+
+    def pop_until(self, time: float) -> List[Event]:
+        """Removes and returns, in order, every event with a time not later than `time`"""
+        if self.stream_head is not None:
+            self.refill(time)
+        events = []
+        entry = self.first()
+        while entry is not None and entry[0] <= time:
+            self.pop_first()
+            if not entry[2].cancelled:
+                events.append(entry[2])
+            entry = self.first()
+        return events
+
+    def clear(self):
+        """Drops every queued event and the rest of the stream, ending the run"""
+        self.event_queue = []
+        self.stream = None
+        self.stream_head = None
+
+    def entries(self) -> List[Tuple[float, int, Event]]:
+        """Every queued entry, cancelled ones included, in no particular order"""
+        return list(self.event_queue)
+
+    def next_seq(self) -> int:
+        """The seq the next queued event will get, without using it up"""
+        seq = next(self.seq)
+        self.seq = count(seq)
+        return seq
+
+    def restore(self, entries: List[Tuple[float, int, Event]], next_seq: int):
+        """Queues `entries` with the seq they were saved with and numbers the next events from `next_seq`"""
+        self.push_all(list(entries))
+        self.seq = count(next_seq)
+
+    def __len__(self) -> int:
+        return len(self.event_queue)
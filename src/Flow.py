@@ -20,6 +20,7 @@ class Flow:
             self.groomed = False
             self.links = [int]
             self.slot_list = [Slot]
+            self.departure_event = None
 
     def get_time(self) -> float:
         return self.time
@@ -86,6 +87,12 @@ class Flow:
     def set_modulation_level(self, modulation_level: int) -> None:
         self.modulation_level = modulation_level
 
+    def get_departure_event(self):
+        return self.departure_event
+
+    def set_departure_event(self, departure_event) -> None:
+        self.departure_event = departure_event
+
     def is_groomed(self) -> bool:
         return self.groomed
 
@@ -0,0 +1,50 @@
+from typing import Callable, Dict, List
+
+
+class HookBus:
+    """
+    Observer hooks of a simulation: the tracer, the statistics, profilers or exporters subscribe callbacks
+    to the points they care about.
+
+    Every hook is an attribute that stays None while nobody subscribes, is the callback itself with one
+    subscriber and a fan-out with more, so an unobserved call site costs one load and one test:
+
+        hook = self.hooks.accept
+        if hook is not None:
+            hook(flow, lightpath, p_reuse)
+
+    Hooks and their arguments:
+        arrival(flow), accept(flow, lightpath, p_reuse), block(flow),
+        lightpath_created(lightpath), lightpath_removed(lightpath),
+        p_cycle_created(p_cycle), p_cycle_reused(p_cycle, flow)
+    """
+
+    HOOKS = ("arrival", "accept", "block", "lightpath_created", "lightpath_removed", "p_cycle_created", "p_cycle_reused")
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[Callable]] = {name: [] for name in HookBus.HOOKS}
+        for name in HookBus.HOOKS:
+            setattr(self, name, None)
+
+    def subscribe(self, hook: str, callback: Callable) -> None:
+        """Adds `callback` to `hook`, called after the callbacks already subscribed"""
+        assert hook in self.subscribers, "Unknown hook " + hook
+        self.subscribers[hook].append(callback)
+        self.bind(hook)
+
+    def unsubscribe(self, hook: str, callback: Callable) -> None:
+        assert hook in self.subscribers, "Unknown hook " + hook
+        self.subscribers[hook].remove(callback)
+        self.bind(hook)
+
+    def bind(self, hook: str) -> None:
+        callbacks = tuple(self.subscribers[hook])
+        if not callbacks:
+            setattr(self, hook, None)
+        elif len(callbacks) == 1:
+            setattr(self, hook, callbacks[0])
+        else:
+            def fan_out(*args):
+                for callback in callbacks:
+                    callback(*args)
+            setattr(self, hook, fan_out)
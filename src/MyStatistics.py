@@ -1,4 +1,6 @@
+import sys
 import threading
+from typing import List
 
 from src.OutputManager import OutputManager
 from src.PhysicalTopology import PhysicalTopology
@@ -10,6 +12,8 @@ from src.Modulations import Modulations
 from src.Event import Event
 from src.FlowArrivalEvent import FlowArrivalEvent
 from src.FlowDepartureEvent import FlowDepartureEvent
+from src.util.WarmupDetector import WarmupDetector
+from src.util.ConfidenceStop import ConfidenceStop
 
 
 class MyStatistics:
@@ -22,6 +26,12 @@ class MyStatistics:
         self.traffic = TrafficGenerator
 
         self.min_number_arrivals = 0
+        # optional online warm-up detection, which then sets min_number_arrivals
+        self.warmup: WarmupDetector = None
+        # optional run-until-confidence rule, checked after each arrival by the SimulationRunner
+        self.stopping: ConfidenceStop = None
+        # arrivals between two calculate_periodical_statistics() samples
+        self.periodical_interval = 25000
         self.number_arrivals = 0
         self.arrivals = 0
         self.departures = 0
@@ -73,8 +83,11 @@ class MyStatistics:
         raise Exception("CloneNotSupportedException")
 
     def statistics_setup(self, plotter: OutputManager, pt: PhysicalTopology, traffic: TrafficGenerator, num_nodes: int,
-                         num_classes: int, min_number_arrivals: int, load: float, verbose: bool) -> None:
+                         num_classes: int, min_number_arrivals: int, load: float, verbose: bool,
+                         periodical_interval: int = 25000, warmup: WarmupDetector = None,
+                         stopping: ConfidenceStop = None) -> None:
         self.verbose = verbose
+        self.periodical_interval = periodical_interval
         self.plotter = plotter
         self.pt = pt
         self.traffic = traffic
@@ -89,6 +102,11 @@ class MyStatistics:
         self.avg_bits_per_symbol = 0.0
         self.avg_bits_per_symbol_count = 0
         self.min_number_arrivals = min_number_arrivals
+        self.warmup = warmup
+        self.stopping = stopping
+        if warmup is not None:
+            # nothing is counted until the detector sees the end of the transient
+            self.min_number_arrivals = sys.maxsize
         self.number_of_used_transponders = [[0 for _ in range(num_nodes)] for _ in range(num_nodes)]
 
         self.arrivals_diff = [0 for _ in range(num_classes)]
@@ -119,6 +137,10 @@ class MyStatistics:
             self.avg_bits_per_symbol /= self.avg_bits_per_symbol_count
         else:
             self.avg_bits_per_symbol = 0
+        if self.warmup is not None:
+            self.plotter.add_dot_to_graph("warmup", self.load, self.warmup.start)
+        if self.stopping is not None:
+            self.plotter.add_dot_to_graph("bp-precision", self.load, self.stopping.relative_half_width())
         self.plotter.add_dot_to_graph("avgbps", self.load, self.avg_bits_per_symbol)
         self.plotter.add_dot_to_graph("mbbr", self.load, self.blocked_bandwidth * 1.0 / self.required_bandwidth)
         self.plotter.add_dot_to_graph("bp", self.load, (self.blocked * 1.0 / self.arrivals) * 100)
@@ -161,15 +183,13 @@ class MyStatistics:
 
     def calculate_periodical_statistics(self) -> None:
         fragmentation_mean = 0.0
-        average_crosstalk = 0.0
 
-        for i in range(0, self.pt.get_num_links(), 1):
-            fragmentation_mean += self.pt.fragmentation_per_link(self.pt.get_src_link(i), self.pt.get_dst_link(i))
-            # average_crosstalk += self.pt.average_crosstalk(self.pt.get_src_link(i), self.pt.get_dst_link(i))
+        for link_id in self.pt.link_table:
+            fragmentation_mean += self.pt.link_fragmentation(link_id)
 
-        # average_crosstalk /= self.pt.get_num_links()
-        # self.plotter.add_dot_to_graph("avgcrosstalk", self.load, average_crosstalk)
-        fragmentation_mean /= self.pt.get_num_links()
+        average_crosstalk = self.pt.average_crosstalk()
+        self.plotter.add_dot_to_graph("avgcrosstalk", self.load, average_crosstalk)
+        fragmentation_mean /= len(self.pt.link_table)
         print("Fragmentation mean: ", fragmentation_mean)
         #with open("/Users/nhungtrinh/Work/bidirectional-eon/out/stats.txt", "a") as f:
          #   f.write(f"fragmentation, {self.load}, {fragmentation_mean} \n")
@@ -184,18 +204,15 @@ class MyStatistics:
         # if mean_transponders != float('nan'):
         #     self.plotter.add_dot_to_graph("transponders", self.load, mean_transponders)
 
-        # xtps = 0.0
-        # links_xtps = 0
-        # for i in range(0, self.pt.get_num_links(), 1):
-        #     try:
-        #         xt = self.pt.get_cross_talk_per_slot(self.pt.get_src_link(i), self.pt.get_dst_link(i))
-        #         if xt > 0:
-        #             xtps += xt
-        #             links_xtps += 1
-        #     except ValueError:
-        #         print("Error: ", ValueError)
-        # if xtps != 0:
-        #     self.plotter.add_dot_to_graph("xtps", self.load, xtps / links_xtps)
+        xtps = 0.0
+        links_xtps = 0
+        for link_id, (src, dst, _) in self.pt.link_table.items():
+            xt = self.pt.get_cross_talk_per_slot(src, dst)
+            if xt > 0:
+                xtps += xt
+                links_xtps += 1
+        if xtps != 0:
+            self.plotter.add_dot_to_graph("xtps", self.load, xtps / links_xtps)
 
     def accept_flow(self, flow: Flow, light_paths: LightPath, p_reuse: bool) -> None:
         if self.number_arrivals > self.min_number_arrivals:
@@ -215,6 +232,8 @@ class MyStatistics:
     #             self.total_power_consumed += flow.get_duration() * len(flow.get_slot_list()) * Modulations.get_power_consumption(flow.get_modulation_level())
 
     def block_flow(self, flow: Flow) -> None:
+        if self.warmup is not None and self.warmup.running():
+            self.warmup.block()
         if self.number_arrivals > self.min_number_arrivals:
             self.blocked += 1
             cos = flow.get_cos()
@@ -225,42 +244,105 @@ class MyStatistics:
             self.blocked_pairs_diff[cos][flow.get_source()][flow.get_destination()] += 1
             self.blocked_bandwidth_pairs[flow.get_source()][flow.get_destination()] += flow.get_rate()
             self.blocked_bandwidth_pairs_diff[cos][flow.get_source()][flow.get_destination()] += flow.get_rate()
+            # its departure is cancelled and never delivered, it is counted now
+            if flow.get_departure_event() is not None:
+                self.departures += 1
 
     def add_event(self, event: Event) -> None:
-        self.sim_time = event.get_time()
         try:
             if isinstance(event, FlowArrivalEvent):
-                self.number_arrivals += 1
-                if self.number_arrivals > self.min_number_arrivals:
-                    cos = event.get_flow().get_cos()
-                    self.arrivals += 1
-                    self.arrivals_diff[cos] += 1
-                    self.required_bandwidth += event.get_flow().get_rate()
-                    self.required_bandwidth_diff[cos] += event.get_flow().get_rate()
-                    self.arrivals_pairs[event.get_flow().get_source()][event.get_flow().get_destination()] += 1
-                    self.arrivals_pairs_diff[cos][event.get_flow().get_source()][
-                        event.get_flow().get_destination()] += 1
-                    self.required_bandwidth_pairs[event.get_flow().get_source()][
-                        event.get_flow().get_destination()] += event.get_flow().get_rate()
-                    self.required_bandwidth_pairs_diff[cos][event.get_flow().get_source()][
-                        event.get_flow().get_destination()] += event.get_flow().get_rate()
-                if self.verbose and (self.arrivals % 10000 == 0):
-                    print(self.verbose)
-                    print(self.arrivals)
+                self.flow_arrived(event)
             elif isinstance(event, FlowDepartureEvent):
-                if self.number_arrivals > self.min_number_arrivals:
-                    self.departures += 1
-                f = event.get_flow()
-                if f.is_accepted():
-                    self.number_of_used_transponders[f.get_source()][f.get_destination()] -= 1
-            # if self.number_arrivals % 100 == 0:
-            #     self.calculate_periodical_statistics()
-            if self.number_arrivals % 25000 == 0:
-                self.calculate_periodical_statistics()
-                print("MyStatistics: 25000")
+                self.flow_departed(event)
+            else:
+                self.sim_time = event.get_time()
+                self.check_periodical_statistics()
         except Exception as e:
             print("Error in MyStatistics: ", e)
 
+    def flow_arrived(self, event: FlowArrivalEvent) -> None:
+        self.sim_time = event.get_time()
+        self.number_arrivals += 1
+        if self.warmup is not None and self.warmup.running():
+            self.check_warmup()
+        if self.number_arrivals > self.min_number_arrivals:
+            cos = event.get_flow().get_cos()
+            self.arrivals += 1
+            self.arrivals_diff[cos] += 1
+            self.required_bandwidth += event.get_flow().get_rate()
+            self.required_bandwidth_diff[cos] += event.get_flow().get_rate()
+            self.arrivals_pairs[event.get_flow().get_source()][event.get_flow().get_destination()] += 1
+            self.arrivals_pairs_diff[cos][event.get_flow().get_source()][
+                event.get_flow().get_destination()] += 1
+            self.required_bandwidth_pairs[event.get_flow().get_source()][
+                event.get_flow().get_destination()] += event.get_flow().get_rate()
+            self.required_bandwidth_pairs_diff[cos][event.get_flow().get_source()][
+                event.get_flow().get_destination()] += event.get_flow().get_rate()
+        if self.verbose and (self.arrivals % 10000 == 0):
+            print(self.verbose)
+            print(self.arrivals)
+        self.check_periodical_statistics()
+
+    def flow_departed(self, event: FlowDepartureEvent) -> None:
+        self.sim_time = event.get_time()
+        if self.number_arrivals > self.min_number_arrivals:
+            self.departures += 1
+        f = event.get_flow()
+        if f.is_accepted():
+            self.number_of_used_transponders[f.get_source()][f.get_destination()] -= 1
+        self.check_periodical_statistics()
+
+    def check_warmup(self) -> None:
+        """Feeds the warm-up detector and starts counting at this arrival once the transient is over"""
+        # without a detection by half of the calls, the second half is counted
+        if self.warmup.arrival(self.pt.utilization()) or self.number_arrivals > self.traffic.calls // 2:
+            self.warmup.finish(self.number_arrivals)
+            self.min_number_arrivals = self.number_arrivals - 1
+            print(f"Warm-up: MSER-5 cutoff {self.warmup.cutoff} arrivals, counting from arrival {self.warmup.start}")
+
+    def precision_reached(self) -> bool:
+        """Feeds the stopping rule once an arrival is accepted or blocked, True when the run can stop"""
+        if self.number_arrivals <= self.min_number_arrivals:
+            return False
+        if not self.stopping.update(self.arrivals, self.blocked, self.required_bandwidth, self.blocked_bandwidth):
+            return False
+        print(f"Precision reached after {self.number_arrivals} arrivals: relative half-width "
+              f"{self.stopping.relative_half_width()} over {len(self.stopping.bp_batches)} batches")
+        return True
+
+    def flows_departed(self, events: List[FlowDepartureEvent]) -> None:
+        """
+        Same as flow_departed() for departures in a row, which the SimulationRunner only batches when
+        periodical_due() is False, so that check_periodical_statistics() would do nothing for them
+        """
+        self.sim_time = events[-1].get_time()
+        if self.number_arrivals > self.min_number_arrivals:
+            self.departures += len(events)
+        for event in events:
+            f = event.get_flow()
+            if f.is_accepted():
+                self.number_of_used_transponders[f.get_source()][f.get_destination()] -= 1
+
+    def periodical_due(self) -> bool:
+        return self.number_arrivals % self.periodical_interval == 0
+
+    def check_periodical_statistics(self) -> None:
+        # if self.number_arrivals % 100 == 0:
+        #     self.calculate_periodical_statistics()
+        if self.periodical_due():
+            self.calculate_periodical_statistics()
+            print(f"MyStatistics: {self.periodical_interval}")
+
+    def register_handlers(self, dispatcher) -> None:
+        """Registers the event handlers with an EventDispatcher"""
+        dispatcher.register(FlowArrivalEvent, self.flow_arrived)
+        dispatcher.register(FlowDepartureEvent, self.flow_departed)
+
+    def register_hooks(self, hooks) -> None:
+        """Subscribes to the accept and block hooks of a HookBus"""
+        hooks.subscribe("accept", self.accept_flow)
+        hooks.subscribe("block", self.block_flow)
+
     def fancy_statistics(self) -> str:
         accept_prob = 0.0
         block_prob = 0.0
@@ -276,7 +358,12 @@ class MyStatistics:
             block_prob = (self.blocked/ self.arrivals) * 100
             bbr = (self.blocked_bandwidth/ self.required_bandwidth) * 100
 
-        stats = f"Arrivals \t: {self.arrivals}\n"
+        stats = ""
+        if self.warmup is not None:
+            stats += f"Warm-up \t: {self.warmup.cutoff} arrivals (MSER-5), counted from arrival {self.warmup.start}\n"
+        if self.stopping is not None:
+            stats += f"BP precision \t: {self.stopping.relative_half_width()} over {len(self.stopping.bp_batches)} batches\n"
+        stats += f"Arrivals \t: {self.arrivals}\n"
         stats += f"Required BW \t: {self.required_bandwidth}\n"
         stats += f"Departures \t: {self.departures}\n"
         stats += f"Accepted \t: {self.accepted}\t({accept_prob}%)\n"
@@ -1,17 +1,46 @@
 import xml.etree.ElementTree as ET
 import networkx as nx
-from typing import List
+import numpy as np
+from typing import Dict, List, Tuple
 from src.Slot import Slot
+from src.SpectrumSnapshot import SpectrumSnapshot
 from src.TrafficInfo import TrafficInfo
+from src.util.CoreAdjacency import CoreAdjacency
+from src.util.CSRGraph import CSRGraph
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 class PhysicalTopology:
-    def __init__(self, xml: ET.Element, verbose: bool):
+    def __init__(self, xml: ET.Element, verbose: bool, compiled: Dict[str, np.ndarray] = None):
         assert len(xml) == 2, "Only two elements are allowed in the physical topology"
         self.verbose = verbose
         self.cores = 0
         self.slots = 0
         self.slot_bw = 0.0
         self.graph = nx.Graph()
+        # link id -> (src, dst, edge data) and (src, dst) -> link id, filled by build_link_table()
+        self.link_table: Dict[int, Tuple[int, int, dict]] = {}
+        self.link_index: Dict[Tuple[int, int], int] = {}
+        # array copy of the graph for the path searches, rebuilt with the link table
+        self.csr: CSRGraph = None
+        # validated links in file order as (id, src, dst, distance, delay, weight), and the arrays of a
+        # TopologyCache which, when given, replace the parsing of the links
+        self.link_rows: List[Tuple[int, int, int, int, float, float]] = []
+        self.compiled = compiled
+        # link id -> one bitmask per core, bit i set meaning slot i is reserved
+        self.occupied: Dict[int, List[int]] = {}
+        self.full_mask = 0
+        # link id -> per core index of maximal free blocks, also giving the fragmentation statistics
+        self.block_index: Dict[int, List[FreeBlockIndex]] = {}
+        # optional links x cores x slots occupancy tensor (1 = reserved), enabled with tensor="true"
+        self.use_tensor = False
+        self.tensor = None
+        # cores x cores neighbour matrix, set by the core-adjacency attribute (see CoreAdjacency)
+        self.core_adjacency = None
+        self.core_neighbours: List[List[int]] = []
+        # link id -> number of (reserved slot, reserved slot of a neighbouring core) pairs, kept by update_link()
+        self.adjacent_occupied: Dict[int, int] = {}
+        # number of reserved (link, core, slot) triples, kept by update_link()
+        self.reserved_slots = 0
         self.load_topology(xml)
 
     def load_topology(self, xml: ET.Element):
@@ -22,38 +51,55 @@ class PhysicalTopology:
             self.cores = int(xml.attrib.get("cores"))
             self.slots = int(xml.attrib.get("slots"))
             self.slot_bw = float(xml.attrib.get("slotsBandwidth"))
+            self.full_mask = (1 << self.slots) - 1
+            self.use_tensor = xml.attrib.get("tensor", "false").lower() == "true"
+            self.core_adjacency = CoreAdjacency.parse(self.cores, xml.attrib.get("core-adjacency"))
+            self.core_neighbours = CoreAdjacency.neighbours(self.core_adjacency)
 
-            for child in xml:
-                if child.tag == "nodes":
-                    for node in child:
-                        assert node.tag == "node" or "id" not in node.attrib.keys(), "Invalid node element"
-                        self.graph.add_node(int(node.attrib["id"]))
-                elif child.tag == "links":
-                    for link in child:
-                        assert link.tag == "link", "Invalid link element"
-                        assert "id" in link.attrib, "Invalid link element id"
-                        assert "source" in link.attrib, "Invalid link element source"
-                        assert "destination" in link.attrib, "Invalid link element destination"
-                        assert "delay" in link.attrib, "Invalid link element delay"
-                        assert "bandwidth" in link.attrib, "Invalid link element bandwidth"
-                        assert "weight" in link.attrib, "Invalid link element weight"
-                        assert "distance" in link.attrib, "Invalid link element distance"
-                        id = int(link.attrib["id"])
-                        src = int(link.attrib["source"])
-                        dst = int(link.attrib["destination"])
-                        delay = float(link.attrib["delay"])
-                        bandwidth = float(link.attrib["bandwidth"])
-                        weight = float(link.attrib["weight"])
-                        distance = int(link.attrib["distance"])
-                        self.graph.add_edge(src, dst, id=id, delay=delay, slot=self.slots, weight=weight, reserved_slots=set())
-                else:
-                    raise ValueError("Unknown element " + child.tag + " in the physical topology file!")
+            if self.compiled is not None:
+                self.load_compiled_links()
+            else:
+                for child in xml:
+                    if child.tag == "nodes":
+                        for node in child:
+                            assert node.tag == "node" or "id" not in node.attrib.keys(), "Invalid node element"
+                            self.graph.add_node(int(node.attrib["id"]))
+                    elif child.tag == "links":
+                        for link in child:
+                            assert link.tag == "link", "Invalid link element"
+                            assert "id" in link.attrib, "Invalid link element id"
+                            assert "source" in link.attrib, "Invalid link element source"
+                            assert "destination" in link.attrib, "Invalid link element destination"
+                            assert "delay" in link.attrib, "Invalid link element delay"
+                            assert "bandwidth" in link.attrib, "Invalid link element bandwidth"
+                            assert "weight" in link.attrib, "Invalid link element weight"
+                            assert "distance" in link.attrib, "Invalid link element distance"
+                            id = int(link.attrib["id"])
+                            src = int(link.attrib["source"])
+                            dst = int(link.attrib["destination"])
+                            delay = float(link.attrib["delay"])
+                            bandwidth = float(link.attrib["bandwidth"])
+                            weight = float(link.attrib["weight"])
+                            distance = int(link.attrib["distance"])
+                            self.graph.add_edge(src, dst, id=id, delay=delay, slot=self.slots, weight=weight, distance=distance)
+                            self.link_rows.append((id, src, dst, distance, delay, weight))
+                    else:
+                        raise ValueError("Unknown element " + child.tag + " in the physical topology file!")
 
+            self.build_link_table()
             if self.verbose:
                 print(self.graph.number_of_nodes(), " nodes\n", self.graph.number_of_edges(), " links", sep="")
         except Exception as e:
             raise e
 
+    def load_compiled_links(self) -> None:
+        """Replays the cached links in file order, giving the same graph as parsing them"""
+        self.graph.add_nodes_from(self.compiled["nodes"].tolist())
+        for (id, src, dst, distance), (delay, weight) in zip(self.compiled["link_ints"].tolist(),
+                                                             self.compiled["link_floats"].tolist()):
+            self.graph.add_edge(src, dst, id=id, delay=delay, slot=self.slots, weight=weight, distance=distance)
+            self.link_rows.append((id, src, dst, distance, delay, weight))
+
     def get_num_nodes(self) -> int:
         return self.graph.number_of_nodes()
 
@@ -75,19 +121,54 @@ class PhysicalTopology:
     def get_graph(self):
         return self.graph
 
+    def get_csr(self) -> CSRGraph:
+        return self.csr
+
     def set_graph(self, graph):
         self.graph = graph
+        self.compiled = None
+        self.build_link_table()
+
+    def build_link_table(self) -> None:
+        """Index every edge of the graph by its link id and by its end nodes"""
+        self.link_table = {}
+        self.link_index = {}
+        for src, dst, data in self.graph.edges(data=True):
+            # keep the first edge carrying an id, as the former linear scan did
+            self.link_table.setdefault(data["id"], (src, dst, data))
+            self.link_index[(src, dst)] = data["id"]
+            self.link_index[(dst, src)] = data["id"]
+            if data["id"] not in self.occupied:
+                self.occupied[data["id"]] = [0] * self.cores
+                self.block_index[data["id"]] = [FreeBlockIndex(self.slots) for _ in range(self.cores)]
+        self.csr = CSRGraph(self.graph) if self.compiled is None else CSRGraph.from_arrays(self.compiled)
+        if self.use_tensor:
+            self.build_tensor()
+        self.adjacent_occupied = dict(zip(*self.cross_talk_counts()))
+
+    def build_tensor(self) -> None:
+        """Builds the occupancy tensor from the bitmasks; the extra last row stays free and pads short paths"""
+        rows = max(self.occupied, default=-1) + 2
+        self.tensor = np.zeros((rows, self.cores, self.slots), dtype=np.uint8)
+        for link_id, occupied in self.occupied.items():
+            for core, mask in enumerate(occupied):
+                self.tensor[link_id, core] = self.mask_to_array(mask)
 
     def get_link(self, link_id: int):
-        for edge in self.graph.edges(data=True):
-            if edge[2].get("id") == link_id:  # Check if the edge has the requested ID
-                return edge  # Return the full edge as a tuple (src, dst, data)
+        return self.link_table.get(link_id)
 
     def get_src_link(self, link_index: int):
-        return self.get_link(link_index)[0] if self.get_link(link_index) else None
+        link = self.link_table.get(link_index)
+        return link[0] if link else None
 
     def get_dst_link(self, link_index: int):
-        return self.get_link(link_index)[1] if self.get_link(link_index) else None
+        link = self.link_table.get(link_index)
+        return link[1] if link else None
+
+    def get_endpoints(self, link_ids: List[int]) -> List[Tuple[int, int]]:
+        """Returns the (src, dst) pair of every link in `link_ids`, (None, None) for an unknown link"""
+        table = self.link_table
+        return [table[link_id][:2] if link_id in table else (None, None) for link_id in link_ids]
 
     def get_link_dst(self, src: int, dst: int):
         return self.graph[src][dst] if self.graph.has_edge(src, dst) else None
@@ -99,8 +180,9 @@ class PhysicalTopology:
         return self.graph.degree[node_id] if node_id in self.graph.nodes else 0
 
     def get_link_id(self, src: int, dst: int) -> int:
-        if self.graph.has_edge(src, dst):
-            return self.graph[src][dst]["id"]
+        link_id = self.link_index.get((src, dst))
+        if link_id is not None:
+            return link_id
         # elif self.graph.has_edge(dst, src):
         #     return self.graph[dst][src]["id"]
         else:
@@ -136,29 +218,84 @@ class PhysicalTopology:
             print(edge)
 
     def get_spectrum(self, src: int, dst: int) -> List[List[bool]]:
-        if not self.graph.has_edge(src, dst):
+        """Compatibility view of the edge spectrum, True meaning a free slot, built from the bitmasks"""
+        link_id = self.link_index.get((src, dst))
+        if link_id is None:
             return []
 
-        edge_data = self.graph.edges[src, dst]
-        cores = self.cores
         slots = self.slots
-        reserved_slots = edge_data["reserved_slots"]
-
-        free_slots = [[True for _ in range(slots)] for _ in range(cores)]
-        for core, slot in reserved_slots:
-            free_slots[core][slot] = False
+        free_slots = []
+        for mask in self.occupied[link_id]:
+            bits = format(mask, "b").zfill(slots)[::-1]
+            free_slots.append([bit == "0" for bit in bits])
         return free_slots
 
+    def get_free_mask(self, link_id: int, core: int) -> int:
+        """Returns the free slots of `core` on link `link_id` as a bitmask, bit i set meaning slot i is free"""
+        return self.full_mask & ~self.occupied[link_id][core]
+
+    def path_free_mask(self, links: List[int], core: int) -> int:
+        """Returns the slots of `core` that are free on every link of `links` as a bitmask"""
+        mask = self.full_mask
+        occupied = self.occupied
+        for link_id in links:
+            mask &= ~occupied[link_id][core]
+        return mask
+
+    def snapshot(self) -> SpectrumSnapshot:
+        """Returns a copy-on-write overlay for trial reservations, see SpectrumSnapshot"""
+        return SpectrumSnapshot(self)
+
+    def mask_to_array(self, mask: int) -> np.ndarray:
+        """Unpacks a slot bitmask into a uint8 array of length `slots`, element i being bit i"""
+        raw = np.frombuffer(mask.to_bytes((self.slots + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:self.slots]
+
+    def get_path_link_ids(self, path: List[int]) -> List[int]:
+        """Converts a path given as a node list into its list of link ids"""
+        index = self.link_index
+        return [index[(path[i], path[i + 1])] for i in range(len(path) - 1)]
+
+    def paths_free_spectrum(self, paths: List[List[int]]) -> np.ndarray:
+        """
+        Joint free spectrum of a batch of paths given as link id lists.
+        :return: boolean array of shape (len(paths), cores, slots), True where the slot is free on every link of the path
+        """
+        if self.tensor is None:
+            res = np.empty((len(paths), self.cores, self.slots), dtype=bool)
+            for p, links in enumerate(paths):
+                for core in range(self.cores):
+                    res[p, core] = self.mask_to_array(self.path_free_mask(links, core))
+            return res
+
+        pad = self.tensor.shape[0] - 1
+        hops = max((len(links) for links in paths), default=0)
+        index = np.full((len(paths), max(hops, 1)), pad, dtype=np.intp)
+        for p, links in enumerate(paths):
+            index[p, :len(links)] = links
+        return ~self.tensor[index].any(axis=1)
+
+    def path_spectrum(self, links: List[int]) -> List[List[bool]]:
+        """Joint free spectrum of one path in the list-of-lists layout of get_spectrum()"""
+        return self.paths_free_spectrum([links])[0].tolist()
+
+    def slot_list_to_masks(self, slot_list: List[Slot]) -> Dict[int, int]:
+        """Groups `slot_list` into one bitmask per core, validating every slot once"""
+        masks = {}
+        for s in slot_list:
+            assert 0 <= s.core < self.cores, "Illegal argument exception"
+            assert 0 <= s.slot < self.slots, "Illegal argument exception"
+            masks[s.core] = masks.get(s.core, 0) | (1 << s.slot)
+        return masks
+
     def are_slots_available(self, src: int, dst: int, slot_list: List[Slot]) -> bool:
-        if not self.graph.has_edge(src, dst):
+        link_id = self.link_index.get((src, dst))
+        if link_id is None:
             return False
 
-        edge_data = self.graph[src][dst]
-        reserved_slots = edge_data["reserved_slots"]
-        for i in range(0, len(slot_list), 1):
-            assert 0 <= slot_list[i].core < self.cores, "Illegal argument exception"
-            assert 0 <= slot_list[i].slot < self.slots, "Illegal argument exception"
-            if (slot_list[i].core, slot_list[i].slot) in reserved_slots:
+        occupied = self.occupied[link_id]
+        for core, mask in self.slot_list_to_masks(slot_list).items():
+            if occupied[core] & mask:
                 return False
         return True
 
@@ -166,29 +303,99 @@ class PhysicalTopology:
         """Returns the number of free slots on the edge between `src` and `dst`"""
         assert self.graph.has_edge(src, dst), "Edge does not exist"
 
-        edge_data = self.graph[src][dst]
-        total_slots = self.slots * self.cores
-        reserved_slots = edge_data["reserved_slots"]
+        return sum(index.free for index in self.block_index[self.link_index[(src, dst)]])
+
+    def get_free_block_stats(self, link_id: int, core: int) -> Tuple[int, int, int]:
+        """Returns (free slots, largest contiguous free block, number of free blocks) of `core` on link `link_id`"""
+        return self.block_index[link_id][core].stats()
+
+    def get_free_blocks(self, link_id: int, core: int) -> List[Tuple[int, int]]:
+        """Returns the maximal free blocks of `core` on link `link_id` as (start, length)"""
+        return self.block_index[link_id][core].blocks()
+
+    def first_fit(self, link_id: int, core: int, demand: int) -> int:
+        """Lowest slot starting `demand` contiguous free slots on link `link_id`, -1 if there is none"""
+        return self.block_index[link_id][core].first_fit(demand)
 
-        return total_slots - len(reserved_slots)
+    def best_fit(self, link_id: int, core: int, demand: int) -> int:
+        """Start of the smallest free block of at least `demand` slots on link `link_id`, -1 if there is none"""
+        return self.block_index[link_id][core].best_fit(demand)
+
+    def exact_fit(self, link_id: int, core: int, demand: int) -> int:
+        """Start of a free block of exactly `demand` slots on link `link_id`, -1 if there is none"""
+        return self.block_index[link_id][core].exact_fit(demand)
+
+    def path_first_fit(self, links: List[int], core: int, demand: int) -> int:
+        """Lowest slot starting `demand` contiguous slots free on every link of `links`, -1 if there is none"""
+        return FreeBlockIndex.first_fit_in_mask(self.path_free_mask(links, core), demand)
+
+    def path_free_blocks(self, links: List[int], core: int) -> List[Tuple[int, int]]:
+        """Returns the blocks free on every link of `links` as (start, length)"""
+        return FreeBlockIndex.blocks_in_mask(self.path_free_mask(links, core))
+
+    def update_link(self, link_id: int, masks: Dict[int, int], reserve: bool) -> None:
+        """Sets (reserve) or clears the per-core slot `masks` of link `link_id`"""
+        occupied = self.occupied[link_id]
+        for core, mask in masks.items():
+            if reserve:
+                changed = mask & ~occupied[core]
+                occupied[core] |= mask
+            else:
+                changed = mask & occupied[core]
+                occupied[core] &= ~mask
+            if changed:
+                self.block_index[link_id][core].update(changed, reserve)
+                self.reserved_slots += bin(changed).count("1") if reserve else -bin(changed).count("1")
+                # every pair is seen from both of its cores, as in the per-slot count
+                pairs = sum(bin(changed & occupied[n]).count("1") for n in self.core_neighbours[core])
+                self.adjacent_occupied[link_id] += 2 * pairs if reserve else -2 * pairs
+            if self.tensor is not None:
+                self.tensor[link_id, core] = self.mask_to_array(occupied[core])
 
     def reserve_slots(self, src: int, dst: int, slot_list: List[Slot]) -> bool:
         try:
             assert self.graph.has_edge(src, dst), "Edge does not exist"
-            edge_data = self.graph[src][dst]
-            for i in range(0, len(slot_list), 1):
-                assert 0 <= slot_list[i].core < self.cores, "Illegal argument exception"
-                assert 0 <= slot_list[i].slot < self.slots, "Illegal argument exception"
-            
-            for s in slot_list:
-                # Add the new slot to the reserved_slots set
-                edge_data["reserved_slots"].add((s.core, s.slot))
+            self.update_link(self.link_index[(src, dst)], self.slot_list_to_masks(slot_list), True)
             return True
         except Exception as e:
             raise e
             exit(1)
             return False
 
+    def reserve_path(self, links: List[int], slot_list: List[Slot]) -> bool:
+        """
+        Reserves `slot_list` on every link of `links` at once, or on none of them: returns False and leaves
+        the links untouched if a link does not exist or has one of the slots reserved already
+        """
+        masks = self.slot_list_to_masks(slot_list)
+        for link_id in links:
+            occupied = self.occupied.get(link_id)
+            if occupied is None or any(occupied[core] & mask for core, mask in masks.items()):
+                return False
+        for link_id in links:
+            self.update_link(link_id, masks, True)
+        return True
+
+    def release_path(self, links: List[int], slot_list: List[Slot]) -> None:
+        """Releases `slot_list` on every link of `links` at once"""
+        assert all(link_id in self.occupied for link_id in links), "Link does not exist"
+        masks = self.slot_list_to_masks(slot_list)
+        for link_id in links:
+            self.update_link(link_id, masks, False)
+
+    def release_paths(self, paths: List[Tuple[List[int], List[Slot]]]) -> None:
+        """Releases several (links, slot_list) at once, the masks of each link being merged into one update"""
+        released: Dict[int, Dict[int, int]] = {}
+        for links, slot_list in paths:
+            masks = self.slot_list_to_masks(slot_list)
+            for link_id in links:
+                link_masks = released.setdefault(link_id, {})
+                for core, mask in masks.items():
+                    link_masks[core] = link_masks.get(core, 0) | mask
+        assert all(link_id in self.occupied for link_id in released), "Link does not exist"
+        for link_id, masks in released.items():
+            self.update_link(link_id, masks, False)
+
     # def reserve_sharing_lots(self, src: int, dst: int, slot_list: List[Slot]) -> bool:
     #     try:
     #         assert self.graph.has_edge(src, dst), "Edge does not exist"
@@ -209,14 +416,7 @@ class PhysicalTopology:
     def release_slots(self, src: int, dst: int, slot_list: List[Slot]) -> None:
         try:
             assert self.graph.has_edge(src, dst), "Edge does not exist"
-            edge_data = self.graph[src][dst]
-            for i in range(0, len(slot_list), 1):
-                assert 0 <= slot_list[i].core < self.cores, "Illegal argument exception"
-                assert 0 <= slot_list[i].slot < self.slots, "Illegal argument exception"
-            reserved_slots = edge_data["reserved_slots"]
-            for s in slot_list:
-                reserved_slots.discard((s.core, s.slot))
-            self.graph[src][dst]["reserved_slots"] = reserved_slots
+            self.update_link(self.link_index[(src, dst)], self.slot_list_to_masks(slot_list), False)
         except Exception as e:
             raise e
 
@@ -237,65 +437,69 @@ class PhysicalTopology:
         return 1 - (max_contiguous / total_free)
 
     def fragmentation_per_link(self, src, dst) -> float:
-        spectrum_matrix = self.get_spectrum(src, dst)
-        frags = [self.fragmentation_ratio_1d(core) for core in spectrum_matrix]
+        return self.link_fragmentation(self.link_index[(src, dst)])
+
+    def link_fragmentation(self, link_id: int) -> float:
+        """Mean over cores of 1 - largest free block / free slots, read from the maintained block statistics"""
+        frags = [1 - (largest / free) if free else 0.0
+                 for free, largest, _ in (index.stats() for index in self.block_index[link_id])]
         return sum(frags) / len(frags)
 
     def get_fragmentation_ratio(self, src, dst, traffic_calls: List[TrafficInfo], slot_capacity: float) -> float:
-        free_slots = self.get_spectrum(src, dst)
+        """
+        Mean over the free blocks of core 0 of the share of `traffic_calls` needing at least as many slots as
+        the block, the blocks read from the block index
+        """
         fragments_potential = []
+        for _, fragment_size in self.get_free_blocks(self.link_index[(src, dst)], 0):
+            counter = 0
+            for call in traffic_calls:
+                if call.get_rate() / slot_capacity >= fragment_size:
+                    counter += 1
+            fragments_potential.append(float(counter / len(traffic_calls)))
+        return sum(fragments_potential) / len(fragments_potential)
+
+    def utilization(self) -> float:
+        """Fraction of the slots of all links and cores that are reserved"""
+        return self.reserved_slots / (len(self.occupied) * self.cores * self.slots)
+
+    def occupancy_array(self, link_ids: List[int]) -> np.ndarray:
+        """uint8 array of shape (len(link_ids), cores, slots), 1 where the slot is reserved"""
+        if self.tensor is not None:
+            return self.tensor[link_ids]
+        res = np.zeros((len(link_ids), self.cores, self.slots), dtype=np.uint8)
+        for l, link_id in enumerate(link_ids):
+            for core, mask in enumerate(self.occupied[link_id]):
+                res[l, core] = self.mask_to_array(mask)
+        return res
+
+    def adjacent_occupied_per_slot(self, link_id: int) -> np.ndarray:
+        """(cores, slots) array with the number of neighbouring cores that have the slot reserved"""
+        occupancy = self.occupancy_array([link_id])[0].astype(np.int64)
+        return self.core_adjacency.astype(np.int64) @ occupancy
+
+    def cross_talk_counts(self) -> Tuple[List[int], np.ndarray]:
+        """Adjacent-occupied pair counts of every link in one pass, returned as (link ids, counts)"""
+        link_ids = sorted(self.occupied)
+        occupancy = self.occupancy_array(link_ids).astype(np.int64)
+        counts = np.einsum("lcs,cd,lds->l", occupancy, self.core_adjacency.astype(np.int64), occupancy)
+        return link_ids, counts.tolist()
 
-        for i in range(0, len(free_slots), 1):
-            if free_slots[0][i]:
-                i += 1
-                fragment_size = 1
-                while free_slots[0][i] and i < len(free_slots) - 2:
-                    fragment_size += 1
-                    i += 1
-                counter = 0
-                for call in traffic_calls:
-                    if call.get_rate() / slot_capacity >= fragment_size:
-                        counter += 1
-                fragments_potential.append(float(counter / len(traffic_calls)))
-        sum = 0
-        for potential in fragments_potential:
-            sum += potential
-        # print("fragments_potential", fragments_potential)
-        # print("sum", sum / len(fragments_potential))
-        return sum / len(fragments_potential)
-    
     def get_cross_talk_per_slot(self, src, dst) -> float:
-        if self.cores == 1 or self.get_num_free_slots(src, dst) == self.slots * self.cores:
+        """Adjacent reserved slots per reserved slot of the link, -1 if single core or unused"""
+        free = self.get_num_free_slots(src, dst)
+        if self.cores == 1 or free == self.slots * self.cores:
             return -1.0
-        aoc = 0
-        free_slots = self.get_spectrum(src, dst)
-        for i in range(0, len(free_slots), 1):
-            for j in range(0, len(free_slots[i]), 1):
-                if not free_slots[i][j]:
-                    if i == 0:
-                        if not free_slots[self.cores - 1][j]:
-                            aoc += 1
-                        if not free_slots[1][j]:
-                            aoc += 1
-                    elif i == self.cores - 1:
-                        if not free_slots[0][j]:
-                            aoc += 1
-                        if not free_slots[self.cores - 2][j]:
-                            aoc += 1
-                    else:
-                        if not free_slots[i + 1][j]:
-                            aoc += 1
-                        if not free_slots[i - 1][j]:
-                            aoc += 1
-        used_slots = self.slots * self.cores - self.get_num_free_slots(src, dst)
-        return aoc / used_slots
-    
-    # def average_crosstalk(self) -> float:
-    #     average = 0.0
-    #     for i in range(0, len(self.noise), 1):
-    #         for j in range(0, len(self.noise[i]), 1):
-    #             average += self.noise[i][j]
-    #     return average / (len(self.noise) * len(self.noise[0]))
+        used_slots = self.slots * self.cores - free
+        return self.adjacent_occupied[self.link_index[(src, dst)]] / used_slots
+
+    def average_crosstalk(self) -> float:
+        """Adjacent reserved slots per reserved slot over the whole network"""
+        used_slots = sum(self.slots * self.cores - sum(index.free for index in self.block_index[link_id])
+                         for link_id in self.occupied)
+        if self.cores == 1 or used_slots == 0:
+            return 0.0
+        return sum(self.adjacent_occupied.values()) / used_slots
 
     # def get_distance(self, src: int, dst: int) -> int:
     #     if not self.G.has_edge(src, dst):
@@ -1,17 +1,54 @@
+from src.Checkpoint import Checkpoint
 from src.ControlPlane import ControlPlane
+from src.EventDispatcher import EventDispatcher
 from src.EventScheduler import EventScheduler
+from src.FlowArrivalEvent import FlowArrivalEvent
+from src.FlowDepartureEvent import FlowDepartureEvent
 from src.Tracer import Tracer
 from src.MyStatistics import MyStatistics
 
 
 class SimulationRunner:
-    def __init__(self, cp: ControlPlane, events: EventScheduler):
+    def __init__(self, cp: ControlPlane, events: EventScheduler, checkpoint: Checkpoint = None, events_done: int = 0,
+                 batch_departures: bool = False):
         tr = Tracer.get_tracer_object()
         st = MyStatistics.get_my_statistics()
 
+        # tracer, statistics then control plane, the order the events were always handled in
+        dispatcher = EventDispatcher()
+        tr.register_handlers(dispatcher)
+        st.register_handlers(dispatcher)
+        cp.register_handlers(dispatcher)
+        if st.stopping is not None:
+            # after the control plane, so the arrival is already accepted or blocked
+            def stop_when_precise(event: FlowArrivalEvent) -> None:
+                if st.precision_reached():
+                    events.clear()
+            dispatcher.register(FlowArrivalEvent, stop_when_precise)
+        handlers_for = dispatcher.handlers_for
+        # departures in a row, up to the next arrival, are handled as one batch when only the statistics and
+        # the control plane handle them and no periodical statistics sample falls among them
+        batch_departures = batch_departures and handlers_for(FlowDepartureEvent) == [st.flow_departed, cp.flow_departed]
+        peek = events.peek
+
+        # events_done counts from the restored checkpoint, if any, and a new one is written every checkpoint.every
+        next_checkpoint = events_done + checkpoint.every if checkpoint is not None else float("inf")
+
         event = events.pop_event()
         while event is not None:
-            tr.add(event)
-            st.add_event(event)
-            cp.new_event(event)
-            event = events.pop_event()
\ No newline at end of file
+            if batch_departures and type(event) is FlowDepartureEvent and type(peek()) is FlowDepartureEvent \
+                    and not st.periodical_due():
+                batch = [event]
+                while type(peek()) is FlowDepartureEvent:
+                    batch.append(events.pop_event())
+                st.flows_departed(batch)
+                cp.flows_departed(batch)
+                events_done += len(batch)
+            else:
+                for handler in handlers_for(type(event)):
+                    handler(event)
+                events_done += 1
+            if events_done >= next_checkpoint:
+                checkpoint.save(events_done)
+                next_checkpoint = events_done + checkpoint.every
+            event = events.pop_event()
@@ -1,15 +1,24 @@
 import xml.etree.ElementTree as ET
+import os
 import time
 
 from src.PhysicalTopology import PhysicalTopology
 from src.VirtualTopology import VirtualTopology
 from src.TrafficGenerator import TrafficGenerator
+from src.TraceReplay import TraceReplay
 from src.EventScheduler import EventScheduler
+from src.CalendarEventScheduler import CalendarEventScheduler
 from src.MyStatistics import MyStatistics
 from src.OutputManager import OutputManager
 from src.Tracer import Tracer
 from src.ControlPlane import ControlPlane
 from src.SimulationRunner import SimulationRunner
+from src.Checkpoint import Checkpoint
+from src.HookBus import HookBus
+from src.util.TopologyCache import TopologyCache
+from src.util.TrafficCache import TrafficCache
+from src.util.WarmupDetector import WarmupDetector
+from src.util.ConfidenceStop import ConfidenceStop
 
 
 class Simulator:
@@ -39,6 +48,15 @@ class Simulator:
             assert "version" in root.attrib.keys(), "Missing version attribute!"
             assert root.attrib["version"] <= Simulator.sim_version, "Config file requires newer simulator!"
 
+            # optional <scheduler type="heap|calendar" batch-departures="false|true"/>, heap by default
+            self.scheduler = "heap"
+            self.batch_departures = False
+            # optional <checkpoint every="N" file="..."/>, no checkpoints by default
+            self.checkpoint = None
+            # optional <statistics warmup="none|mser5" precision="..." .../>, no warm-up removal and a fixed
+            # number of calls by default
+            self.warmup = "none"
+            self.statistics = {}
             for child in root:
                 if child.tag == "rsa":
                     self.rsa = child
@@ -52,43 +70,104 @@ class Simulator:
                     self.physical_topology = child
                 elif child.tag == "graphs":
                     self.graphs = child
+                elif child.tag == "scheduler":
+                    self.scheduler = child.attrib.get("type", "heap")
+                    assert self.scheduler in ("heap", "calendar"), "Unknown scheduler " + self.scheduler
+                    # batch-departures="true": departures in a row are handled as one batch
+                    self.batch_departures = child.attrib.get("batch-departures", "false").lower() == "true"
+                elif child.tag == "checkpoint":
+                    self.checkpoint = child
+                elif child.tag == "statistics":
+                    self.warmup = child.attrib.get("warmup", "none")
+                    self.statistics = child.attrib
+                    assert self.warmup in ("none", "mser5"), "Unknown warm-up detection " + self.warmup
                 else:
                     assert False, "Unknown element " + child.tag
 
             gp = OutputManager(self.graphs)
 
-            for seed in range(1, num_simulations + 1):
+            # compiled topology, parsed and precomputed once per file content, with cache="true" only
+            cache = None
+            compiled = None
+            if self.physical_topology.attrib.get("cache", "false").lower() == "true":
+                cache = TopologyCache(sim_config_file)
+                compiled = cache.load()
+
+            # resumes from the checkpoint of an interrupted run of the same file, load and number of simulations
+            checkpoint = None
+            state = None
+            if self.checkpoint is not None:
+                assert "every" in self.checkpoint.attrib, "every attribute is missing!"
+                file_name = self.checkpoint.attrib.get("file", os.path.splitext(sim_config_file)[0] + f".load-{forced_load}.ckpt")
+                checkpoint = Checkpoint(file_name, int(self.checkpoint.attrib["every"]),
+                                        Checkpoint.config_key(sim_config_file, forced_load, num_simulations))
+                state = checkpoint.load()
+
+            first_seed = int(state["seed"]) if state is not None else 1
+            for seed in range(first_seed, num_simulations + 1):
                 begin_s = time.time_ns()
 
                 # (1) Load physical topology
-                pt = PhysicalTopology(self.physical_topology, verbose)
+                pt = PhysicalTopology(self.physical_topology, verbose, compiled)
+                if cache is not None and compiled is None:
+                    compiled = cache.save(pt)
 
                 # (2) Load virtual topology
-                vt = VirtualTopology(self.virtual_topology, pt, verbose)
+                hooks = HookBus()
+                vt = VirtualTopology(self.virtual_topology, pt, verbose, hooks)
 
                 # (3) Load traffic
-                events = EventScheduler()
+                events = CalendarEventScheduler() if self.scheduler == "calendar" else EventScheduler()
                 traffic = TrafficGenerator(self.traffic, forced_load, verbose)
-                traffic.generate_traffic(pt, events, seed)
+                if "replay" in self.traffic.attrib:
+                    # flows read back from a trace or a directory of traffic columns, relative to the XML
+                    traffic.replay = TraceReplay(os.path.join(os.path.dirname(sim_config_file), self.traffic.attrib["replay"]))
+                elif self.traffic.attrib.get("cache", "false").lower() == "true":
+                    # flows written once per traffic, load and seed, shared by the XMLs of the directory
+                    traffic.cache = TrafficCache(sim_config_file)
+                stopping = None
+                if "precision" in self.statistics:
+                    # run until the blocking probability is precise enough, at most max-calls (default: calls) calls
+                    stopping = ConfidenceStop(float(self.statistics["precision"]),
+                                              int(self.statistics.get("batch", 1000)),
+                                              int(self.statistics.get("min-batches", 10)),
+                                              self.statistics.get("bbr", "false").lower() == "true")
+                    traffic.calls = int(self.statistics.get("max-calls", traffic.calls))
+                if state is None:
+                    traffic.generate_traffic(pt, events, seed)
 
                 # (4) Setup statistics
                 st = MyStatistics.get_my_statistics()
-                st.statistics_setup(gp, pt, traffic, pt.get_num_nodes(), 3, 0, forced_load, Simulator.verbose)
+                warmup = WarmupDetector() if self.warmup == "mser5" else None
+                st.statistics_setup(gp, pt, traffic, pt.get_num_nodes(), 3, 0, forced_load, Simulator.verbose, warmup=warmup,
+                                    stopping=stopping)
 
                 tr = Tracer.get_tracer_object()
                 tr.toogle_trace_writing(Simulator.trace)
 
+                # observers of the simulation, in the order they were always called
+                tr.register_hooks(hooks)
+                st.register_hooks(hooks)
+
                 rsa_module = self.rsa.attrib["module"]
 
                 # (5) Create ControlPlane
-                cp = ControlPlane(self.rsa, events, rsa_module, pt, vt, traffic)
+                cp = ControlPlane(self.rsa, events, rsa_module, pt, vt, traffic, hooks)
 
                 # === Truyền simulator vào ControlPlane để cập nhật biến đếm ===
                 cp.simulator = self
 
+                events_done = 0
+                if checkpoint is not None:
+                    checkpoint.attach(seed, self, pt, vt, cp, traffic, events)
+                    if state is not None:
+                        events_done = checkpoint.restore(state)
+                        state = None
+                        print(f"Resumed from {checkpoint.file_name} after {events_done} events")
+
                 # (6) Run simulation
                 print(f"{sim_config_file} -> Load {forced_load}: Running simulation {seed}")
-                SimulationRunner(cp, events)
+                SimulationRunner(cp, events, checkpoint, events_done, self.batch_departures)
 
                 # (7) Tính acceptance rate
                 if self.total_requests > 0:
@@ -105,4 +184,6 @@ class Simulator:
                 if Simulator.trace:
                     tr.finish()
 
-            gp.write_all_to_files()
\ No newline at end of file
+            gp.write_all_to_files()
+            if checkpoint is not None:
+                checkpoint.remove()
\ No newline at end of file
@@ -1,10 +1,15 @@
 import networkx as nx
+import numpy as np
 from typing import List, Tuple
 
+from src.util.CoreAdjacency import CoreAdjacency
+
 
 class SlotManager:
-    def __init__(self, graph: nx.Graph):
+    def __init__(self, graph: nx.Graph, core_adjacency: np.ndarray = None):
         self.graph = graph
+        # cores x cores neighbour matrix; edges fall back to CoreAdjacency.parse() of their core count
+        self.core_adjacency = core_adjacency
 
     def get_spectrum(self, src: int, dst: int) -> List[List[bool]]:
         edge_data = self.graph.edges[src, dst]
@@ -71,23 +76,7 @@ class SlotManager:
         edge_data = self.graph[src][dst]
         cores = edge_data.get("cores", 1)
         reserved_slots = edge_data.get("reserved_slots", set())
+        adjacency = self.core_adjacency if self.core_adjacency is not None else CoreAdjacency.parse(cores)
 
-        coupled_fibers = []
-
-        if core == 0:
-            if (cores - 1, slot) in reserved_slots:
-                coupled_fibers.append((cores - 1, slot))
-            if (1, slot) in reserved_slots:
-                coupled_fibers.append((1, slot))
-        elif core == cores - 1:
-            if (0, slot) in reserved_slots:
-                coupled_fibers.append((0, slot))
-            if (cores - 2, slot) in reserved_slots:
-                coupled_fibers.append((cores - 2, slot))
-        else:
-            if (core + 1, slot) in reserved_slots:
-                coupled_fibers.append((core + 1, slot))
-            if (core - 1, slot) in reserved_slots:
-                coupled_fibers.append((core - 1, slot))
-
-        return coupled_fibers
+        return [(neighbour, slot) for neighbour in np.flatnonzero(adjacency[core]).tolist()
+                if (neighbour, slot) in reserved_slots]
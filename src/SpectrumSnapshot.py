@@ -0,0 +1,86 @@
+from typing import Dict, List
+import numpy as np
+
+from src.Slot import Slot
+from src.util.FreeBlockIndex import FreeBlockIndex
+
+
+class SpectrumSnapshot:
+    """
+    Copy-on-write overlay over the spectrum of a PhysicalTopology.
+
+    Reads fall through to the topology until a link is written; the first write
+    copies only that link's per-core masks. commit() applies the changed links to
+    the topology and discard() drops them, both in O(changed links).
+    """
+
+    def __init__(self, pt):
+        self.pt = pt
+        self.changes: Dict[int, List[int]] = {}
+
+    def get_occupied(self, link_id: int) -> List[int]:
+        occupied = self.changes.get(link_id)
+        return occupied if occupied is not None else self.pt.occupied[link_id]
+
+    def get_free_mask(self, link_id: int, core: int) -> int:
+        return self.pt.full_mask & ~self.get_occupied(link_id)[core]
+
+    def path_free_mask(self, links: List[int], core: int) -> int:
+        mask = self.pt.full_mask
+        for link_id in links:
+            mask &= ~self.get_occupied(link_id)[core]
+        return mask
+
+    def path_first_fit(self, links: List[int], core: int, demand: int) -> int:
+        return FreeBlockIndex.first_fit_in_mask(self.path_free_mask(links, core), demand)
+
+    def paths_free_spectrum(self, paths: List[List[int]]) -> np.ndarray:
+        """Same layout as PhysicalTopology.paths_free_spectrum(), seen through the overlay"""
+        res = np.empty((len(paths), self.pt.cores, self.pt.slots), dtype=bool)
+        for p, links in enumerate(paths):
+            for core in range(self.pt.cores):
+                res[p, core] = self.pt.mask_to_array(self.path_free_mask(links, core))
+        return res
+
+    def path_spectrum(self, links: List[int]) -> List[List[bool]]:
+        return self.paths_free_spectrum([links])[0].tolist()
+
+    def writable(self, link_id: int) -> List[int]:
+        if link_id not in self.changes:
+            self.changes[link_id] = list(self.pt.occupied[link_id])
+        return self.changes[link_id]
+
+    def reserve_path(self, links: List[int], slot_list: List[Slot]) -> bool:
+        """PhysicalTopology.reserve_path() in the overlay: every link of `links` or none"""
+        masks = self.pt.slot_list_to_masks(slot_list)
+        for link_id in links:
+            if link_id not in self.pt.occupied or any(self.get_occupied(link_id)[core] & mask
+                                                      for core, mask in masks.items()):
+                return False
+        for link_id in links:
+            occupied = self.writable(link_id)
+            for core, mask in masks.items():
+                occupied[core] |= mask
+        return True
+
+    def release_path(self, links: List[int], slot_list: List[Slot]) -> None:
+        masks = self.pt.slot_list_to_masks(slot_list)
+        for link_id in links:
+            occupied = self.writable(link_id)
+            for core, mask in masks.items():
+                occupied[core] &= ~mask
+
+    def commit(self) -> None:
+        """Applies every changed link to the topology and empties the overlay"""
+        for link_id, occupied in self.changes.items():
+            current = self.pt.occupied[link_id]
+            reserved = {core: mask & ~current[core] for core, mask in enumerate(occupied) if mask & ~current[core]}
+            released = {core: current[core] & ~mask for core, mask in enumerate(occupied) if current[core] & ~mask}
+            if reserved:
+                self.pt.update_link(link_id, reserved, True)
+            if released:
+                self.pt.update_link(link_id, released, False)
+        self.changes = {}
+
+    def discard(self) -> None:
+        self.changes = {}
@@ -0,0 +1,79 @@
+import os
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+
+from src.util.TrafficCache import TrafficCache
+
+
+class TraceReplay:
+    """
+    Traffic read back from a recording instead of being drawn: either a trace written by the Tracer, whose
+    flow-arrived lines are parsed lazily, CHUNK at a time, or a directory of columns written by the
+    TrafficCache, which is memory-mapped. Either way only the calls being converted are held in memory.
+
+    Calls are numbered in arrival order, whatever their id in the trace. A flow departs its holding time
+    after the next arrival, as TrafficGenerator draws them, so replaying a trace of this simulator gives
+    back the same events; the flow-departed lines are not needed (blocked flows have none) and are skipped.
+    The last call of a trace departs its holding time after its own arrival.
+    """
+
+    CHUNK = 1024
+    ARRIVED = "flow-arrived "
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.binary = os.path.isdir(file_name)
+        if self.binary:
+            assert TrafficCache.load_columns(file_name) is not None, "no traffic columns in " + file_name
+        else:
+            assert os.path.isfile(file_name), "trace file " + file_name + " is missing!"
+
+    def flow_columns(self, first: int, calls: int) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yields the calls `first` to `calls` - 1 (or to the end of the recording) as the columns of
+        TrafficGenerator.flow_columns(), arrival ending with the arrival time of the next call.
+        """
+        if self.binary:
+            columns = TrafficCache.load_columns(self.file_name)
+            end = min(calls, len(columns["id"]))
+            if first < end:
+                sliced = {name: column[first:end] for name, column in columns.items() if name != "arrival"}
+                sliced["id"] = np.arange(first, end, dtype=np.int64)
+                sliced["arrival"] = columns["arrival"][first:end + 1]
+                yield sliced
+            return
+
+        # (time, src, dst, rate, holding, cos) of the calls not yielded yet, then the one after them
+        rows: List[Tuple[float, int, int, int, float, int]] = []
+        count = 0
+        with open(self.file_name) as f:
+            for line in f:
+                if not line.startswith(TraceReplay.ARRIVED):
+                    continue
+                if count >= first:
+                    # flow-arrived <time> <id> <src> <dst> <rate> <holding time> <cos>
+                    fields = line.split()
+                    rows.append((float(fields[1]), int(fields[3]), int(fields[4]), int(fields[5]), float(fields[6]),
+                                 int(fields[7])))
+                    if len(rows) == TraceReplay.CHUNK + 1:
+                        yield TraceReplay.columns(first, rows[:-1], rows[-1][0])
+                        first += TraceReplay.CHUNK
+                        del rows[:-1]
+                count += 1
+                if count > calls:
+                    # the call after the last one only gives its arrival time
+                    break
+        if count > calls:
+            if len(rows) > 1:
+                yield TraceReplay.columns(first, rows[:-1], rows[-1][0])
+        elif rows:
+            yield TraceReplay.columns(first, rows, rows[-1][0])
+
+    @staticmethod
+    def columns(first: int, rows: List[Tuple[float, int, int, int, float, int]], next_time: float) -> Dict[str, np.ndarray]:
+        time, src, dst, rate, holding, cos = zip(*rows)
+        return {"id": np.arange(first, first + len(rows), dtype=np.int64),
+                "src": np.array(src, dtype=np.int64), "dst": np.array(dst, dtype=np.int64),
+                "rate": np.array(rate, dtype=np.int64),
+                "arrival": np.array(time + (next_time,), dtype=np.float64),
+                "holding": np.array(holding, dtype=np.float64), "cos": np.array(cos, dtype=np.int64)}
@@ -40,14 +40,17 @@ class Tracer:
         except Exception as e:
             print(e)
 
-    def accept_flow(self, flow: Flow, lightpaths: LightPath) -> None:
-        str_ = f"flow-accepted - {flow.to_trace()} {lightpaths.get_id()}"
+    def accept_flow(self, flow: Flow, lightpaths: LightPath, p_reuse: bool = False) -> None:
         if self.write_trace:
-            self.trace.write(str_ + '\n')
+            self.trace.write(f"flow-accepted - {flow.to_trace()} {lightpaths.get_id()}\n")
 
     def block_flow(self, flow: Flow) -> None:
         if self.write_trace:
             self.trace.write(f"flow-blocked - {flow.to_trace()}\n")
+            # the departure of a blocked flow is cancelled, so it is traced now, with the time it was due at
+            departure = flow.get_departure_event()
+            if departure is not None:
+                self.flow_departed(departure)
 
     def create_lightpath(self, lp: LightPath) -> None:
         if self.write_trace:
@@ -61,16 +64,36 @@ class Tracer:
         try:
             if isinstance(event, FlowArrivalEvent):
                 if self.write_trace:
-                    self.trace.write(f"flow-arrived {event.get_time()} {event.get_flow().to_trace()}\n")
+                    self.flow_arrived(event)
             elif isinstance(event, FlowDepartureEvent):
                 if self.write_trace:
-                    self.trace.write(f"flow-departed {event.get_time()} {event.get_id()} - - - - -\n")
+                    self.flow_departed(event)
         except Exception as e:
             print(e)
 
+    def flow_arrived(self, event: FlowArrivalEvent) -> None:
+        self.trace.write(f"flow-arrived {event.get_time()} {event.get_flow().to_trace()}\n")
+
+    def flow_departed(self, event: FlowDepartureEvent) -> None:
+        self.trace.write(f"flow-departed {event.get_time()} {event.get_id()} - - - - -\n")
+
+    def register_handlers(self, dispatcher) -> None:
+        """Registers the event handlers with an EventDispatcher, none when trace writing is off"""
+        if self.write_trace and self.trace is not None:
+            dispatcher.register(FlowArrivalEvent, self.flow_arrived)
+            dispatcher.register(FlowDepartureEvent, self.flow_departed)
+
+    def register_hooks(self, hooks) -> None:
+        """Subscribes to the accept, block and lightpath hooks of a HookBus, none when trace writing is off"""
+        if self.write_trace and self.trace is not None:
+            hooks.subscribe("accept", self.accept_flow)
+            hooks.subscribe("block", self.block_flow)
+            hooks.subscribe("lightpath_created", self.create_lightpath)
+            hooks.subscribe("lightpath_removed", self.remove_lightpath)
+
     def finish(self) -> None:
         """Finalizes the tracing actions and closes the trace file"""
         if self.trace:
             self.trace.flush()
             self.trace.close()
-        Tracer._singleton_object = None
+        Tracer.singleton_object = None
@@ -1,7 +1,11 @@
 import xml.etree.ElementTree as ET
-from typing import List, Type
+from typing import Dict, Iterator, List, Tuple, Type
+import numpy as np
 
+from src.util.AliasTable import AliasTable
 from src.util.Distribution import Distribution
+from src.util.JavaRandom import Random
+from src.util.TrafficCache import TrafficCache
 from src.TrafficInfo import TrafficInfo
 from src.PhysicalTopology import PhysicalTopology
 from src.EventScheduler import EventScheduler
@@ -11,6 +15,9 @@ from src.FlowDepartureEvent import FlowDepartureEvent
 
 
 class TrafficGenerator:
+    # calls whose random values are drawn together
+    CHUNK = 1024
+
     def __init__(self, xml: ET.Element, forced_load: float, verbose: bool):
         self.verbose = verbose
         self.rate = 0
@@ -32,11 +39,26 @@ class TrafficGenerator:
 
         assert "max-rate" in xml.attrib, "max-rate attribute is missing!"
         self.max_rate = int(xml.attrib["max-rate"])
+        # streaming="true": flows are generated one arrival ahead instead of all before the run
+        self.streaming = xml.attrib.get("streaming", "false").lower() == "true"
+        # state of the last flow_events() stream: its four distributions and the (id, arrival time) of
+        # the next call, saved by a Checkpoint through distribution_states()
+        self.distributions: List[Distribution] = []
+        self.stream_position = (0, 0.0)
+        # (first id, distribution states, source and destination draws before each call) of the chunk
+        # of calls being yielded, see distribution_states()
+        self.chunk = (0, [], [0])
+        # TrafficCache the flows are replayed from, set by the Simulator with <traffic cache="true">
+        self.cache = None
+        # TraceReplay reading the flows from a recording, set by the Simulator with <traffic replay="...">
+        self.replay = None
 
         if verbose:
             print(f'{xml.attrib["calls"]} calls, {xml.attrib["load"]} erlangs.')
 
         call_list = []
+        # optional traffic matrix: (source, destination, weight) of every demand
+        self.demands: List[Tuple[int, int, float]] = []
         for child in xml:
             if child.tag == "calls":
                 assert "rate" in child.attrib, "rate attribute is missing!"
@@ -44,6 +66,14 @@ class TrafficGenerator:
                 assert "weight" in child.attrib, "weight attribute is missing!"
                 assert "holding-time" in child.attrib, "holding-time attribute is missing!"
                 call_list.append(child.attrib)
+            elif child.tag == "demand":
+                assert "src" in child.attrib, "src attribute is missing!"
+                assert "dst" in child.attrib, "dst attribute is missing!"
+                assert "weight" in child.attrib, "weight attribute is missing!"
+                src, dst, weight = int(child.attrib["src"]), int(child.attrib["dst"]), float(child.attrib["weight"])
+                assert src != dst, "demand from a node to itself!"
+                assert weight >= 0, "demand weight must not be negative!"
+                self.demands.append((src, dst, weight))
             else:
                 raise Exception("Unknown element " + child.tag + " in the traffic generator file!")
         self.number_calls_type = len(call_list)
@@ -55,14 +85,22 @@ class TrafficGenerator:
         self.mean_holding_time = 0
         self.calls_types_info = [TrafficInfo] * self.number_calls_type
 
-        for i in range(0, self.number_calls_type, 1):
-            self.total_weight += int(call_list[i]["weight"])
+        # integer weights keep the draw next_int(total weight) of the original generator, any other
+        # weights are sampled with an alias table from one double per call
+        weights = [float(call_list[i]["weight"]) for i in range(0, self.number_calls_type, 1)]
+        integer_weights = all(weight.is_integer() for weight in weights)
+        if integer_weights:
+            weights = [int(weight) for weight in weights]
+        self.total_weight = sum(weights)
+        assert self.total_weight > 0 or "replay" in xml.attrib, "the weights of the calls must not all be zero!"
+        self.types_alias = None if integer_weights else AliasTable(weights)
+        self.demands_alias = AliasTable([demand[2] for demand in self.demands]) if self.demands else None
 
         for i in range(0, self.number_calls_type, 1):
             holding_time = float(call_list[i]["holding-time"])
             rate = int(call_list[i]["rate"])
             cos = int(call_list[i]["cos"])
-            weight = int(call_list[i]["weight"])
+            weight = weights[i]
             self.mean_rate += rate * (weight / self.total_weight)
             self.mean_holding_time += holding_time * (weight / self.total_weight)
             self.calls_types_info[i] = TrafficInfo(holding_time, rate, cos, weight)
@@ -74,19 +112,46 @@ class TrafficGenerator:
                 print(f'Mean holding time: {holding_time} seconds.')
 
     def generate_traffic(self, pt: PhysicalTopology, events: EventScheduler, seed: int) -> None:
-        weight_vector = [int] * self.total_weight
-        aux = 0
+        print("SELF.CALLS: ", self.calls)
+        if self.streaming:
+            # the queue then only holds the next arrival and the departures of the flows in progress
+            events.add_stream(self.flow_events(pt, seed))
+        else:
+            events.add_events(event for pair in self.flow_events(pt, seed) for event in pair)
 
-        for i in range(0, self.number_calls_type, 1):
-            for j in range(0, self.calls_types_info[i].get_weight(), 1):
-                weight_vector[aux] = i
-                aux += 1
+    def flow_events(self, pt: PhysicalTopology, seed: int, resume: Tuple[int, float, List[tuple]] = None) -> Iterator[Tuple[FlowArrivalEvent, FlowDepartureEvent]]:
+        """
+        Yields the (arrival, departure) events of every call in arrival order.
+        `resume` = (next id, next arrival time, distribution states), as given by stream_position and
+        distribution_states(), continues a stream saved by a Checkpoint instead of starting from the first call.
+        """
+        if self.replay is not None:
+            # read back from a recording, where the next id is all a resume needs
+            id = resume[0] if resume is not None else 0
+            self.distributions = []
+            self.stream_position = (id, resume[1] if resume is not None else 0.0)
+            for columns in self.replay.flow_columns(id, self.calls):
+                yield from self.column_events(columns, 0)
+            return
+        if self.cache is not None:
+            # replayed from the cache, as from a recording
+            columns = self.cached_columns(pt, seed)
+            id = resume[0] if resume is not None else 0
+            self.distributions = []
+            self.stream_position = (id, float(columns["arrival"][id]))
+            self.chunk = (id, [], [0])
+            yield from self.column_events(columns, id)
+            return
+        for columns in self.flow_columns(pt, seed, resume):
+            yield from self.column_events(columns, 0)
 
+    def flow_columns(self, pt: PhysicalTopology, seed: int, resume: Tuple[int, float, List[tuple]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yields the calls CHUNK by CHUNK as columns id, src, dst, rate, arrival, holding and cos, arrival
+        ending with the arrival time of the next call. `resume` is the one of flow_events().
+        """
         mean_arrival_time = (self.mean_holding_time * (self.mean_rate * 1.0 / self.max_rate)) / self.load
 
-        type = 0
-        src = 0
-        dst = 0
         time = 0.0
         id = 0
         num_nodes = pt.get_num_nodes()
@@ -94,38 +159,131 @@ class TrafficGenerator:
         dist2 = Distribution(2, seed)
         dist3 = Distribution(3, seed)
         dist4 = Distribution(4, seed)
+        self.distributions = [dist1, dist2, dist3, dist4]
+        if resume is not None:
+            id, time, states = resume
+            for dist, state in zip(self.distributions, states):
+                dist.set_state(state)
+        self.stream_position = (id, time)
+        self.chunk = (id, [dist.get_state() for dist in self.distributions], [0])
 
         if "fileSizeValues" in self.xml.attrib:
             assert False, "Not implemented yet!"
 
-        print("SELF.CALLS: ", self.calls)
-        for j in range(0, self.calls, 1):
-            type = weight_vector[dist1.next_int(self.total_weight)]
-            # type = weight_vector[0]
-            src = dst = dist2.next_int(num_nodes)
-            # src = dst = 18
-            while src == dst:
-                dst = dist2.next_int(num_nodes)
-                # dst = 1
-            holding_time = 0.0
-            if "fileSizeValues" in self.xml.attrib:
-                file_size = 0.0
-                rate_in_gbps = self.oc_in_gigabits(self.calls_types_info[type].get_rate())
-                holding_time = ((file_size / rate_in_gbps) * 8)
-                # holding_time = 0.4190175227589326
+        # call type i takes the draws of next_int(total weight) in [bounds[i - 1], bounds[i])
+        bounds = np.cumsum([info.get_weight() for info in self.calls_types_info])
+        if self.demands:
+            assert max(max(src, dst) for src, dst, _ in self.demands) < num_nodes, "demand between unknown nodes!"
+            demand_ends = np.array([(src, dst) for src, dst, _ in self.demands], dtype=np.int64)
+        holding_times = np.array([info.get_holding_time() for info in self.calls_types_info], dtype=np.float64)
+        rates = np.array([info.get_rate() for info in self.calls_types_info], dtype=np.int64)
+        cos = np.array([info.get_cos() for info in self.calls_types_info], dtype=np.int64)
+        while id < self.calls:
+            # the random values of a chunk of calls are drawn in blocks, in the order the calls would draw them
+            k = min(TrafficGenerator.CHUNK, self.calls - id)
+            states = [dist.get_state() for dist in self.distributions]
+            if self.types_alias is None:
+                types = np.searchsorted(bounds, dist1.next_int_block(k, self.total_weight), side="right")
             else:
-                holding_time = dist4.next_exponential(self.calls_types_info[type].get_holding_time())
-                # holding_time = 0.4190175227589326
-
-            new_flow = Flow(id, src, dst, time, self.calls_types_info[type].get_rate(), holding_time,
-                            self.calls_types_info[type].get_cos(), time + (holding_time * 0.5))
-            event = FlowArrivalEvent(time, new_flow)
-            time += dist3.next_exponential(mean_arrival_time)
-            # time += 0.09715752559779525
-            events.add_event(event)
-            event = FlowDepartureEvent(time + holding_time, id, new_flow)
-            events.add_event(event)
-            id += 1
+                types = self.types_alias.sample_block(dist1.next_double_block(k))
+            if self.demands_alias is None:
+                ends, draws = TrafficGenerator.draw_ends(dist2, k, num_nodes)
+                ends = np.array(ends, dtype=np.int64)
+            else:
+                ends = demand_ends[self.demands_alias.sample_block(dist2.next_double_block(k))]
+                draws = list(range(0, 2 * k + 1, 2))
+            self.chunk = (id, states, draws)
+            holding = dist4.next_exponential_block(k, holding_times[types])
+            times = np.cumsum(np.concatenate(([time], dist3.next_exponential_block(k, mean_arrival_time))))
+            yield {"id": np.arange(id, id + k, dtype=np.int64), "src": ends[:, 0], "dst": ends[:, 1],
+                   "rate": rates[types], "arrival": times, "holding": holding, "cos": cos[types]}
+            id += k
+            time = float(times[-1])
+
+    def column_events(self, columns: Dict[str, np.ndarray], first: int) -> Iterator[Tuple[FlowArrivalEvent, FlowDepartureEvent]]:
+        """Events of the calls of `columns` from index `first`, converted CHUNK by CHUNK"""
+        n = len(columns["id"])
+        for start in range(first, n, TrafficGenerator.CHUNK):
+            end = min(start + TrafficGenerator.CHUNK, n)
+            ids, src, dst, rate, holding, cos = (columns[name][start:end].tolist() for name in
+                                                 ("id", "src", "dst", "rate", "holding", "cos"))
+            times = columns["arrival"][start:end + 1].tolist()
+            for j, id in enumerate(ids):
+                holding_time = holding[j]
+                time = times[j]
+                new_flow = Flow(id, src[j], dst[j], time, rate[j], holding_time, cos[j], time + (holding_time * 0.5))
+                arrival = FlowArrivalEvent(time, new_flow)
+                time = times[j + 1]
+                departure = FlowDepartureEvent(time + holding_time, id, new_flow)
+                new_flow.set_departure_event(departure)
+                self.stream_position = (id + 1, time)
+                yield arrival, departure
+
+    def replayed(self) -> bool:
+        """True when the flows come from a recording or the TrafficCache rather than from the distributions"""
+        return self.replay is not None or self.cache is not None
+
+    def cached_columns(self, pt: PhysicalTopology, seed: int) -> Dict[str, np.ndarray]:
+        """Columns of all the calls of `seed`, generated and written to the cache the first time"""
+        key = TrafficCache.key(self, pt.get_num_nodes(), seed)
+        columns = self.cache.load(key)
+        if columns is None:
+            chunks = list(self.flow_columns(pt, seed))
+            columns = {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0, dtype=np.int64)
+                       for name in ("id", "src", "dst", "rate", "holding", "cos")}
+            columns["holding"] = columns["holding"].astype(np.float64)
+            # the arrival columns of consecutive chunks overlap by one time
+            columns["arrival"] = np.concatenate([chunk["arrival"][:-1] for chunk in chunks] +
+                                                [chunks[-1]["arrival"][-1:] if chunks else np.zeros(1)])
+            columns = self.cache.save(key, columns)
+        return columns
+
+    @staticmethod
+    def draw_ends(dist: Distribution, k: int, num_nodes: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """
+        Sources and destinations of `k` calls, the destination being redrawn while it equals the source,
+        with the number of draws taken before each call and after the last one. The draws come in blocks
+        and the distribution is then moved back to just after the last one used.
+        """
+        start = dist.get_state()
+        values = dist.next_int_block(2 * k + 16, num_nodes).tolist()
+        ends = []
+        draws = [0]
+        pos = 0
+        for j in range(k):
+            if pos + 2 > len(values):
+                values += dist.next_int_block(2 * (k - j) + 16, num_nodes).tolist()
+            src = values[pos]
+            dst = values[pos + 1]
+            pos += 2
+            while src == dst:
+                if pos == len(values):
+                    values += dist.next_int_block(16, num_nodes).tolist()
+                dst = values[pos]
+                pos += 1
+            ends.append((src, dst))
+            draws.append(pos)
+        dist.set_state(start)
+        dist.jump(pos)
+        return ends, draws
+
+    def distribution_states(self) -> List[tuple]:
+        """States of the distributions as if the calls up to stream_position had been drawn one by one"""
+        if self.replayed():
+            # nothing is drawn
+            return []
+        first_id, states, draws = self.chunk
+        i = self.stream_position[0] - first_id
+        result = []
+        # per call: one type draw (a double of two with an alias table), the source and destination
+        # draws, two draws per exponential
+        type_draws = i if self.types_alias is None else 2 * i
+        for state, steps in zip(states, (type_draws, draws[i], 2 * i, 2 * i)):
+            dist = Random(0)
+            dist.set_state(state)
+            dist.jump(steps)
+            result.append(dist.get_state())
+        return result
 
     def get_calls_types_info(self) -> List[Type[TrafficInfo]]:
         return self.calls_types_info
@@ -1,5 +1,5 @@
 class TrafficInfo:
-    def __init__(self, holding_time: float, rate: int, cos: int, weight: int):
+    def __init__(self, holding_time: float, rate: int, cos: int, weight: float):
         self.holding_time = holding_time
         self.rate = rate
         self.cos = cos
@@ -14,5 +14,5 @@ class TrafficInfo:
     def get_cos(self) -> int:
         return self.cos
 
-    def get_weight(self) -> int:
+    def get_weight(self) -> float:
         return self.weight
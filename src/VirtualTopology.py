@@ -1,21 +1,24 @@
 import networkx as nx
 import xml.etree.ElementTree as ET
-from typing import List
+from typing import List, Tuple
 from src.LightPath import LightPath
 from src.PhysicalTopology import PhysicalTopology
 from src.Slot import Slot
 from src.Tracer import Tracer
 from src.PCycle import PCycle
 from src.Flow import Flow
+from src.HookBus import HookBus
 import uuid
 
 
 class VirtualTopology:
-    def __init__(self, xml: ET.Element, pt: PhysicalTopology, verbose: bool = False):
+    def __init__(self, xml: ET.Element, pt: PhysicalTopology, verbose: bool = False, hooks: HookBus = None):
         self.verbose = verbose
         self.next_lightpath_id = 0
         self.pt = pt
         self.tr = Tracer.get_tracer_object()
+        # observers of the lightpath and p-cycle changes, the tracer among them
+        self.hooks = hooks if hooks is not None else HookBus()
 
         self.g_lightpath = nx.MultiGraph()
 
@@ -29,18 +32,18 @@ class VirtualTopology:
         if len(links) < 1:
             raise ValueError("Invalid links")
 
-        if not self.can_create_light_path(links, slot_list):
+        if not self.create_light_path_in_pt(links, slot_list):
             return -1
 
-        self.create_light_path_in_pt(links, slot_list)
-
         src = flow.get_source()
         dst = flow.get_destination()
         id = self.next_lightpath_id
 
         lp = LightPath(id, src, dst, links, slot_list, modulation_level, p_cycle)
         self.g_lightpath.add_edge(src, dst, key=id, lightpath=lp)
-        self.tr.create_lightpath(lp)
+        hook = self.hooks.lightpath_created
+        if hook is not None:
+            hook(lp)
         self.next_lightpath_id += 1
         return id
 
@@ -75,17 +78,16 @@ class VirtualTopology:
 
     def can_create_light_path(self, links: List[int], slot_list: List[Slot]) -> bool:
         try:
-            for link in links:
-                if not self.pt.are_slots_available(self.pt.get_src_link(link), self.pt.get_dst_link(link), slot_list):
+            for src, dst in self.pt.get_endpoints(links):
+                if not self.pt.are_slots_available(src, dst, slot_list):
                     return False
             return True
         except ValueError:
             raise "Illegal argument for areSlotsAvailable"
 
-    def create_light_path_in_pt(self, links: List[int], slot_list: List[Slot]) -> None:
-        """Update reverse slots in PhysicalTopology"""
-        for link in links:
-            self.pt.reserve_slots(self.pt.get_src_link(link), self.pt.get_dst_link(link), slot_list)
+    def create_light_path_in_pt(self, links: List[int], slot_list: List[Slot]) -> bool:
+        """Reserves the slots in PhysicalTopology, False (nothing reserved) if one is taken on one of the links"""
+        return self.pt.reserve_path(links, slot_list)
 
     def remove_light_path(self, id: float) -> bool:
         """Remove a light path by ID from the virtual topology."""
@@ -101,30 +103,48 @@ class VirtualTopology:
                     self.g_lightpath.remove_edge(src, dst, key=id)  # Remove the edge from the graph
                     # self.list_nodes.remove((src, dst))
                     # self.light_path.pop(id, None)  # Remove from dictionary if it exists
-                    self.tr.remove_lightpath(lp)
+                    hook = self.hooks.lightpath_removed
+                    if hook is not None:
+                        hook(lp)
                     return True  # Successfully removed
         return False  # Light path not found
        
+    def has_light_path(self, lp: LightPath) -> bool:
+        """True if `lp` was created here and not removed yet, its slots being reserved"""
+        return self.g_lightpath.has_edge(lp.get_source(), lp.get_destination(), key=lp.get_id()) and \
+            self.g_lightpath[lp.get_source()][lp.get_destination()][lp.get_id()]["lightpath"] is lp
+
+    def detach_light_path(self, lp: LightPath) -> bool:
+        """Removes `lp` from the graph without releasing its slots, which the caller frees"""
+        if not self.g_lightpath.has_edge(lp.get_source(), lp.get_destination(), key=lp.get_id()):
+            return False
+        self.g_lightpath.remove_edge(lp.get_source(), lp.get_destination(), key=lp.get_id())
+        hook = self.hooks.lightpath_removed
+        if hook is not None:
+            hook(lp)
+        return True
+
     def remove_light_path_from_pt(self, links: List[int], slot_list: List[Slot]) -> None:
         """Release the reserved slots in the physical topology."""
-        for link in links:  # Get source and destination of the link
-            src = self.pt.get_src_link(link)
-            dst = self.pt.get_dst_link(link)
-            self.pt.release_slots(src, dst, slot_list)
+        self.pt.release_path(links, slot_list)
 
     def get_p_cycles(self) -> List[PCycle]:
         return self.p_cycles
     
     def add_p_cycles(self, cycle: PCycle):
         self.p_cycles.append(cycle)
+        hook = self.hooks.p_cycle_created
+        if hook is not None:
+            hook(cycle)
 
-    def remove_lp_p_cycle(self, lp: LightPath):
+    def remove_lp_p_cycle(self, lp: LightPath, released: List[Tuple[List[int], List[Slot]]] = None):
+        """Drops `lp` from its p-cycle, releasing the p-cycle with its last lightpath (appended to `released` if given)"""
         p_cycle_protect = lp.get_p_cycle()
         if len(p_cycle_protect.get_protected_lightpaths()) == 1:
-            for i in range(0, len(p_cycle_protect.get_cycle_links()), 1):
-                self.pt.release_slots(self.pt.get_src_link(p_cycle_protect.get_cycle_links()[i]),
-                                      self.pt.get_dst_link(p_cycle_protect.get_cycle_links()[i]),
-                                      p_cycle_protect.get_slot_list())
+            if released is not None:
+                released.append((p_cycle_protect.get_cycle_links(), p_cycle_protect.get_slot_list()))
+            else:
+                self.pt.release_path(p_cycle_protect.get_cycle_links(), p_cycle_protect.get_slot_list())
             self.p_cycles.remove(p_cycle_protect)
         else:
             # Remove the light path from the P-cycle's protected light paths
@@ -13,6 +13,7 @@ from src.Slot import Slot
 from src.PCycle import PCycle
 from src.LightPath import LightPath
 from src.ProtectingLightPath import ProtectingLightPath
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 
 class BfsRSA(RSA):
@@ -32,48 +33,24 @@ class BfsRSA(RSA):
 
     # ================== BFS UTILS ==================
 
-    def bfs_path(self, graph: nx.Graph, src: int, dst: int, banned_edges=None):
-        from collections import deque
+    def bfs_path(self, edge_mask: List[bool], src: int, dst: int, banned_edges=None):
+        # neighbours in the order of the search graph the edges were copied into
+        csr = self.pt.get_csr().edge_ordered()
 
-        if banned_edges is None:
-            banned_edges = set()
+        if banned_edges:
+            edge_mask = list(edge_mask)
+            for u, v in banned_edges:
+                edge_mask[csr.get_edge(u, v)] = False
 
-        if src not in graph or dst not in graph:
-            return None
+        path = csr.bfs(src, dst, edge_mask)
+        return path if path else None
 
-        queue = deque([src])
-        parent = {src: None}
 
-        while queue:
-            u = queue.popleft()
-            if u == dst:
-                break
-
-            for v in graph.neighbors(u):
-                if (u, v) in banned_edges or (v, u) in banned_edges:
-                    continue
-
-                if v not in parent:
-                    parent[v] = u
-                    queue.append(v)
-
-        if dst not in parent:
-            return None
-
-        path = []
-        cur = dst
-        while cur is not None:
-            path.append(cur)
-            cur = parent[cur]
-
-        return list(reversed(path))
-
-
-    def get_two_shortest_disjoint_paths(self, flow: Flow, search_graph: nx.Graph):
+    def get_two_shortest_disjoint_paths(self, flow: Flow, edge_mask: List[bool]):
 
     # Path 1
         path1 = self.bfs_path(
-            search_graph,
+            edge_mask,
             flow.get_source(),
             flow.get_destination()
         )
@@ -90,7 +67,7 @@ class BfsRSA(RSA):
 
     # Path 2 (avoid edges of path1)
         path2 = self.bfs_path(
-            search_graph,
+            edge_mask,
             flow.get_source(),
             flow.get_destination(),
             banned_edges=banned_edges
@@ -104,36 +81,27 @@ class BfsRSA(RSA):
 
 
 
-    def remove_used_edges(self, graph: nx.Graph):
+    def remove_used_edges(self, fits: List[int]):
 
         return
 
     # ================== FIND WORKING PATH ==================
 
     def find_working_path(self, flow: Flow, demand_in_slots: int):
-        new_graph = self.pt.get_graph().copy()
+        # spectrum info per CSR edge: bit i set when slots i .. i + demand - 1 of core 0 are free
+        fits = [FreeBlockIndex.fit_mask(self.pt.get_free_mask(link_id, 0), demand_in_slots)
+                for link_id in self.pt.get_csr().edge_ids.tolist()]
 
-        # attach spectrum info
-        for u, v in new_graph.edges():
-            edge_spectrum = self.pt.get_spectrum(u, v)
-            new_graph[u][v]['spectrum'] = edge_spectrum
-
-     
-        self.remove_used_edges(new_graph)
+        self.remove_used_edges(fits)
 
         best_path = None
         best_slot_index = None
         weight_best_path = float("inf")
 
         for i in range(0, self.pt.get_num_slots() - demand_in_slots + 1):
-            search_graph = nx.Graph()
-
-            for u, v, edge_data in new_graph.edges(data=True):
-                spectrum = edge_data['spectrum']
-                if all(spectrum[0][i:i + demand_in_slots]):
-                    search_graph.add_edge(u, v)
+            edge_mask = [f >> i & 1 for f in fits]
 
-            path = self.bfs_path(search_graph, flow.get_source(), flow.get_destination())
+            path = self.bfs_path(edge_mask, flow.get_source(), flow.get_destination())
             if path is not None:
                 length = len(path) - 1
                 if length < weight_best_path:
@@ -148,14 +116,10 @@ class BfsRSA(RSA):
     def create_p_cycle(self, flow: Flow, working_path: List[int],
                    slot_index: int, demand_in_slots: int):
 
-        new_graph = self.pt.get_graph().copy()
+        fits = [FreeBlockIndex.fit_mask(self.pt.get_free_mask(link_id, 0), demand_in_slots)
+                for link_id in self.pt.get_csr().edge_ids.tolist()]
 
- 
-        for u, v in new_graph.edges():
-            edge_spectrum = self.pt.get_spectrum(u, v)
-            new_graph[u][v]['spectrum'] = edge_spectrum
-
-        self.remove_used_edges(new_graph)
+        self.remove_used_edges(fits)
 
         def is_disjoint(path, wp):
             wp_edges = {(wp[i], wp[i+1]) for i in range(len(wp)-1)}
@@ -170,17 +134,12 @@ class BfsRSA(RSA):
 
         for j in range(0, self.pt.get_num_slots() - demand_in_slots + 1):
 
-            search_graph = nx.Graph()
-
-        # Build graph with available spectrum
-            for u, v, edge_data in new_graph.edges(data=True):
-                spectrum = edge_data['spectrum'][0]  # adjust if needed
-                if all(spectrum[j:j + demand_in_slots]):
-                    search_graph.add_edge(u, v)
+        # Mask of the edges with available spectrum
+            edge_mask = [f >> j & 1 for f in fits]
 
         # Find two edge-disjoint paths
             length_1, path1, length_2, path2 = \
-                self.get_two_shortest_disjoint_paths(flow, search_graph)
+                self.get_two_shortest_disjoint_paths(flow, edge_mask)
 
             if not (path1 and path2):
                 continue
@@ -251,12 +210,31 @@ class BfsRSA(RSA):
                     reserved_slots=demand_in_slots
                 )
 
+                if not self.reserve_p_cycle(new_p_cycle, wp_links, wp_slot_list):
+                    return None, None, None, False
+
                 self.vt.add_p_cycles(new_p_cycle)
 
                 return new_p_cycle, wp_links, wp_slot_list, False
 
         return None, None, None, False
 
+    def reserve_p_cycle(self, p_cycle: PCycle, wp_links: List[int], wp_slot_list: List[Slot]) -> bool:
+        """
+        Reserves the slots of a new p-cycle ahead of its working lightpath, all of them or none. Only one
+        side of the p-cycle has to avoid the working path, so on the links they share the slots the working
+        lightpath is to hold are left to it.
+        """
+        shared = set(p_cycle.get_cycle_links()) & set(wp_links)
+        trial = self.pt.snapshot()
+        if trial.reserve_path([link for link in p_cycle.get_cycle_links() if link not in shared],
+                              p_cycle.get_slot_list()) \
+                and trial.reserve_path(list(shared), [s for s in p_cycle.get_slot_list() if s not in wp_slot_list]):
+            trial.commit()
+            return True
+        trial.discard()
+        return False
+
     # ================== FLOW ARRIVAL ==================
 
     def flow_arrival(self, flow: Flow) -> None:
@@ -281,21 +259,6 @@ class BfsRSA(RSA):
                 fss=demand_in_slots
             )
 
-            for edge in wp_links:
-                self.pt.reserve_slots(
-                    self.pt.get_src_link(edge),
-                    self.pt.get_dst_link(edge),
-                    wp_slot_list
-                )
-
-            if not pcycle_reuse:
-                for p_link in p_cycle.get_cycle_links():
-                    self.pt.reserve_slots(
-                        self.pt.get_src_link(p_link),
-                        self.pt.get_dst_link(p_link),
-                        p_cycle.get_slot_list()
-                    )
-
             p_cycle.add_protected_lightpath(protected_lp)
             return
 
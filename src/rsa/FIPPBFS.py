@@ -12,14 +12,15 @@ from src.Flow import Flow
 from src.Slot import Slot
 from src.PCycle import PCycle
 from src.ProtectingLightPath import ProtectingLightPath
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 
 class FIPPBFS(RSA):
 
     def __init__(self):
-        self.pt: = None
-        self.vt: = None
-        self.cp: = None
+        self.pt: PhysicalTopology = None
+        self.vt: VirtualTopology = None
+        self.cp: ControlPlaneForRSA = None
         self.graph = None
 
     def simulation_interface(self, xml: ET.Element, pt: PhysicalTopology,
@@ -48,9 +49,9 @@ class FIPPBFS(RSA):
         ok, wp_links, wp_slots, backup_paths, p_links, p_nodes, p_slots = \
             self.initialize_fipp(flow, demand)
 
-        if ok:
-            pcycle = self.establish_pcycle(p_links, p_nodes, p_slots, demand)
+        pcycle = self.establish_pcycle(p_links, p_nodes, p_slots, demand) if ok else None
 
+        if pcycle is not None:
             self.vt.add_p_cycles(pcycle)
             self.create_lightpath(flow, wp_links, wp_slots, pcycle, backup_paths, reused=False)
             return
@@ -69,19 +70,11 @@ class FIPPBFS(RSA):
             return False, None, None, None
 
         for path in paths:
-            spectrum = [[True]*self.pt.get_num_slots()
-                        for _ in range(self.pt.get_cores())]
-
-            for i in range(len(path)-1):
-                spectrum = self.image_and(
-                    self.pt.get_spectrum(path[i], path[i+1]),
-                    spectrum, spectrum
-                )
+            links = self.pt.get_path_link_ids(path)
+            spectrum = self.pt.path_spectrum(links)
 
             ok, _, slots = self.calculate_slot_range(spectrum, demand)
             if ok:
-                links = [self.pt.get_link_id(path[i], path[i+1])
-                        for i in range(len(path)-1)]
                 return True, links, slots, []
 
         return False, None, None, None
@@ -97,11 +90,6 @@ class FIPPBFS(RSA):
             flow.set_slot_list(slot_list)
             self.cp.accept_flow(flow.get_id(), lps, reused)
 
-            for edge in pcycle.get_cycle_links():
-                self.pt.reserve_slots(self.pt.get_src_link(edge),
-                                      self.pt.get_dst_link(edge),
-                                      pcycle.get_slot_list())
-
             protected_lp = ProtectingLightPath(lp_id, flow.get_source(),
                                                flow.get_destination(),
                                                links, len(slot_list),
@@ -113,47 +101,31 @@ class FIPPBFS(RSA):
         if not path1 or not path2:
             return False, None, None, None, None, None, None
 
-        spectrum = [[True for _ in range(self.pt.get_num_slots())]
-                    for _ in range(self.pt.get_cores())]
-
-        for i in range(len(path1)-1):
-            spectrum = self.image_and(self.pt.get_spectrum(path1[i], path1[i+1]),
-                                      spectrum, spectrum)
-
-        for i in range(len(path2)-1):
-            spectrum = self.image_and(self.pt.get_spectrum(path2[i], path2[i+1]),
-                                      spectrum, spectrum)
+        spectrum = self.pt.path_spectrum(self.pt.get_path_link_ids(path1) +
+                                         self.pt.get_path_link_ids(path2))
 
         ok, _, pcycle_slots = self.calculate_slot_range(spectrum, demand)
         if not ok:
             return False, None, None, None, None, None, None
 
-        spectrum1 = [row.copy() for row in spectrum]
-        for s in pcycle_slots:
-            spectrum1[s.core][s.slot] = False
-
-        ok1, _, wp_slots = self.calculate_slot_range(spectrum1, demand)
-        if ok1:
-            links1 = [self.pt.get_link_id(path1[i], path1[i+1])
-                      for i in range(len(path1)-1)]
-            links2 = [self.pt.get_link_id(path2[i], path2[i+1])
-                      for i in range(len(path2)-1)]
+        links1 = self.pt.get_path_link_ids(path1)
+        links2 = self.pt.get_path_link_ids(path2)
+
+        # place the p-cycle on an overlay, then look for the working slots next to it
+        trial = self.pt.snapshot()
+        wp_slots = None
+        if trial.reserve_path(links1 + links2, pcycle_slots):
+            for core in range(self.pt.get_cores()):
+                start = trial.path_first_fit(links1 + links2, core, demand)
+                if start >= 0:
+                    wp_slots = [Slot(core, j) for j in range(start, start+demand)]
+                    break
+        trial.discard()
+
+        if wp_slots is not None:
             return True, links1, wp_slots, [links2], links1+links2, \
                    list(set(path1)|set(path2)), pcycle_slots
 
-        spectrum2 = [row.copy() for row in spectrum]
-        for s in pcycle_slots:
-            spectrum2[s.core][s.slot] = False
-
-        ok2, _, wp_slots = self.calculate_slot_range(spectrum2, demand)
-        if ok2:
-            links2 = [self.pt.get_link_id(path2[i], path2[i+1])
-                      for i in range(len(path2)-1)]
-            links1 = [self.pt.get_link_id(path1[i], path1[i+1])
-                      for i in range(len(path1)-1)]
-            return True, links2, wp_slots, [links1], links1+links2, \
-                   list(set(path1)|set(path2)), pcycle_slots
-
         return False, None, None, None, None, None, None
 ##
     def establish_pcycle(self, p_links, p_nodes, p_slots, demand):
@@ -161,10 +133,8 @@ class FIPPBFS(RSA):
         pcycle = PCycle(p_links, p_nodes, p_slots)
 
 
-        for edge in p_links:
-            src = self.pt.get_src_link(edge)
-            dst = self.pt.get_dst_link(edge)
-            self.pt.reserve_slots(src, dst, p_slots)
+        if not self.pt.reserve_path(p_links, p_slots):
+            return None
 
         return pcycle
 
@@ -198,20 +168,14 @@ class FIPPBFS(RSA):
         return path1, path2
 
 
-    def image_and(self, img1, img2, res):
-        for i in range(len(res)):
-            for j in range(len(res[0])):
-                res[i][j] = img1[i][j] and img2[i][j]
-        return res
-
     def calculate_slot_range(self, spectrum, demand):
         for c_idx, row in enumerate(spectrum):
-            for i in range(len(row)-demand+1):
-                if all(row[i:i+demand]):
-                    slot_list = [Slot(c_idx, j) for j in range(i, i+demand)]
-                    for j in range(i, i+demand):
-                        row[j] = False
-                    return True, spectrum, slot_list
+            i = FreeBlockIndex.first_fit_in_mask(FreeBlockIndex.row_to_mask(row), demand)
+            if i >= 0:
+                slot_list = [Slot(c_idx, j) for j in range(i, i+demand)]
+                for j in range(i, i+demand):
+                    row[j] = False
+                return True, spectrum, slot_list
         return False, spectrum, None
 
     def extend_or_replace_false(self, lst, core_idx, start, end, demand):
@@ -257,16 +221,7 @@ class FIPPBFS(RSA):
             return True, pcycle.get_slot_list()
 
 
-        spectrum = [[True for _ in range(self.pt.get_num_slots())]
-                    for _ in range(self.pt.get_cores())]
-
-        for edge in pcycle.get_cycle_links():
-            spectrum = self.image_and(
-                self.pt.get_spectrum(self.pt.get_src_link(edge),
-                                     self.pt.get_dst_link(edge)),
-                spectrum,
-                spectrum
-            )
+        spectrum = self.pt.path_spectrum(pcycle.get_cycle_links())
 
 
         core, start, end = pcycle.get_core_slot_range()
@@ -14,6 +14,7 @@ from src.Flow import Flow
 from src.Slot import Slot
 from src.PCycle import PCycle
 from src.ProtectingLightPath import ProtectingLightPath
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 
 class FIPPFlex(RSA):
@@ -37,38 +38,23 @@ class FIPPFlex(RSA):
         :param: demand_in_slots: Number of slots required for the flow
         :return: working path
         """
-        new_graph = self.pt.get_graph().copy()
-        for u,v,edge_data in new_graph.edges(data=True):
-            edge_spectrum = self.pt.get_spectrum(u, v)
-            new_graph[u][v]['spectrum'] = edge_spectrum
+        # neighbours in the order of the search graph the edges were copied into
+        csr = self.pt.get_csr().edge_ordered()
+        fits = [FreeBlockIndex.fit_mask(self.pt.get_free_mask(link_id, 0), demand_in_slots)
+                for link_id in csr.edge_ids.tolist()]
 
         best_path = None
         weight_best_path = float("inf")
         best_slot_index = None
 
         for i in range(0, self.pt.get_num_slots() - demand_in_slots):
-            search_graph = nx.Graph()
-
-            for u, v, edge_data in new_graph.edges(data=True):
-                spectrum = edge_data['spectrum']
-                if all(spectrum[0][i:i + demand_in_slots]):
-                    search_graph.add_edge(u, v, weight_search=1)
-                else:
-                    search_graph.add_edge(u, v, weight_search=float("inf"))
-            try:
-                # path = nx.dijkstra_path(search_graph, source=flow.get_source(), target=flow.get_destination(), weight='weight_search')
-                length, path = nx.single_source_dijkstra(
-                    search_graph,
-                    source=flow.get_source(),
-                    target=flow.get_destination(),
-                    weight='weight_search'
-                )
-                if weight_best_path > length != float("inf"):
-                    best_path = path
-                    weight_best_path = length
-                    best_slot_index = i
-            except nx.NetworkXNoPath:
-                continue
+            # an edge is usable when slots i .. i + demand - 1 are free, every usable hop weighing 1
+            edge_mask = [f >> i & 1 for f in fits]
+            length, path = csr.dijkstra(flow.get_source(), flow.get_destination(), None, edge_mask)
+            if weight_best_path > length != float("inf"):
+                best_path = path
+                weight_best_path = length
+                best_slot_index = i
         return best_path, best_slot_index, weight_best_path
 
     def fippflexai(self, flow: Flow, demand_in_slots: int):
@@ -100,6 +86,9 @@ class FIPPFlex(RSA):
                 p_cycle_nodes = list(set(path_1_pcycle) | set(path_2_pcycle))
                 new_p_cycle = PCycle(cycle_links=p_cycle_links, nodes=p_cycle_nodes, reserved_slots=demand_in_slots,
                                      slot_list=self.convert_slot(slot_index_pcycle, demand_in_slots))
+                # create_p_cycle() kept the p-cycle off the working slots, so it is reserved before them
+                if not self.pt.reserve_path(p_cycle_links, new_p_cycle.get_slot_list()):
+                    return None, None, None, False
                 self.vt.add_p_cycles(new_p_cycle)
                 return new_p_cycle, wp_links, wp_slot_list, False
         return None, None, None, False
@@ -121,12 +110,6 @@ class FIPPFlex(RSA):
             print("LP", lp_id)
             protected_lp = ProtectingLightPath(id=lp_id, src=flow.get_source(), dst=flow.get_destination(),
                                                links_id=wp_links, fss=demand_in_slots)
-            for edge in wp_links:
-                self.pt.reserve_slots(self.pt.get_src_link(edge), self.pt.get_dst_link(edge), wp_slot_list)
-            if not pcycle_reuse:
-                p_cycle_links = p_cycle.get_cycle_links()
-                for p_link in p_cycle_links:
-                    self.pt.reserve_slots(self.pt.get_src_link(p_link), self.pt.get_dst_link(p_link), p_cycle.get_slot_list())
             p_cycle.add_protected_lightpath(protected_lp)
             return
         else:
@@ -150,12 +133,6 @@ class FIPPFlex(RSA):
         else:
             return False, None
 
-    def image_and(self, image1: List[List[bool]], image2: List[List[bool]], res: List[List[bool]]) -> List[List[bool]]:
-        for i in range(len(res)):
-            for j in range(len(res[0])):
-                res[i][j] = image1[i][j] and image2[i][j]
-        return res
-
     def flow_departure(self, flow):
         pass
 
@@ -169,73 +146,53 @@ class FIPPFlex(RSA):
         :return: List of edges of the p-cycle if it is possible to create, None otherwise
         """
 
-        new_graph = self.pt.get_graph().copy()
-        for u,v,edge_data in new_graph.edges(data=True):
-            edge_spectrum = self.pt.get_spectrum(u, v)
-            new_graph[u][v]['spectrum'] = edge_spectrum
+        csr = self.pt.get_csr()
+        free = [self.pt.get_free_mask(link_id, 0) for link_id in csr.edge_ids.tolist()]
         for i in range(0, len(working_path) - 1):
             for slot in (slot_index, slot_index + demand_in_slots):
-                new_graph[working_path[i]][working_path[i+1]]['spectrum'][0][slot] = False
+                free[csr.get_edge(working_path[i], working_path[i+1])] &= ~(1 << slot)
+        fits = [FreeBlockIndex.fit_mask(f, demand_in_slots) for f in free]
         best_path_1 = None
         best_path_2 = None
         weight_best_path = float("inf")
         best_slot_index = None
 
         for j in range(0, self.pt.get_num_slots() - demand_in_slots):
-            search_graph = nx.Graph()
-
-            for u, v, edge_data in new_graph.edges(data=True):
-                spectrum = edge_data['spectrum']
-                if all(spectrum[0][j:j + demand_in_slots]):
-                    search_graph.add_edge(u, v, weight_search=1)
-                else:
-                    search_graph.add_edge(u, v, weight_search=float("inf"))
-            try:
-                length_1, path1, length_2, path2 = self.get_two_shortest_disjoint_paths(flow, search_graph)
-                if path1 and path2 and length_1 != float("inf") and length_2 != float("inf"):
-                    if weight_best_path > length_1 + length_2:
-                        best_path_1 = path1
-                        best_path_2 = path2
-                        weight_best_path = length_1 + length_2
-                        best_slot_index = j
-            except nx.NetworkXNoPath:
-                continue
+            edge_mask = [f >> j & 1 for f in fits]
+            length_1, path1, length_2, path2 = self.get_two_shortest_disjoint_paths(flow, edge_mask)
+            if path1 and path2 and length_1 != float("inf") and length_2 != float("inf"):
+                if weight_best_path > length_1 + length_2:
+                    best_path_1 = path1
+                    best_path_2 = path2
+                    weight_best_path = length_1 + length_2
+                    best_slot_index = j
         return best_path_1, best_path_2, best_slot_index
 
-    def get_two_shortest_disjoint_paths(self, flow: Flow, search_graph: nx.Graph):
-        try:
-            # Find first shortest path
-            length_1, path1 = nx.single_source_dijkstra(
-                search_graph,
-                source=flow.get_source(),
-                target=flow.get_destination(),
-                weight='weight_search'
-            )
-
-            G_copy = search_graph.copy()
-            for i in range(len(path1) - 1):
-                u, v = path1[i], path1[i + 1]
-                if G_copy.has_edge(u, v):
-                    G_copy.remove_edge(u, v)
-
-            length_2, path2 = nx.single_source_dijkstra(
-                G_copy,
-                source=flow.get_source(),
-                target=flow.get_destination(),
-                weight='weight_search'
-            )
-
-            return length_1, path1, length_2, path2
-
-        except nx.NetworkXNoPath:
+    def get_two_shortest_disjoint_paths(self, flow: Flow, edge_mask: List[bool]):
+        csr = self.pt.get_csr().edge_ordered()
+        # Find first shortest path
+        length_1, path1 = csr.dijkstra(flow.get_source(), flow.get_destination(), None, edge_mask)
+        if not path1:
             return None, None, None, None
 
-    def remove_edges(self, path):
-        G_modified = self.pt.get_graph().copy()
-        sp1_edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        G_modified.remove_edges_from(sp1_edges)
+        # Mask out the edges of path1
+        edge_mask = list(edge_mask)
+        for i in range(len(path1) - 1):
+            edge_mask[csr.get_edge(path1[i], path1[i + 1])] = False
+
+        length_2, path2 = csr.dijkstra(flow.get_source(), flow.get_destination(), None, edge_mask)
+        if not path2:
+            return None, None, None, None
+
+        return length_1, path1, length_2, path2
 
+    def remove_edges(self, path):
+        csr = self.pt.get_csr()
         inner_nodes = set(path[1:-1])
-        remove_edges = [(u, v) for u, v in G_modified.edges if u in inner_nodes or v in inner_nodes]
-        G_modified.remove_edges_from(remove_edges)
-        return G_modified
\ No newline at end of file
+        edge_mask = [True] * csr.get_num_edges()
+        for (u, v), e in csr.edge_index.items():
+            if u in inner_nodes or v in inner_nodes:
+                edge_mask[e] = False
+        for i in range(len(path) - 1):
+            edge_mask[csr.get_edge(path[i], path[i + 1])] = False
+        return csr.to_networkx(edge_mask)
\ No newline at end of file
@@ -2,7 +2,6 @@ import xml.etree.ElementTree as ET
 from typing import List, Dict
 import math
 import networkx as nx
-from itertools import islice
 
 from src.rsa.RSA import RSA
 from src.util.ConnectedComponent import ConnectedComponent
@@ -33,19 +32,18 @@ class ImageRCSA(RSA):
         # print("flow", flow)
         # k_path = nx.shortest_path(self.graph, flow.get_source(), flow.get_destination())
         # print("k_path: ", k_path)
-        k_paths = list(islice(nx.shortest_simple_paths(self.graph, flow.get_source(), flow.get_destination(), weight="weight"), 10))
+        # self.graph is rebuilt edge by edge, hence the edge-ordered view
+        k_paths = self.pt.get_csr().edge_ordered().k_shortest_paths(flow.get_source(), flow.get_destination(), 10,
+                                                                    weight="weight")
         # k_paths = list(nx.k_shortest(self.graph, flow.get_source(), flow.get_destination(), weight="weight"), 10)
         # print("k_paths: ", k_paths)
         # # k_paths = KShortestPaths().dijkstra_k_shortest_paths(self.graph, flow.get_source(), flow.get_destination(), 5)
-        spectrum = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
+        k_links = [self.pt.get_path_link_ids(path) for path in k_paths]
+        # joint free spectrum of all k paths in one call
+        k_spectrum = self.pt.paths_free_spectrum(k_links)
 
         for k in range(0, len(k_paths), 1):
-            for i in range(0, len(spectrum), 1):
-                for j in range(0, len(spectrum[i]), 1):
-                    spectrum[i][j] = True
-            for i in range(0, len(k_paths[k]) - 1, 1):
-                spectrum = self.image_and(self.pt.get_spectrum(k_paths[k][i], k_paths[k][i + 1]),
-                                          spectrum, spectrum)
+            spectrum = k_spectrum[k].tolist()
 
             cc = ConnectedComponent()
             list_of_regions = cc.list_of_regions(spectrum)
@@ -53,9 +51,7 @@ class ImageRCSA(RSA):
             if list_of_regions == {}:
                 continue
 
-            links = [0 for _ in range(len(k_paths[k]) - 1)]
-            for j in range(0, len(k_paths[k]) - 1, 1):
-                links[j] = self.pt.get_link_id(k_paths[k][j], k_paths[k][j + 1])
+            links = k_links[k]
             if self.fit_connection(list_of_regions, demand_in_slots, links, flow):
                 return
         self.cp.block_flow(flow.get_id())
@@ -83,11 +79,5 @@ class ImageRCSA(RSA):
         else:
             return False
 
-    def image_and(self, image1: List[List[bool]], image2: List[List[bool]], res: List[List[bool]]) -> List[List[bool]]:
-        for i in range(len(res)):
-            for j in range(len(res[0])):
-                res[i][j] = image1[i][j] and image2[i][j]
-        return res
-
     def flow_departure(self, flow):
         pass
\ No newline at end of file
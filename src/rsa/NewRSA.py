@@ -2,7 +2,6 @@ import xml.etree.ElementTree as ET
 from typing import List, Dict, Tuple, Optional, Set
 import math
 import networkx as nx
-from itertools import islice
 from collections import defaultdict
 
 from src.PCycle import PCycle
@@ -15,6 +14,8 @@ from src.ControlPlaneForRSA import ControlPlaneForRSA
 from src.TrafficGenerator import TrafficGenerator
 from src.Flow import Flow
 from src.Slot import Slot
+from src.SpectrumSnapshot import SpectrumSnapshot
+from src.util.FreeBlockIndex import FreeBlockIndex
 from functools import lru_cache
 
 
@@ -38,12 +39,16 @@ class NewRSA(RSA):
             for p_cycle in self.vt.get_p_cycles():
                 # Check if the p-cycle contains the flow
                 if p_cycle.p_cycle_contains_flow(flow.get_source(), flow.get_destination()):
-                    check_protect, spectrum, p_cycle, slot_list_p_cycle = self.extend_slot(demand_in_slots, p_cycle)
+                    # the p-cycle extension is made on an overlay the working path search reads; it stands
+                    # whether or not a working path fits, as the p-cycle keeps the slots extend_slot() gave it
+                    trial = self.pt.snapshot()
+                    check_protect, spectrum, p_cycle, slot_list_p_cycle = self.extend_slot(demand_in_slots, p_cycle, trial)
                     # check extend frequency slot
                     if check_protect:
                         # find the shortest working path
-                        check_path, working_path, links, slot_list, backup_paths = self.find_shortest_working_path(flow, slot_list_p_cycle, p_cycle)
+                        check_path, working_path, links, slot_list, backup_paths = self.find_shortest_working_path(flow, slot_list_p_cycle, p_cycle, trial)
                         if check_path:
+                            trial.commit()
                             # create light path
                             establish, lp_id = self.establish_connection(links, slot_list, flow, p_cycle)
                             # add the light path to the p-cycle
@@ -58,15 +63,18 @@ class NewRSA(RSA):
                             p_cycle.set_slot_list(slot_list_p_cycle)
                             return
                         else:
+                            trial.commit()
                             self.cp.block_flow(flow.get_id())
                             return
                     else:
+                        trial.discard()
                         self.cp.block_flow(flow.get_id())
                         return
 
 
         check_available, working_links, working_slot_list, backup_paths, p_cycle_links, p_cycle_nodes, slot_list_p_cycle = self.initialize_fipp(flow)
-        if check_available:
+        # the p-cycle slots are apart from the working ones, so they can be reserved first
+        if check_available and self.pt.reserve_path(p_cycle_links, slot_list_p_cycle):
             p_cycle = self.establish_pcycle(p_cycle_links, p_cycle_nodes, slot_list_p_cycle, demand_in_slots)
             # create light path
             establish, lp_id = self.establish_connection(working_links, working_slot_list, flow, p_cycle)
@@ -76,10 +84,6 @@ class NewRSA(RSA):
                                              backup_paths=backup_paths)
             p_cycle.add_protected_lightpath(protect_lp)
             # print("ADD PROTECTED LP", self.vt.print_light_paths())
-            for j in range(0, len(p_cycle_links), 1):
-                self.pt.reserve_slots(self.pt.get_src_link(p_cycle_links[j]),
-                                      self.pt.get_dst_link(p_cycle_links[j]),
-                                      slot_list_p_cycle)
             return
         self.cp.block_flow(flow.get_id())
         return
@@ -102,12 +106,6 @@ class NewRSA(RSA):
         self.vt.add_p_cycles(new_p_cycle)
         return new_p_cycle
 
-    def image_and(self, image1: List[List[bool]], image2: List[List[bool]], res: List[List[bool]]) -> List[List[bool]]:
-        for i in range(len(res)):
-            for j in range(len(res[0])):
-                res[i][j] = image1[i][j] and image2[i][j]
-        return res
-
     def flow_departure(self, flow):
         pass
 
@@ -115,14 +113,10 @@ class NewRSA(RSA):
         demand_in_slots = math.ceil(flow.get_rate() / self.pt.get_slot_capacity())
         path1, path2 = self.get_two_shortest_disjoint_paths(flow)
         if path1 and path2:
-            spectrum_path_1 = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
-            spectrum_path_2 = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
-            for i in range(len(path1) - 1):
-                spectrum_path_1 = self.image_and(self.pt.get_spectrum(path1[i], path1[i + 1]), spectrum_path_1, spectrum_path_1)
-            for i in range(len(path2) - 1):
-                spectrum_path_2 = self.image_and(self.pt.get_spectrum(path2[i], path2[i + 1]), spectrum_path_2, spectrum_path_2)
-            spectrum = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
-            spectrum = self.image_and(spectrum_path_1, spectrum_path_2, spectrum)
+            path_spectra = self.pt.paths_free_spectrum([self.pt.get_path_link_ids(path1), self.pt.get_path_link_ids(path2)])
+            spectrum_path_1 = path_spectra[0].tolist()
+            spectrum_path_2 = path_spectra[1].tolist()
+            spectrum = (path_spectra[0] & path_spectra[1]).tolist()
             # check frequency slot for pcycle
             check_path, spec, slot_list_p_cycle = self.calculate_slot_range(spectrum, demand_in_slots)
             if check_path:
@@ -166,40 +160,34 @@ class NewRSA(RSA):
 
 
     def get_two_shortest_disjoint_paths(self, flow: Flow):
-        try:
-            # Find first shortest path
-            path1 = nx.shortest_path(self.pt.get_graph(), source=flow.get_source(), target=flow.get_destination(), weight=None)
-
-            # Create copy of the graph and remove edges of path1
-            G_copy = self.pt.get_graph().copy()
-            for i in range(len(path1) - 1):
-                u, v = path1[i], path1[i + 1]
-                if G_copy.has_edge(u, v):
-                    G_copy.remove_edge(u, v)
-
-            # Find second shortest path
-            path2 = nx.shortest_path(G_copy, source=flow.get_source(), target=flow.get_destination(), weight=None)
+        csr = self.pt.get_csr()
+        # Find first shortest path
+        _, path1 = csr.shortest_path(flow.get_source(), flow.get_destination())
+        if not path1:
+            return None, None
 
-            return path1, path2
+        # Mask out the edges of path1
+        edge_mask = [True] * csr.get_num_edges()
+        for i in range(len(path1) - 1):
+            edge_mask[csr.get_edge(path1[i], path1[i + 1])] = False
 
-        except nx.NetworkXNoPath:
-            return path1, None
+        # Find second shortest path, on the edge order of the graph copy it used to be searched in
+        _, path2 = csr.edge_ordered().shortest_path(flow.get_source(), flow.get_destination(), None, edge_mask)
 
-        except nx.NodeNotFound:
-            return None, None
+        return path1, path2 if path2 else None
 
 
-    def find_shortest_working_path(self, flow: Flow, slot_list_p_cycle: List[Slot], pcycle: PCycle):
+    def find_shortest_working_path(self, flow: Flow, slot_list_p_cycle: List[Slot], pcycle: PCycle, view: SpectrumSnapshot = None):
+        view = view if view is not None else self.pt
         demand_in_slots = math.ceil(flow.get_rate() / self.pt.get_slot_capacity())
         # shortest_path = nx.shortest_path(self.graph, source=flow.get_source(), target=flow.get_destination())
-        k_paths = list(
-            islice(nx.shortest_simple_paths(self.graph, flow.get_source(), flow.get_destination(), weight=None), 10))
-        for shortest_path in k_paths:
-            spectrum = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
-            links = [0 for _ in range(len(shortest_path) - 1)]
-            for i in range(len(shortest_path) - 1):
-                spectrum = self.image_and(self.pt.get_spectrum(shortest_path[i], shortest_path[i + 1]), spectrum, spectrum)
-                links[i] = self.pt.get_link_id(shortest_path[i], shortest_path[i + 1])
+        # self.graph is rebuilt edge by edge, hence the edge-ordered view
+        k_paths = self.pt.get_csr().edge_ordered().k_shortest_paths(flow.get_source(), flow.get_destination(), 10)
+        k_links = [self.pt.get_path_link_ids(path) for path in k_paths]
+        k_spectrum = view.paths_free_spectrum(k_links)
+        for k, shortest_path in enumerate(k_paths):
+            spectrum = k_spectrum[k].tolist()
+            links = k_links[k]
             if set(links).issubset(set(pcycle.get_cycle_links())):
                 for slot in slot_list_p_cycle:
                     spectrum[slot.core][slot.slot] = False
@@ -242,13 +230,14 @@ class NewRSA(RSA):
 
 
     def get_backup_path(self, flow: Flow, pcycle: PCycle, working_path: List[int]):
-        graph = nx.Graph()
+        csr = self.pt.get_csr()
         filtered_pcycle = [e for e in pcycle.get_cycle_links() if e not in working_path]
-        for idx in filtered_pcycle:
-            for u, v, data in self.pt.get_graph().edges(data=True):
-                if data.get("id") == idx:
-                    graph.add_edge(u, v, **data)
-        paths = list(nx.all_simple_paths(graph, source=flow.get_source(), target=flow.get_destination()))
+        # neighbours in the order the p-cycle links list their edges
+        first = {}
+        for position, link_id in enumerate(filtered_pcycle):
+            first.setdefault(link_id, position)
+        csr = csr.reordered([first.get(link_id, len(filtered_pcycle)) for link_id in csr.edge_ids.tolist()])
+        paths = csr.simple_paths(flow.get_source(), flow.get_destination(), csr.edge_mask_from_links(filtered_pcycle))
         list_backup_paths = []
         for path in paths:
             links = [0 for _ in range(len(path) - 1)]
@@ -261,13 +250,13 @@ class NewRSA(RSA):
     def calculate_slot_range(self, spectrum: List[List[bool]], demand: int):
         slot_list: List[Slot] = []
         for c_idx, r in enumerate(spectrum):
-            for i in range(len(r) - demand + 1):
-                if all(r[j] is True for j in range(i, i + demand)):
-                    for j in range(i, i + demand):
-                        r[j] = False
-                    for s_idx in range(i, i + demand):
-                        slot_list.append(Slot(c_idx, s_idx))
-                    return True, spectrum, slot_list
+            i = FreeBlockIndex.first_fit_in_mask(FreeBlockIndex.row_to_mask(r), demand)
+            if i >= 0:
+                for j in range(i, i + demand):
+                    r[j] = False
+                for s_idx in range(i, i + demand):
+                    slot_list.append(Slot(c_idx, s_idx))
+                return True, spectrum, slot_list
         return False, spectrum, None
 
 
@@ -296,7 +285,6 @@ class NewRSA(RSA):
             end: int,
             demand: int
     ) -> Tuple[List[List[bool]], Optional[Tuple[int, List[int]]]]:
-        lst_cop = [row.copy() for row in lst]
         with open("C:/Users/tctrinh/Desktop/research/bidirectional-eon/out/res.txt", "a") as f:
             f.write(f"LST {lst} \n")
         row = lst[core_idx]
@@ -338,13 +326,11 @@ class NewRSA(RSA):
             f.write(f"Khong EXTEND duoc P-CYCLE \n")
         return lst, None
 
-    def extend_slot(self, demand: int, pcycle: PCycle):
-        spectrum = [[True for _ in range(self.pt.get_num_slots())] for _ in range(self.pt.get_cores())]
+    def extend_slot(self, demand: int, pcycle: PCycle, trial: SpectrumSnapshot):
         for edge in pcycle.get_cycle_links():
             with open("C:/Users/tctrinh/Desktop/research/bidirectional-eon/out/res.txt", "a") as f:
                 f.write(f"from {self.pt.get_src_link(edge)} to {self.pt.get_dst_link(edge)} : {self.pt.get_spectrum(self.pt.get_src_link(edge), self.pt.get_dst_link(edge))} \n")
-            spectrum = self.image_and(self.pt.get_spectrum(self.pt.get_src_link(edge), self.pt.get_dst_link(edge)),
-                                      spectrum, spectrum)
+        spectrum = trial.path_spectrum(pcycle.get_cycle_links())
         if not pcycle.has_sufficient_slots(demand):
             core, min_slot, max_slot = pcycle.get_core_slot_range()
             spec, idx = self.extend_or_replace_false(lst=spectrum, core_idx=core, start=min_slot, end=max_slot, demand=demand)
@@ -354,8 +340,7 @@ class NewRSA(RSA):
                 slot_list: List[Slot] = []
                 for i in slots:
                     slot_list.append(Slot(core, i))
-                for edge in pcycle.get_cycle_links():
-                    self.pt.release_slots(self.pt.get_src_link(edge), self.pt.get_dst_link(edge), slot_list)
+                trial.release_path(pcycle.get_cycle_links(), slot_list)
                 pcycle.set_reversed_slots(demand)
                 pcycle.set_slot_list(slot_list)
                 return True, spec, pcycle, slot_list
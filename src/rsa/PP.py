@@ -12,6 +12,7 @@ from src.ControlPlaneForRSA import ControlPlaneForRSA
 from src.TrafficGenerator import TrafficGenerator
 from src.Flow import Flow
 from src.Slot import Slot
+from src.util.FreeBlockIndex import FreeBlockIndex
 import networkx as nx
 import itertools
 
@@ -33,8 +34,8 @@ class PP(RSA):
 
     def flow_arrival(self, flow: Flow) -> None:
         demand_in_slots = math.ceil(flow.get_rate() / self.pt.get_slot_capacity())
-        sub_graphs = self.create_subgraphs_from_slots(demand_in_slots)
-        min_path, min_index, min_weight = self.find_shortest_paths(subgraphs=sub_graphs, source=flow.get_source(), destination=flow.get_destination())
+        edge_masks = self.create_subgraphs_from_slots(demand_in_slots)
+        min_path, min_index, min_weight = self.find_shortest_paths(edge_masks=edge_masks, source=flow.get_source(), destination=flow.get_destination())
         if min_weight != float('inf'):
             links = [0 for _ in range(len(min_path) - 1)]
             for j in range(0, len(min_path) - 1, 1):
@@ -59,42 +60,27 @@ class PP(RSA):
         else:
             return False
 
-    def image_and(self, image1: List[List[bool]], image2: List[List[bool]], res: List[List[bool]]) -> List[List[bool]]:
-        for i in range(len(res)):
-            for j in range(len(res[0])):
-                res[i][j] = image1[i][j] and image2[i][j]
-        return res
-
     def flow_departure(self, flow):
         pass
 
     def create_subgraphs_from_slots(self, demand_in_slots: int):
+        """One edge mask of the CSR graph per first slot i, keeping the edges where slots i .. i + demand - 1 are free"""
         N = self.pt.get_num_slots()
-        graph = self.pt.get_graph()
-        subgraphs = []
-
-        for i in range(N - demand_in_slots + 1):
-            subgraph = nx.Graph()
-            for idx, (u, v, data) in enumerate(graph.edges(data=True)):
-                # Phép AND của b phần tử trong current_combination[idx]
-                spectrum = self.pt.get_spectrum(u, v)
-                current_combination = [spectrum[0][k] for k in range(i, i + demand_in_slots)]
-                and_result = all(current_combination)
-
-                weight = 1 if and_result else float('inf')
-                subgraph.add_edge(u, v, weight=weight)
+        csr = self.pt.get_csr()
+        # bit i set when slots i .. i + demand - 1 of core 0 are free on the edge
+        fits = [FreeBlockIndex.fit_mask(self.pt.get_free_mask(link_id, 0), demand_in_slots)
+                for link_id in csr.edge_ids.tolist()]
 
-            subgraphs.append(subgraph)
-        return subgraphs
+        return [[f >> i & 1 for f in fits] for i in range(N - demand_in_slots + 1)]
 
-    def find_shortest_paths(self, subgraphs, source, destination):
+    def find_shortest_paths(self, edge_masks, source, destination):
+        # networkx searched each subgraph from both ends with Dijkstra, every usable hop weighing 1
+        csr = self.pt.get_csr().edge_ordered()
+        unit_weights = [1.0] * csr.get_num_edges()
         shortest_paths = []
-        for subgraph in subgraphs:
-            try:
-                path = nx.shortest_path(subgraph, source, destination, weight='weight')
-                shortest_paths.append((path, nx.path_weight(subgraph, path, weight='weight')))
-            except nx.NetworkXNoPath:
-                shortest_paths.append((None, float('inf')))
+        for edge_mask in edge_masks:
+            length, path = csr.shortest_path(source, destination, unit_weights, edge_mask)
+            shortest_paths.append((path if path else None, length))
         if shortest_paths:
             min_index, min_weight_path = min(enumerate(shortest_paths), key=lambda x: x[1][1])
             min_path, min_weight = min_weight_path
@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 
 from src.PhysicalTopology import PhysicalTopology
 from src.VirtualTopology import VirtualTopology
-from src.ControlPlane import ControlPlaneForRSA
+from src.ControlPlaneForRSA import ControlPlaneForRSA
 from src.TrafficGenerator import TrafficGenerator
 
 
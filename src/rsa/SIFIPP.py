@@ -6,6 +6,7 @@ from src.Flow import Flow
 from src.Slot import Slot
 from src.PCycle import PCycle
 from src.ProtectingLightPath import ProtectingLightPath
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 
 class SIFIPPBFS(RSA):
@@ -41,37 +42,14 @@ class SIFIPPBFS(RSA):
 
     def has_contiguous(self, bitmap, demand):
 
-        cnt = 0
-        for i in range(self.pt.get_num_slots()):
-            if bitmap & (1 << i):
-                cnt += 1
-                if cnt >= demand:
-                    return True
-            else:
-                cnt = 0
-        return False
+        return FreeBlockIndex.first_fit_in_mask(bitmap & self.full_bitmap, demand) >= 0
 
     def bitmap_to_slots(self, bitmap, demand):
 
-        cnt = 0
-        start = 0
-
-        for i in range(self.pt.get_num_slots()):
-
-            if bitmap & (1 << i):
-
-                if cnt == 0:
-                    start = i
-
-                cnt += 1
-
-                if cnt >= demand:
-                    return [Slot(0, j) for j in range(start, start + demand)]
-
-            else:
-                cnt = 0
-
-        return None
+        start = FreeBlockIndex.first_fit_in_mask(bitmap & self.full_bitmap, demand)
+        if start < 0:
+            return None
+        return [Slot(0, j) for j in range(start, start + demand)]
 
 
     def get_path_bitmap(self, path):
@@ -79,10 +57,7 @@ class SIFIPPBFS(RSA):
         bitmap = self.full_bitmap
 
         for i in range(len(path) - 1):
-            edge_bitmap = self.spectrum_to_bitmap(
-                self.pt.get_spectrum(path[i], path[i + 1])
-            )
-            bitmap &= edge_bitmap
+            bitmap &= self.pt.get_free_mask(self.pt.get_link_id(path[i], path[i + 1]), 0)
 
         return bitmap
 
@@ -108,9 +83,7 @@ class SIFIPPBFS(RSA):
         def get_edge_bitmap(u, v):
             key = (u, v)
             if key not in edge_bitmap_cache:
-                edge_bitmap_cache[key] = self.spectrum_to_bitmap(
-                    self.pt.get_spectrum(u, v)
-                )
+                edge_bitmap_cache[key] = self.pt.get_free_mask(get_link_id(u, v), 0)
             return edge_bitmap_cache[key]
 
         def get_link_id(u, v):
@@ -364,13 +337,6 @@ class SIFIPPBFS(RSA):
                 self.cp.block_flow(flow.get_id())
                 return
 
-            for edge in wp_links:
-                self.pt.reserve_slots(
-                    self.pt.get_src_link(edge),
-                    self.pt.get_dst_link(edge),
-                    wp_slots
-                )
-
             reused.add_protected_lightpath(
                 ProtectingLightPath(
                     lp_id,
@@ -407,19 +373,12 @@ class SIFIPPBFS(RSA):
             self.cp.block_flow(flow.get_id())
             return
 
-        for edge in wp_links:
-            self.pt.reserve_slots(
-                self.pt.get_src_link(edge),
-                self.pt.get_dst_link(edge),
-                wp_slots
-            )
-
-        for edge in bp_links:
-            self.pt.reserve_slots(
-                self.pt.get_src_link(edge),
-                self.pt.get_dst_link(edge),
-                bp_slots
-            )
+        if not self.pt.reserve_path(bp_links, bp_slots):
+            # the backup path crosses the working one on the same slots, neither is kept
+            self.vt.remove_light_path(lp_id)
+            self.vt.get_p_cycles().remove(pcycle)
+            self.cp.block_flow(flow.get_id())
+            return
 
         pcycle.add_protected_lightpath(
             ProtectingLightPath(
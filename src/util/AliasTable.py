@@ -0,0 +1,42 @@
+from typing import List
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker's alias method (Vose's construction) sampling index i with probability weights[i] / sum(weights)
+    in O(1) from one uniform double: u * n picks a column and its fractional part chooses between the
+    column and its alias.
+    """
+
+    def __init__(self, weights: List[float]):
+        w = np.asarray(weights, dtype=np.float64)
+        assert w.ndim == 1 and len(w) > 0, "alias table needs at least one weight"
+        assert np.all(w >= 0) and w.sum() > 0, "weights must be non-negative and not all zero"
+        n = len(w)
+        scaled = w * (n / w.sum())
+        self.prob = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # what is left is 1 up to rounding and keeps prob 1
+        self.size = n
+
+    def sample(self, u: float) -> int:
+        x = u * self.size
+        # u * size may round up to size for u just below 1
+        i = min(int(x), self.size - 1)
+        return i if x - i < self.prob[i] else int(self.alias[i])
+
+    def sample_block(self, u: np.ndarray) -> np.ndarray:
+        """Indices drawn from an array of uniform doubles in [0, 1)"""
+        x = u * self.size
+        i = np.minimum(x.astype(np.int64), self.size - 1)
+        return np.where(x - i < self.prob[i], i, self.alias[i])
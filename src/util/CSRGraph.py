@@ -0,0 +1,433 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import networkx as nx
+import numpy as np
+
+
+class CSRGraph:
+    """
+    Compressed sparse row copy of the undirected physical topology, built once at load time.
+
+    Node n has its neighbours in indices[indptr[n]:indptr[n + 1]], edge_of giving the undirected edge
+    of each entry; edge_ids, edge_weights and edge_distances are indexed by that edge. Nodes are
+    numbered by their position in the networkx graph and neighbours keep its adjacency order, edges
+    its edges() order. The searches take an optional edge_mask (one bool per edge) in place of building
+    a filtered graph, and break ties as the networkx function they replace does on a graph whose
+    neighbours come in the same order (see edge_ordered() and reordered()).
+    """
+
+    # arrays written to and read back from a TopologyCache
+    ARRAYS = ("nodes", "edge_src", "edge_dst", "edge_ids", "edge_weights", "edge_distances",
+              "indptr", "indices", "edge_of")
+
+    def __init__(self, graph: nx.Graph = None):
+        # weight name ("hops" for None) -> (k, pair offsets, path offsets, path nodes), see build_path_table()
+        # shared with the edge_ordered() view, the graph the tables are built on and looked up in
+        self.path_tables: Dict[str, Tuple[int, List[int], List[int], List[int]]] = {}
+        self.edge_view: Optional["CSRGraph"] = None
+        if graph is None:
+            return
+        nodes = list(graph.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        edges = list(graph.edges(data=True))
+        edge_index = {}
+        for e, (u, v, _) in enumerate(edges):
+            edge_index[(u, v)] = e
+            edge_index[(v, u)] = e
+
+        indptr = [0]
+        indices = []
+        edge_of = []
+        for node in nodes:
+            for neighbour in graph.adj[node]:
+                indices.append(node_index[neighbour])
+                edge_of.append(edge_index[(node, neighbour)])
+            indptr.append(len(indices))
+        self.set_arrays({
+            "nodes": np.array(nodes, dtype=np.int64),
+            "edge_src": np.array([u for u, _, _ in edges], dtype=np.int64),
+            "edge_dst": np.array([v for _, v, _ in edges], dtype=np.int64),
+            "edge_ids": np.array([data["id"] for _, _, data in edges], dtype=np.int64),
+            "edge_weights": np.array([data.get("weight", 1.0) for _, _, data in edges], dtype=np.float64),
+            "edge_distances": np.array([data.get("distance", 0) for _, _, data in edges], dtype=np.int64),
+            "indptr": np.array(indptr, dtype=np.int64),
+            "indices": np.array(indices, dtype=np.int64),
+            "edge_of": np.array(edge_of, dtype=np.int64),
+        })
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CSRGraph":
+        """Rebuilds the graph from get_arrays() output, e.g. memory-mapped by a TopologyCache"""
+        csr = cls()
+        csr.set_arrays(arrays)
+        for weight in ("hops", "weight"):
+            if "paths_" + weight + "_nodes" in arrays:
+                csr.path_tables[weight] = (int(arrays["paths_" + weight + "_k"][0]),
+                                           arrays["paths_" + weight + "_pairs"].tolist(),
+                                           arrays["paths_" + weight + "_ptr"].tolist(),
+                                           arrays["paths_" + weight + "_nodes"].tolist())
+        return csr
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]) -> None:
+        for name in CSRGraph.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.nodes: List[int] = arrays["nodes"].tolist()
+        self.node_index: Dict[int, int] = {node: i for i, node in enumerate(self.nodes)}
+        # (src, dst) and (dst, src) -> edge
+        self.edge_index: Dict[Tuple[int, int], int] = {}
+        for e, (u, v) in enumerate(zip(arrays["edge_src"].tolist(), arrays["edge_dst"].tolist())):
+            self.edge_index[(u, v)] = e
+            self.edge_index[(v, u)] = e
+        # plain list copies for the searches, numpy scalar access being slow in Python loops
+        self.ptr = arrays["indptr"].tolist()
+        self.adj = arrays["indices"].tolist()
+        self.adj_edge = arrays["edge_of"].tolist()
+
+    def reordered(self, edge_rank: Sequence[int]) -> "CSRGraph":
+        """
+        Copy whose neighbours come by increasing edge_rank (one value per edge), as in a networkx graph
+        built by adding the edges in that order
+        """
+        indices, edge_of = [], []
+        for node in range(len(self.nodes)):
+            entries = sorted(zip(self.adj_edge[self.ptr[node]:self.ptr[node + 1]],
+                                 self.adj[self.ptr[node]:self.ptr[node + 1]]), key=lambda entry: edge_rank[entry[0]])
+            indices.extend(neighbour for _, neighbour in entries)
+            edge_of.extend(e for e, _ in entries)
+        arrays = {name: np.asarray(getattr(self, name)) for name in CSRGraph.ARRAYS}
+        arrays["indices"] = np.array(indices, dtype=np.int64)
+        arrays["edge_of"] = np.array(edge_of, dtype=np.int64)
+        csr = CSRGraph()
+        csr.set_arrays(arrays)
+        return csr
+
+    def edge_ordered(self) -> "CSRGraph":
+        """
+        View whose neighbours follow the edges() order, which is what networkx gives copy(),
+        get_weighted_graph() and the graphs the RSA modules rebuild edge by edge
+        """
+        if self.edge_view is None:
+            self.edge_view = self.reordered(range(self.get_num_edges()))
+            self.edge_view.edge_view = self.edge_view
+            self.edge_view.path_tables = self.path_tables
+        return self.edge_view
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: np.asarray(getattr(self, name)) for name in CSRGraph.ARRAYS}
+        for weight, (k, pairs, ptr, nodes) in self.path_tables.items():
+            arrays["paths_" + weight + "_k"] = np.array([k], dtype=np.int64)
+            arrays["paths_" + weight + "_pairs"] = np.array(pairs, dtype=np.int64)
+            arrays["paths_" + weight + "_ptr"] = np.array(ptr, dtype=np.int64)
+            arrays["paths_" + weight + "_nodes"] = np.array(nodes, dtype=np.int64)
+        return arrays
+
+    def build_path_table(self, k: int, weight=None) -> None:
+        """
+        Precomputes the k shortest paths of every ordered node pair for `weight` (None or "weight") on the
+        edge_ordered() view. Paths of pair (i, j) are path_ids pairs[i * n + j] .. pairs[i * n + j + 1] - 1,
+        path p having the node indices nodes[ptr[p]:ptr[p + 1]].
+        """
+        if self.edge_ordered() is not self:
+            return self.edge_ordered().build_path_table(k, weight)
+        n = len(self.nodes)
+        pairs, ptr, nodes = [0], [0], []
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    for path in self.k_shortest_paths(self.nodes[i], self.nodes[j], k, weight):
+                        nodes.extend(self.node_index[node] for node in path)
+                        ptr.append(len(nodes))
+                pairs.append(len(ptr) - 1)
+        self.path_tables["hops" if weight is None else weight] = (k, pairs, ptr, nodes)
+
+    def get_num_nodes(self) -> int:
+        return len(self.nodes)
+
+    def get_num_edges(self) -> int:
+        return len(self.edge_ids)
+
+    def get_edge(self, src: int, dst: int) -> int:
+        """Index of the edge between `src` and `dst`, -1 if there is none"""
+        return self.edge_index.get((src, dst), -1)
+
+    def edge_mask_from_links(self, allowed) -> np.ndarray:
+        """Edge mask keeping the edges whose link id is in `allowed`"""
+        return np.isin(self.edge_ids, list(allowed))
+
+    def path_links(self, path: List[int]) -> List[int]:
+        return [int(self.edge_ids[self.edge_index[(path[i], path[i + 1])]]) for i in range(len(path) - 1)]
+
+    def path_weight(self, path: List[int], weight: str = "weight") -> float:
+        values = self.weight_values(weight)
+        if values is None:
+            return float(len(path) - 1)
+        return float(sum(values[self.edge_index[(path[i], path[i + 1])]] for i in range(len(path) - 1)))
+
+    def weight_values(self, weight) -> Optional[List[float]]:
+        """Per edge weights for `weight`: None (hops), "weight", "distance" or a sequence of one value per edge"""
+        if weight is None:
+            return None
+        if weight == "weight":
+            return self.edge_weights.tolist()
+        if weight == "distance":
+            return self.edge_distances.tolist()
+        return list(weight)
+
+    def bfs(self, source: int, target: int, edge_mask: Sequence[bool] = None) -> List[int]:
+        """Fewest hops path from `source` to `target` as a node list, [] if there is none"""
+        if source not in self.node_index or target not in self.node_index:
+            return []
+        src, dst = self.node_index[source], self.node_index[target]
+        ptr, adj, adj_edge = self.ptr, self.adj, self.adj_edge
+        parent = {src: -1}
+        queue = deque([src])
+        while queue:
+            node = queue.popleft()
+            if node == dst:
+                break
+            for pos in range(ptr[node], ptr[node + 1]):
+                neighbour = adj[pos]
+                if neighbour in parent or (edge_mask is not None and not edge_mask[adj_edge[pos]]):
+                    continue
+                parent[neighbour] = node
+                queue.append(neighbour)
+        return self.build_path(parent, dst)
+
+    def dijkstra(self, source: int, target: int, weight="weight",
+                 edge_mask: Sequence[bool] = None) -> Tuple[float, List[int]]:
+        """Lightest path from `source` to `target`, returned as (length, node list), (inf, []) if there is none"""
+        if source not in self.node_index or target not in self.node_index:
+            return float("inf"), []
+        return self.search(self.node_index[source], self.node_index[target], self.weight_values(weight), edge_mask)
+
+    def shortest_path(self, source: int, target: int, weight=None,
+                      edge_mask: Sequence[bool] = None) -> Tuple[float, List[int]]:
+        """
+        Path networkx.shortest_path() returns, searched from both ends (breadth first for hops, Dijkstra
+        otherwise) so that equal-cost paths are broken the same way; (inf, []) if there is none
+        """
+        if source not in self.node_index or target not in self.node_index:
+            return float("inf"), []
+        return self.bidirectional(self.node_index[source], self.node_index[target], self.weight_values(weight),
+                                  edge_mask)
+
+    def neighbours(self, node: int, edge_mask: Sequence[bool] = None, banned_edges: Set[int] = None,
+                   banned_nodes: Set[int] = None) -> List[int]:
+        """Neighbours of `node` (node indices) in adjacency order, less the masked and banned ones"""
+        ptr, adj, adj_edge = self.ptr, self.adj, self.adj_edge
+        return [adj[pos] for pos in range(ptr[node], ptr[node + 1])
+                if (edge_mask is None or edge_mask[adj_edge[pos]])
+                and not (banned_edges and adj_edge[pos] in banned_edges)
+                and not (banned_nodes and adj[pos] in banned_nodes)]
+
+    def bidirectional(self, src: int, dst: int, weights: Optional[List[float]], edge_mask: Sequence[bool] = None,
+                      banned_edges: Set[int] = None, banned_nodes: Set[int] = None) -> Tuple[float, List[int]]:
+        """
+        Shortest path between node indices as networkx's bidirectional searches find it, in hops when
+        `weights` is None
+        """
+        if banned_nodes and (src in banned_nodes or dst in banned_nodes):
+            return float("inf"), []
+        if src == dst:
+            return 0.0, [self.nodes[src]]
+        if weights is None:
+            return self.bidirectional_bfs(src, dst, edge_mask, banned_edges, banned_nodes)
+        return self.bidirectional_dijkstra(src, dst, weights, edge_mask, banned_edges, banned_nodes)
+
+    def bidirectional_bfs(self, src: int, dst: int, edge_mask: Sequence[bool] = None, banned_edges: Set[int] = None,
+                          banned_nodes: Set[int] = None) -> Tuple[float, List[int]]:
+        """Breadth first from both ends, expanding the smaller fringe a level at a time"""
+        pred = {src: -1}
+        succ = {dst: -1}
+        forward_fringe = [src]
+        reverse_fringe = [dst]
+        while forward_fringe and reverse_fringe:
+            if len(forward_fringe) <= len(reverse_fringe):
+                this_level, forward_fringe = forward_fringe, []
+                for node in this_level:
+                    for neighbour in self.neighbours(node, edge_mask, banned_edges, banned_nodes):
+                        if neighbour not in pred:
+                            forward_fringe.append(neighbour)
+                            pred[neighbour] = node
+                        if neighbour in succ:
+                            path = self.build_path(pred, neighbour) + self.build_path(succ, neighbour)[::-1][1:]
+                            return float(len(path) - 1), path
+            else:
+                this_level, reverse_fringe = reverse_fringe, []
+                for node in this_level:
+                    for neighbour in self.neighbours(node, edge_mask, banned_edges, banned_nodes):
+                        if neighbour not in succ:
+                            succ[neighbour] = node
+                            reverse_fringe.append(neighbour)
+                        if neighbour in pred:
+                            path = self.build_path(pred, neighbour) + self.build_path(succ, neighbour)[::-1][1:]
+                            return float(len(path) - 1), path
+        return float("inf"), []
+
+    def bidirectional_dijkstra(self, src: int, dst: int, weights: List[float], edge_mask: Sequence[bool] = None,
+                               banned_edges: Set[int] = None, banned_nodes: Set[int] = None) -> Tuple[float, List[int]]:
+        """Dijkstra from both ends, alternating one pop each, stopping at the first node settled from both"""
+        ptr, adj, adj_edge = self.ptr, self.adj, self.adj_edge
+        dists = [{}, {}]
+        parents = [{src: -1}, {dst: -1}]
+        seen = [{src: 0}, {dst: 0}]
+        fringe = [[(0, 0, src)], [(0, 1, dst)]]
+        count = 2
+        final_dist, final_path = float("inf"), []
+        direction = 1
+        while fringe[0] and fringe[1]:
+            direction = 1 - direction
+            d, _, node = heapq.heappop(fringe[direction])
+            if node in dists[direction]:
+                continue
+            dists[direction][node] = d
+            if node in dists[1 - direction]:
+                return final_dist, final_path
+            for pos in range(ptr[node], ptr[node + 1]):
+                neighbour, e = adj[pos], adj_edge[pos]
+                if (edge_mask is not None and not edge_mask[e]) or (banned_edges and e in banned_edges) \
+                        or (banned_nodes and neighbour in banned_nodes) or neighbour in dists[direction]:
+                    continue
+                length = d + weights[e]
+                if neighbour not in seen[direction] or length < seen[direction][neighbour]:
+                    seen[direction][neighbour] = length
+                    heapq.heappush(fringe[direction], (length, count, neighbour))
+                    count += 1
+                    parents[direction][neighbour] = node
+                    if neighbour in seen[0] and neighbour in seen[1]:
+                        total = seen[0][neighbour] + seen[1][neighbour]
+                        if not final_path or final_dist > total:
+                            final_dist = total
+                            final_path = self.build_path(parents[0], neighbour) + \
+                                self.build_path(parents[1], neighbour)[::-1][1:]
+        return float("inf"), []
+
+    def search(self, src: int, dst: int, weights: Optional[List[float]], edge_mask: Sequence[bool] = None,
+               banned_edges: Set[int] = None, banned_nodes: Set[int] = None) -> Tuple[float, List[int]]:
+        """Dijkstra between node indices, hop count when `weights` is None"""
+        ptr, adj, adj_edge = self.ptr, self.adj, self.adj_edge
+        dist = {src: 0.0}
+        parent = {src: -1}
+        done = set()
+        heap = [(0.0, 0, src)]
+        count = 1
+        while heap:
+            d, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            if node == dst:
+                return d, self.build_path(parent, dst)
+            done.add(node)
+            for pos in range(ptr[node], ptr[node + 1]):
+                neighbour, e = adj[pos], adj_edge[pos]
+                if neighbour in done or (edge_mask is not None and not edge_mask[e]):
+                    continue
+                if (banned_edges and e in banned_edges) or (banned_nodes and neighbour in banned_nodes):
+                    continue
+                nd = d + (1.0 if weights is None else weights[e])
+                if nd < dist.get(neighbour, float("inf")):
+                    dist[neighbour] = nd
+                    parent[neighbour] = node
+                    heapq.heappush(heap, (nd, count, neighbour))
+                    count += 1
+        return float("inf"), []
+
+    def build_path(self, parent: Dict[int, int], dst: int) -> List[int]:
+        if dst not in parent:
+            return []
+        path = []
+        node = dst
+        while node != -1:
+            path.append(self.nodes[node])
+            node = parent[node]
+        path.reverse()
+        return path
+
+    def k_shortest_paths(self, source: int, target: int, k: int, weight=None,
+                         edge_mask: Sequence[bool] = None) -> List[List[int]]:
+        """
+        Yen's k shortest loopless paths, lightest first, as node lists: the paths networkx.shortest_simple_paths()
+        yields, equal-cost ones included, its spur paths being searched from both ends in the same way
+        """
+        if source not in self.node_index or target not in self.node_index or k <= 0:
+            return []
+        table = self.path_tables.get("hops" if weight is None else weight) if self.edge_view is self else None
+        if table is not None and edge_mask is None and k <= table[0]:
+            _, pairs, ptr, nodes = table
+            pair = self.node_index[source] * len(self.nodes) + self.node_index[target]
+            return [[self.nodes[node] for node in nodes[ptr[p]:ptr[p + 1]]]
+                    for p in range(pairs[pair], min(pairs[pair + 1], pairs[pair] + k))]
+        weights = self.weight_values(weight)
+        length, first = self.bidirectional(self.node_index[source], self.node_index[target], weights, edge_mask)
+        if not first:
+            return []
+        paths = [[self.node_index[node] for node in first]]
+        seen = {tuple(paths[0])}
+        candidates = []
+        count = 0
+        while len(paths) < k:
+            last = paths[-1]
+            for i in range(len(last) - 1):
+                root = last[:i + 1]
+                banned_edges = set()
+                for path in paths:
+                    if path[:i + 1] == root and len(path) > i + 1:
+                        banned_edges.add(self.edge_index[(self.nodes[path[i]], self.nodes[path[i + 1]])])
+                banned_nodes = set(root[:-1])
+                spur_length, spur = self.bidirectional(root[-1], paths[0][-1], weights, edge_mask, banned_edges,
+                                                       banned_nodes)
+                if not spur:
+                    continue
+                candidate = root[:-1] + [self.node_index[node] for node in spur]
+                if tuple(candidate) in seen:
+                    continue
+                seen.add(tuple(candidate))
+                root_length = sum(1.0 if weights is None else weights[self.edge_index[(self.nodes[candidate[j]], self.nodes[candidate[j + 1]])]]
+                                  for j in range(i))
+                heapq.heappush(candidates, (root_length + spur_length, count, candidate))
+                count += 1
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[2])
+        return [[self.nodes[node] for node in path] for path in paths]
+
+    def simple_paths(self, source: int, target: int, edge_mask: Sequence[bool] = None) -> List[List[int]]:
+        """Every loopless path from `source` to `target` using only the edges allowed by `edge_mask`"""
+        if source not in self.node_index or target not in self.node_index or source == target:
+            return []
+        src, dst = self.node_index[source], self.node_index[target]
+        ptr, adj, adj_edge = self.ptr, self.adj, self.adj_edge
+        paths = []
+        path = [src]
+        on_path = {src}
+        stack = [iter(range(ptr[src], ptr[src + 1]))]
+        while stack:
+            pos = next(stack[-1], None)
+            if pos is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            neighbour = adj[pos]
+            if neighbour in on_path or (edge_mask is not None and not edge_mask[adj_edge[pos]]):
+                continue
+            if neighbour == dst:
+                paths.append([self.nodes[node] for node in path] + [target])
+                continue
+            path.append(neighbour)
+            on_path.add(neighbour)
+            stack.append(iter(range(ptr[neighbour], ptr[neighbour + 1])))
+        return paths
+
+    def to_networkx(self, edge_mask: Sequence[bool] = None) -> nx.Graph:
+        """networkx view of the graph (or of the edges allowed by `edge_mask`), built on demand"""
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        seen = set()
+        for (u, v), e in self.edge_index.items():
+            if e in seen or (edge_mask is not None and not edge_mask[e]):
+                continue
+            seen.add(e)
+            graph.add_edge(u, v, id=int(self.edge_ids[e]), weight=float(self.edge_weights[e]),
+                           distance=int(self.edge_distances[e]))
+        return graph
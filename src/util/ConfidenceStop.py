@@ -0,0 +1,67 @@
+import math
+from typing import List, Tuple
+
+
+class ConfidenceStop:
+    """
+    Run-until-confidence stopping rule on batch means of the blocking probability (and optionally of
+    the bandwidth blocking ratio).
+
+    The counted arrivals are cut into batches of `batch_size`. Once `min_batches` batches are complete,
+    the run may stop as soon as the 95% confidence half-width of the mean of the batch means is at most
+    `precision` times that mean, for every watched ratio. A ratio that was zero in every batch counts as
+    precise.
+    """
+
+    # Student t quantiles 0.975 for 1..30 degrees of freedom, the normal one above
+    T_975 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+             2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+             2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+    def __init__(self, precision: float, batch_size: int = 1000, min_batches: int = 10, use_bbr: bool = False):
+        assert precision > 0, "precision must be positive"
+        assert batch_size > 0 and min_batches > 1, "invalid batch configuration"
+        self.precision = precision
+        self.batch_size = batch_size
+        self.min_batches = min_batches
+        self.use_bbr = use_bbr
+        self.bp_batches: List[float] = []
+        self.bbr_batches: List[float] = []
+        # cumulative (arrivals, blocked, required bandwidth, blocked bandwidth) at the end of the last batch
+        self.batch_start = [0, 0, 0, 0]
+        self.stopped = False
+
+    @staticmethod
+    def t_975(df: int) -> float:
+        return ConfidenceStop.T_975[df - 1] if df <= len(ConfidenceStop.T_975) else 1.96
+
+    @staticmethod
+    def mean_half_width(batches: List[float]) -> Tuple[float, float]:
+        n = len(batches)
+        mean = sum(batches) / n
+        variance = sum((x - mean) ** 2 for x in batches) / (n - 1)
+        return mean, ConfidenceStop.t_975(n - 1) * math.sqrt(variance / n)
+
+    def is_precise(self, batches: List[float]) -> bool:
+        mean, half_width = ConfidenceStop.mean_half_width(batches)
+        return half_width <= self.precision * mean
+
+    def update(self, arrivals: int, blocked: int, required_bandwidth: int, blocked_bandwidth: int) -> bool:
+        """Takes the cumulative counters after an arrival, True once the run can stop"""
+        start = self.batch_start
+        if arrivals - start[0] < self.batch_size:
+            return False
+        self.bp_batches.append((blocked - start[1]) / (arrivals - start[0]))
+        required = required_bandwidth - start[2]
+        self.bbr_batches.append((blocked_bandwidth - start[3]) / required if required > 0 else 0.0)
+        self.batch_start = [arrivals, blocked, required_bandwidth, blocked_bandwidth]
+        if len(self.bp_batches) >= self.min_batches:
+            self.stopped = self.is_precise(self.bp_batches) and (not self.use_bbr or self.is_precise(self.bbr_batches))
+        return self.stopped
+
+    def relative_half_width(self) -> float:
+        """Half-width of the blocking probability over its mean, nan before two batches or with no blocking"""
+        if len(self.bp_batches) < 2:
+            return float('nan')
+        mean, half_width = ConfidenceStop.mean_half_width(self.bp_batches)
+        return half_width / mean if mean > 0 else float('nan')
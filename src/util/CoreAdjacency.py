@@ -0,0 +1,56 @@
+from typing import List
+import numpy as np
+
+
+class CoreAdjacency:
+    """
+    Core adjacency matrices of multi-core fibres, entry [i][j] = 1 when core i and core j are neighbours.
+
+    The layout is given by the core-adjacency attribute of the physical topology: "ring", "hex"
+    (a centre core 0 surrounded by a ring of six) or an explicit list of pairs such as "0-1 0-2 1-2".
+    """
+
+    @staticmethod
+    def ring(cores: int) -> np.ndarray:
+        adjacency = np.zeros((cores, cores), dtype=np.uint8)
+        if cores > 1:
+            for core in range(cores):
+                adjacency[core, (core + 1) % cores] = 1
+                adjacency[(core + 1) % cores, core] = 1
+        return adjacency
+
+    @staticmethod
+    def hexagonal(cores: int) -> np.ndarray:
+        if cores != 7:
+            raise ValueError("Hexagonal core layout needs 7 cores, got " + str(cores))
+        adjacency = np.zeros((cores, cores), dtype=np.uint8)
+        for core in range(1, cores):
+            neighbour = core % (cores - 1) + 1
+            adjacency[0, core] = adjacency[core, 0] = 1
+            adjacency[core, neighbour] = adjacency[neighbour, core] = 1
+        return adjacency
+
+    @staticmethod
+    def from_pairs(cores: int, spec: str) -> np.ndarray:
+        adjacency = np.zeros((cores, cores), dtype=np.uint8)
+        for pair in spec.replace(",", " ").split():
+            a, b = (int(core) for core in pair.split("-"))
+            if not (0 <= a < cores and 0 <= b < cores) or a == b:
+                raise ValueError("Invalid core pair " + pair + " in core-adjacency")
+            adjacency[a, b] = adjacency[b, a] = 1
+        return adjacency
+
+    @staticmethod
+    def parse(cores: int, spec: str = None) -> np.ndarray:
+        """Builds the matrix for `spec`; without one, 7-core fibres are hexagonal and the others a ring"""
+        if spec is None:
+            spec = "hex" if cores == 7 else "ring"
+        if spec == "ring":
+            return CoreAdjacency.ring(cores)
+        if spec == "hex":
+            return CoreAdjacency.hexagonal(cores)
+        return CoreAdjacency.from_pairs(cores, spec)
+
+    @staticmethod
+    def neighbours(adjacency: np.ndarray) -> List[List[int]]:
+        return [np.flatnonzero(row).tolist() for row in adjacency]
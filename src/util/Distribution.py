@@ -1,25 +1,53 @@
 import math
+import numpy as np
 
 from src.util.JavaRandom import Random
 
 
 class Distribution(Random):
+    # streams (seq_num) per replication beyond the seeds table, and the number of values between them
+    STREAMS = 16
+    SPACING = 1 << 31
+
     def __init__(self, seq_num=None, seed_num=None, seed=None):
         super().__init__()
         # self.seed(seed)
-        if not (1 <= seq_num <= 4) or not (1 <= seed_num <= 25):
-            raise ValueError("seq_num must be between 1 and 4 and seed_num must be between 1 and 25")
+        if not (1 <= seq_num <= Distribution.STREAMS) or seed_num < 1:
+            raise ValueError(f"seq_num must be between 1 and {Distribution.STREAMS} and seed_num must be positive")
 
         multiplier = 25214903917
-        seed = self.seeds[(seq_num - 1) * 25 + (seed_num - 1)]
+        seed = Distribution.start_state(seq_num, seed_num)
         seed = seed ^ multiplier
         super().__init__()
         self.set_seed(seed)
 
+    @staticmethod
+    def start_state(seq_num, seed_num):
+        """
+        First state of stream `seq_num` of replication `seed_num`. Streams 1-4 of replications 1-25 keep
+        their entry of the seeds table, 1.000.000 values apart from the start of the sequence. The other
+        pairs start SPACING values apart after the table, reached by jumping ahead from state 0.
+        """
+        if seq_num <= 4 and seed_num <= 25:
+            return Distribution.seeds[(seq_num - 1) * 25 + (seed_num - 1)]
+        offset = Distribution.SPACING * (1 + (seed_num - 1) * Distribution.STREAMS + (seq_num - 1))
+        if offset + Distribution.SPACING > Random.MASK + 1:
+            raise ValueError(f"seed_num {seed_num} exceeds the period of the generator")
+        random = Random(0)
+        random.set_state((0, None))
+        random.jump(offset)
+        return random.get_state()[0]
+
     def next_exponential(self, b):
         randx = self.next_double()
         return -b * math.log(randx)
 
+    def next_exponential_block(self, n, b):
+        """Next `n` values of next_exponential(b), b being a number or an array of n means"""
+        # math.log, not np.log, whose last bit differs for some inputs
+        logs = np.fromiter(map(math.log, self.next_double_block(n).tolist()), dtype=np.float64, count=n)
+        return -np.asarray(b, dtype=np.float64) * logs
+
     def next_double_in_the_interval(self, min, max):
         rand_val = 1
         return (max - min) * (rand_val - 0) / (0.999999 - 0) + min
@@ -0,0 +1,223 @@
+from heapq import heappop, heappush
+from typing import Dict, List, Tuple
+
+
+class FreeBlockIndex:
+    """
+    Maximal free intervals of one core of one link, kept up to date on reserve and release.
+
+    Two segment trees over `size` leaves answer the queries in O(log slots):
+    `tree` is a max-tree over positions, leaf i holding the length of the block starting at slot i
+    (0 if none), for first-fit and for finding the blocks next to a slot; `size_tree` is a min-tree
+    over lengths, leaf n holding the lowest start of a block of n slots (`slots` if none), for
+    best-fit and exact-fit. The starts of the blocks of each length are kept in a heap, entries of
+    removed blocks being dropped when they come to its top.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.size = 1
+        while self.size <= slots:
+            self.size *= 2
+        self.tree = [0] * (2 * self.size)
+        self.size_tree = [slots] * (2 * self.size)
+        self.lengths: Dict[int, int] = {}
+        self.heaps: Dict[int, List[int]] = {}
+        self.count = 0
+        self.free = 0
+        if slots:
+            self.add_block(0, slots)
+            self.free = slots
+
+    def set_start(self, start: int, length: int) -> None:
+        tree = self.tree
+        node = start + self.size
+        tree[node] = length
+        node >>= 1
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node >>= 1
+
+    def set_lowest_start(self, length: int, start: int) -> None:
+        size_tree = self.size_tree
+        node = length + self.size
+        size_tree[node] = start
+        node >>= 1
+        while node:
+            size_tree[node] = min(size_tree[2 * node], size_tree[2 * node + 1])
+            node >>= 1
+
+    def add_block(self, start: int, length: int) -> None:
+        self.lengths[start] = length
+        self.set_start(start, length)
+        self.count += 1
+        heap = self.heaps.setdefault(length, [])
+        if len(heap) > self.slots:
+            # more removed blocks than there can be blocks of this length
+            heap[:] = sorted({s for s in heap if self.lengths.get(s) == length})
+        heappush(heap, start)
+        if start < self.size_tree[length + self.size]:
+            self.set_lowest_start(length, start)
+
+    def remove_block(self, start: int) -> int:
+        length = self.lengths.pop(start)
+        self.set_start(start, 0)
+        self.count -= 1
+        if self.size_tree[length + self.size] == start:
+            heap = self.heaps[length]
+            while heap and self.lengths.get(heap[0]) != length:
+                heappop(heap)
+            self.set_lowest_start(length, heap[0] if heap else self.slots)
+        return length
+
+    def next_start(self, pos: int, demand: int = 1) -> int:
+        """Lowest start, not before `pos`, of a block of at least `demand` slots, -1 if there is none"""
+        if pos >= self.slots:
+            return -1
+        tree = self.tree
+        node = pos + self.size
+        if tree[node] >= demand:
+            return pos
+        while node > 1:
+            # a left child: its right sibling covers the slots just after it
+            if not node & 1 and tree[node + 1] >= demand:
+                node += 1
+                while node < self.size:
+                    node = 2 * node if tree[2 * node] >= demand else 2 * node + 1
+                return node - self.size
+            node >>= 1
+        return -1
+
+    def last_start(self, pos: int) -> int:
+        """Highest block start not after `pos`, -1 if there is none"""
+        tree = self.tree
+        node = pos + self.size
+        if tree[node]:
+            return pos
+        while node > 1:
+            # a right child: its left sibling covers the slots just before it
+            if node & 1 and tree[node - 1]:
+                node -= 1
+                while node < self.size:
+                    node = 2 * node + 1 if tree[2 * node + 1] else 2 * node
+                return node - self.size
+            node >>= 1
+        return -1
+
+    def reserve(self, start: int, end: int) -> None:
+        """Marks the slots [start, end) as reserved"""
+        block_start = self.last_start(start)
+        if block_start < 0 or block_start + self.lengths[block_start] <= start:
+            block_start = self.next_start(start)
+        while 0 <= block_start < end:
+            block_end = block_start + self.remove_block(block_start)
+            self.free -= min(block_end, end) - max(block_start, start)
+            if block_start < start:
+                self.add_block(block_start, start - block_start)
+            if end < block_end:
+                self.add_block(end, block_end - end)
+                break
+            block_start = self.next_start(block_end)
+
+    def release(self, start: int, end: int) -> None:
+        """Marks the slots [start, end) as free, merging with the neighbouring blocks"""
+        new_start, new_end = start, end
+        block_start = self.last_start(start)
+        if block_start < 0 or block_start + self.lengths[block_start] < start:
+            block_start = self.next_start(start)
+        while 0 <= block_start <= end:
+            block_end = block_start + self.remove_block(block_start)
+            self.free -= block_end - block_start
+            new_start = min(new_start, block_start)
+            new_end = max(new_end, block_end)
+            block_start = self.next_start(block_end)
+        self.add_block(new_start, new_end - new_start)
+        self.free += new_end - new_start
+
+    def update(self, mask: int, reserve: bool) -> None:
+        """Applies a reservation (or release) of every slot set in `mask`"""
+        for start, length in FreeBlockIndex.blocks_in_mask(mask):
+            if reserve:
+                self.reserve(start, start + length)
+            else:
+                self.release(start, start + length)
+
+    def largest(self) -> int:
+        return self.tree[1]
+
+    def stats(self) -> Tuple[int, int, int]:
+        """Returns (free slots, largest contiguous free block, number of free blocks)"""
+        return self.free, self.largest(), self.count
+
+    def blocks(self) -> List[Tuple[int, int]]:
+        """Returns the free blocks as (start, length) in spectrum order"""
+        blocks = []
+        start = self.next_start(0)
+        while start >= 0:
+            length = self.lengths[start]
+            blocks.append((start, length))
+            start = self.next_start(start + length)
+        return blocks
+
+    def first_fit(self, demand: int) -> int:
+        """Start of the lowest block of at least `demand` slots, -1 if there is none"""
+        return self.next_start(0, max(demand, 1))
+
+    def best_fit(self, demand: int) -> int:
+        """Start of the smallest block of at least `demand` slots, -1 if there is none"""
+        size_tree = self.size_tree
+        node = max(demand, 1) + self.size
+        if node >= 2 * self.size:
+            return -1
+        if size_tree[node] < self.slots:
+            return size_tree[node]
+        while node > 1:
+            if not node & 1 and size_tree[node + 1] < self.slots:
+                node += 1
+                while node < self.size:
+                    node = 2 * node if size_tree[2 * node] < self.slots else 2 * node + 1
+                return size_tree[node]
+            node >>= 1
+        return -1
+
+    def exact_fit(self, demand: int) -> int:
+        """Start of a block of exactly `demand` slots, -1 if there is none"""
+        if not 0 < demand <= self.slots:
+            return -1
+        start = self.size_tree[demand + self.size]
+        return start if start < self.slots else -1
+
+    @staticmethod
+    def fit_mask(mask: int, demand: int) -> int:
+        """Bit i of the result is set when slots i .. i + demand - 1 are all set in `mask`"""
+        if demand <= 0:
+            return mask
+        # doubling: after each step bit i covers a window of `width` slots
+        width = 1
+        while width < demand:
+            step = min(width, demand - width)
+            mask &= mask >> step
+            width += step
+        return mask
+
+    @staticmethod
+    def first_fit_in_mask(mask: int, demand: int) -> int:
+        """Start of the lowest run of `demand` set bits in `mask`, -1 if there is none"""
+        fits = FreeBlockIndex.fit_mask(mask, demand)
+        return (fits & -fits).bit_length() - 1
+
+    @staticmethod
+    def row_to_mask(row: List[bool]) -> int:
+        """Packs one core of a get_spectrum() view into a mask, bit i set when row[i] is True"""
+        return int("".join("1" if free else "0" for free in reversed(row)) or "0", 2)
+
+    @staticmethod
+    def blocks_in_mask(mask: int) -> List[Tuple[int, int]]:
+        """Splits `mask` into its runs of set bits, returned as (start, length)"""
+        blocks = []
+        pos = 0
+        for run in format(mask, "b")[::-1].split("0"):
+            if run:
+                blocks.append((pos, len(run)))
+            pos += len(run) + 1
+        return blocks
@@ -1,6 +1,8 @@
 import time
 import math
 
+import numpy as np
+
 
 class Random(object):
     """
@@ -17,6 +19,14 @@ class Random(object):
     synchronize all accesses to this class per-instance.
     """
 
+    MULTIPLIER = 0x5deece66d
+    ADDEND = 0xb
+    MASK = (1 << 48) - 1
+
+    # jump-ahead coefficients: the state k steps after s is (A[k-1] * s + C[k-1]) mod 2^48
+    _jump_a = np.array([MULTIPLIER], dtype=np.uint64)
+    _jump_c = np.array([ADDEND], dtype=np.uint64)
+
     def __init__(self, seed=None):
         """
         Create a new random number generator.
@@ -43,6 +53,22 @@ class Random(object):
     def seed(self, seed):
         self._seed = (seed ^ 0x5deece66d) & ((1 << 48) - 1)
 
+    def get_state(self):
+        """
+        Return the internal state as (seed, cached gaussian or None), for
+        set_state().
+        """
+
+        return self._seed, self.nextNextGaussian
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state(). Unlike set_seed(), the seed
+        is not scrambled.
+        """
+
+        self._seed, self.nextNextGaussian = state
+
     def next(self, bits):
         """
         Generate the next random number.
@@ -67,6 +93,81 @@ class Random(object):
 
         return retval
 
+    @classmethod
+    def jump_coefficients(cls, n):
+        """
+        Return the arrays (A, C) giving the n states following s as
+        (A * s + C) mod 2^48, built by doubling: going 1..m steps further
+        from the state m steps ahead composes the first m coefficients with
+        the m-th one.
+
+        uint64 products wrap modulo 2^64, a multiple of 2^48, so they give
+        the right 48 low bits.
+        """
+
+        while len(cls._jump_a) < n:
+            a_m = cls._jump_a[-1]
+            c_m = cls._jump_c[-1]
+            cls._jump_a = np.concatenate((cls._jump_a, cls._jump_a * a_m & cls.MASK))
+            cls._jump_c = np.concatenate((cls._jump_c, (cls._jump_a[:len(cls._jump_c)] * c_m + cls._jump_c) & cls.MASK))
+        return cls._jump_a[:n], cls._jump_c[:n]
+
+    def jump(self, k):
+        """
+        Advance the generator by `k` steps, as `k` calls to next() would, in
+        O(log k) by squaring the affine step s -> a * s + c.
+        """
+
+        a, c = self.MULTIPLIER, self.ADDEND
+        a_k, c_k = 1, 0
+        while k > 0:
+            if k & 1:
+                a_k, c_k = (a_k * a) & self.MASK, (c_k * a + c) & self.MASK
+            a, c = (a * a) & self.MASK, (c * a + c) & self.MASK
+            k >>= 1
+        self._seed = (a_k * self._seed + c_k) & self.MASK
+
+    def next_block(self, n, bits):
+        """
+        Return the next `n` values of next(`bits`) as an int64 array, the
+        generator ending in the same state as after `n` calls to next().
+        """
+
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        bits = min(max(bits, 1), 32)
+        a, c = self.jump_coefficients(n)
+        states = (a * np.uint64(self._seed) + c) & np.uint64(self.MASK)
+        self._seed = int(states[-1])
+        values = (states >> np.uint64(48 - bits)).astype(np.int64)
+        if bits == 32:
+            values[values >= (1 << 31)] -= (1 << 32)
+        return values
+
+    def next_int_block(self, n, bound):
+        """
+        Return the next `n` values of next_int(`bound`) as an int64 array.
+
+        Python ints do not overflow, so the rejection test of next_int()
+        never fires and every value takes exactly one draw, here as well.
+        """
+
+        if bound <= 0:
+            raise ValueError("Argument must be positive!")
+
+        if not (bound & (bound - 1)):
+            return (bound * self.next_block(n, 31)) >> 31
+        return self.next_block(n, 31) % bound
+
+    def next_double_block(self, n):
+        """
+        Return the next `n` values of next_double() as a float64 array.
+        """
+
+        bits = self.next_block(2 * n, 27)
+        # each double takes a 26-bit then a 27-bit draw
+        return ((bits[0::2] >> 1 << 27) + bits[1::2]) / float(1 << 53)
+
     def next_bytes(self, l):
         """
         Replace every item in `l` with a random byte.
@@ -4,6 +4,7 @@ from typing import Dict, List, Tuple
 import math
 from collections import deque
 import networkx as nx
+from src.util.FreeBlockIndex import FreeBlockIndex
 
 class ShortestPath():
     def __init__(self, pt: PhysicalTopology):
@@ -27,8 +28,8 @@ class ShortestPath():
         new_graph = nx.Graph()
         # self.get_link_remove(self.pt.get_pcycle(), demand_in_slots)
         for u, v, edge_data in remove_graph_pcycle_links.edges(data=True):
-            edge_spectrum = self.pt.get_spectrum(u, v)
-            if all(edge_spectrum[0][mid:mid + demand_in_slots]):
+            fits = FreeBlockIndex.fit_mask(self.pt.get_free_mask(edge_data["id"], 0), demand_in_slots)
+            if fits >> mid & 1:
                 new_graph.add_edge(u, v, **edge_data)
         return new_graph
     
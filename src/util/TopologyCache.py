@@ -0,0 +1,60 @@
+import hashlib
+import os
+import shutil
+from typing import Dict, Optional
+import numpy as np
+
+
+class TopologyCache:
+    """
+    Compiled physical topology stored next to the simulation XML, keyed by the hash of the file content.
+    Only used when the physical-topology element has cache="true".
+
+    The validated links, the CSR arrays and the k shortest path tables are written once as .npy files
+    in <xml name>.topo-<hash>/ and memory-mapped by the next runs, so a sweep over loads and seeds pays
+    the parse and the path precomputation only the first time.
+    """
+
+    K_PATHS = 10
+    INDEX = "arrays.txt"
+
+    def __init__(self, sim_config_file: str):
+        with open(sim_config_file, "rb") as f:
+            self.key = hashlib.sha256(f.read()).hexdigest()[:16]
+        self.directory = os.path.splitext(sim_config_file)[0] + ".topo-" + self.key
+
+    def load(self) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-maps the compiled arrays, None if this XML has not been compiled yet"""
+        index = os.path.join(self.directory, TopologyCache.INDEX)
+        if not os.path.isfile(index):
+            return None
+        with open(index) as f:
+            names = f.read().split()
+        return {name: np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r") for name in names}
+
+    @staticmethod
+    def compile(pt) -> Dict[str, np.ndarray]:
+        """Builds the path tables on the topology's CSR graph and returns everything the cache stores"""
+        csr = pt.get_csr()
+        for weight in (None, "weight"):
+            csr.build_path_table(TopologyCache.K_PATHS, weight)
+        arrays = csr.get_arrays()
+        arrays["link_ints"] = np.array([row[:4] for row in pt.link_rows], dtype=np.int64).reshape(-1, 4)
+        arrays["link_floats"] = np.array([row[4:] for row in pt.link_rows], dtype=np.float64).reshape(-1, 2)
+        return arrays
+
+    def save(self, pt) -> Dict[str, np.ndarray]:
+        """Compiles `pt` and writes it; the arrays are returned even if the directory cannot be written"""
+        arrays = TopologyCache.compile(pt)
+        tmp = self.directory + ".tmp" + str(os.getpid())
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, name + ".npy"), array)
+            # the index is written last, a directory without it is never loaded
+            with open(os.path.join(tmp, TopologyCache.INDEX), "w") as f:
+                f.write("\n".join(arrays))
+            os.replace(tmp, self.directory)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return arrays
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import shutil
+from typing import Dict, Optional
+import numpy as np
+
+
+class TrafficCache:
+    """
+    Generated traffic stored as one .npy file per column in traffic-cache/<key>/ next to the simulation XML,
+    the key hashing the traffic element, the number of calls, the load, the number of nodes and the seed.
+
+    The flows only depend on those, so every XML of a directory with the same traffic, typically one per
+    RSA being compared, replays the exact same arrivals, written once and memory-mapped afterwards. The
+    arrival column holds one more entry than the others: the time the next call would arrive.
+    """
+
+    FORMAT = 1
+    INDEX = "columns.txt"
+    # attributes of the traffic element that do not change the flows
+    IGNORED = ("streaming", "cache")
+
+    def __init__(self, sim_config_file: str):
+        self.directory = os.path.join(os.path.dirname(os.path.abspath(sim_config_file)), "traffic-cache")
+
+    @staticmethod
+    def key(traffic, num_nodes: int, seed: int) -> str:
+        attrib = {name: value for name, value in traffic.xml.attrib.items() if name not in TrafficCache.IGNORED}
+        children = [(child.tag, sorted(child.attrib.items())) for child in traffic.xml]
+        description = repr((TrafficCache.FORMAT, sorted(attrib.items()), children, traffic.calls, traffic.load,
+                            num_nodes, seed))
+        return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-maps the columns of `key`, None if that traffic has not been written yet"""
+        return TrafficCache.load_columns(os.path.join(self.directory, key))
+
+    @staticmethod
+    def load_columns(directory: str) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-maps the columns written in `directory`, None if it has no complete set of columns"""
+        index = os.path.join(directory, TrafficCache.INDEX)
+        if not os.path.isfile(index):
+            return None
+        with open(index) as f:
+            names = f.read().split()
+        return {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in names}
+
+    def save(self, key: str, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Writes the columns of `key`; they are returned even if the directory cannot be written"""
+        directory = os.path.join(self.directory, key)
+        tmp = directory + ".tmp" + str(os.getpid())
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            for name, column in columns.items():
+                np.save(os.path.join(tmp, name + ".npy"), column)
+            # the index is written last, a directory without it is never loaded
+            with open(os.path.join(tmp, TrafficCache.INDEX), "w") as f:
+                f.write("\n".join(columns))
+            os.replace(tmp, directory)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return columns
@@ -0,0 +1,75 @@
+from typing import List
+import numpy as np
+
+
+class WarmupDetector:
+    """
+    Online MSER-5 warm-up detection (White, 1997) on the blocking ratio and the spectrum utilization.
+
+    Arrivals are grouped in batches of 5 and each series keeps one mean per batch. Every `check_every`
+    batches, MSER picks the truncation point d minimizing the squared standard error of the mean of the
+    batches after d; the transient is over once that point lies in the first half of the batches seen,
+    for both series. Statistics are then counted from the current arrival, which is past the cutoff.
+    """
+
+    BATCH = 5
+
+    def __init__(self, min_batches: int = 20, check_every: int = 10):
+        self.min_batches = min_batches
+        self.check_every = check_every
+        # batch means of the blocking ratio and of the utilization seen by the arrivals
+        self.blocking: List[float] = []
+        self.utilization: List[float] = []
+        self.batch_arrivals = 0
+        self.batch_blocked = 0
+        self.batch_utilization = 0.0
+        # MSER truncation point and first counted arrival, once detected
+        self.cutoff = -1
+        self.start = -1
+
+    def running(self) -> bool:
+        return self.start < 0
+
+    def block(self) -> None:
+        self.batch_blocked += 1
+
+    def arrival(self, utilization: float) -> bool:
+        """Records an arrival seeing `utilization`, True when the batches before it passed the test"""
+        detected = False
+        if self.batch_arrivals == WarmupDetector.BATCH:
+            self.blocking.append(self.batch_blocked / WarmupDetector.BATCH)
+            self.utilization.append(self.batch_utilization / WarmupDetector.BATCH)
+            self.batch_arrivals = 0
+            self.batch_blocked = 0
+            self.batch_utilization = 0.0
+            batches = len(self.blocking)
+            if batches >= self.min_batches and batches % self.check_every == 0:
+                d = max(WarmupDetector.mser(self.blocking), WarmupDetector.mser(self.utilization))
+                if 2 * d <= batches:
+                    self.cutoff = d * WarmupDetector.BATCH
+                    detected = True
+        self.batch_arrivals += 1
+        self.batch_utilization += utilization
+        return detected
+
+    def finish(self, first_counted: int) -> None:
+        """Ends the detection, statistics being counted from arrival number `first_counted`"""
+        self.start = first_counted
+        if self.cutoff < 0:
+            # stopped by the caller before the test passed, everything before is dropped
+            self.cutoff = first_counted - 1
+
+    @staticmethod
+    def mser(means: List[float]) -> int:
+        """Number of leading batches minimizing the MSER statistic, keeping at least 5 batches"""
+        y = np.asarray(means, dtype=np.float64)
+        n = len(y)
+        if n <= WarmupDetector.BATCH:
+            return 0
+        # sums and squared sums of the batches d..n-1, for every d
+        s = np.cumsum(y[::-1])[::-1]
+        q = np.cumsum((y * y)[::-1])[::-1]
+        m = np.arange(n, 0, -1, dtype=np.float64)
+        sse = np.maximum(q - s * s / m, 0.0)
+        stat = sse[:n - WarmupDetector.BATCH] / (m[:n - WarmupDetector.BATCH] ** 2)
+        return int(np.argmin(stat))
@@ -0,0 +1,99 @@
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def write_xml(directory, module: str, calls: int, extra: str = "", attributes: Dict[str, str] = None) -> str:
+    """
+    xml/nfs.xml with the given RSA module and number of calls, `extra` inserted before </flexgridsim> and
+    attributes[tag] added to the attributes of element tag
+    """
+    with open(os.path.join(ROOT, "xml", "nfs.xml")) as f:
+        xml = f.read()
+    xml = xml.replace('module="NewRSA"', 'module="' + module + '"').replace('calls="100000"', 'calls="' + str(calls) + '"')
+    xml = xml.replace("</flexgridsim>", extra + "</flexgridsim>")
+    for tag, text in (attributes or {}).items():
+        xml = xml.replace("<" + tag + " ", "<" + tag + " " + text + " ")
+    path = os.path.join(str(directory), "sim.xml")
+    with open(path, "w") as f:
+        f.write(xml)
+    return path
+
+
+def nfs_element(tag: str, file_name: str = "nfs.xml"):
+    return ET.parse(os.path.join(ROOT, "xml", file_name)).getroot().find(tag)
+
+
+@pytest.fixture
+def pt():
+    """The NSFNet PhysicalTopology of xml/nfs.xml, 1 core of 240 slots"""
+    from src.PhysicalTopology import PhysicalTopology
+    return PhysicalTopology(nfs_element("physical-topology"), False)
+
+
+@pytest.fixture
+def simulate(tmp_path, monkeypatch):
+    """
+    Runs a simulation of xml/nfs.xml and returns (statistics, decisions, stdout), decisions being the
+    accepted (id, links, slots) and blocked ids in the order the RSA made them; with `trace`, the trace
+    is written to trace.fr
+    """
+    from src.ControlPlane import ControlPlane
+    from src.MyStatistics import MyStatistics
+    from src.Simulator import Simulator
+    from src.Tracer import Tracer
+
+    monkeypatch.chdir(tmp_path)
+    accept_flow, block_flow, finish = ControlPlane.accept_flow, ControlPlane.block_flow, MyStatistics.finish
+
+    def run(module: str, calls: int, load: float, extra: str = "", seed: int = 1, trace: bool = False,
+            attributes: Dict[str, str] = None):
+        decisions = []
+        statistics = {}
+
+        def accept(self, id, lp, *args):
+            accepted = accept_flow(self, id, lp, *args)
+            decisions.append(("A", id, tuple(lp.get_links()), tuple((s.core, s.slot) for s in lp.get_slot_list()),
+                              accepted))
+            return accepted
+
+        def block(self, id):
+            decisions.append(("B", id))
+            return block_flow(self, id)
+
+        def record(self):
+            statistics.update(arrivals=self.arrivals, departures=self.departures, sim_time=self.sim_time,
+                              accepted=self.accepted, blocked=self.blocked, text=self.fancy_statistics())
+            finish(self)
+
+        monkeypatch.setattr(ControlPlane, "accept_flow", accept)
+        monkeypatch.setattr(ControlPlane, "block_flow", block)
+        monkeypatch.setattr(MyStatistics, "finish", record)
+        monkeypatch.setattr(Tracer, "singleton_object", None)
+        if trace:
+            Tracer.get_tracer_object().set_trace_file(str(tmp_path / "trace.fr"))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            Simulator(write_xml(tmp_path, module, calls, extra, attributes), trace, False, load, seed)
+        return statistics, decisions, out.getvalue()
+
+    return run
+
+
+def digest(decisions) -> str:
+    return hashlib.sha1(repr(decisions).encode()).hexdigest()
+
+
+def stdout_digest(stdout: str) -> str:
+    """Digest of what a run prints, less the object addresses and the path of the XML"""
+    lines = [line for line in stdout.splitlines() if " object at " not in line and "Running simulation" not in line]
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()
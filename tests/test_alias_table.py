@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.util.AliasTable import AliasTable
+
+
+def mass(table: AliasTable) -> np.ndarray:
+    """Probability of every index, read back from the columns"""
+    result = np.zeros(table.size)
+    for i in range(table.size):
+        result[i] += table.prob[i]
+        result[table.alias[i]] += 1.0 - table.prob[i]
+    return result / table.size
+
+
+@pytest.mark.parametrize("weights", [[1], [1, 1], [3, 1], [0.2, 0.5, 0.3], [5, 0, 1, 0, 2.5], list(range(1, 30))])
+def test_columns_give_the_weights(weights):
+    table = AliasTable(weights)
+    assert np.allclose(mass(table), np.array(weights) / sum(weights))
+    assert all(table.prob[i] == 1.0 or table.prob[table.alias[i]] > 0 for i in range(table.size))
+
+
+def test_zero_weights_are_never_sampled():
+    table = AliasTable([0, 2, 0, 1])
+    u = np.linspace(0, 1, 10001, endpoint=False)
+    assert set(table.sample_block(u).tolist()) == {1, 3}
+
+
+def test_sample_block_matches_sample():
+    table = AliasTable([0.1, 0.6, 0.05, 0.25])
+    u = np.random.default_rng(0).random(2000)
+    u[:3] = [0.0, 0.5, np.nextafter(1.0, 0.0)]
+    assert table.sample_block(u).tolist() == [table.sample(x) for x in u.tolist()]
+    # the last column, not past it
+    assert table.sample(np.nextafter(1.0, 0.0)) in (3, table.alias[3])
+
+
+def test_frequencies_follow_the_weights():
+    table = AliasTable([1, 2, 7])
+    counts = np.bincount(table.sample_block(np.random.default_rng(1).random(100000)), minlength=3)
+    assert np.allclose(counts / counts.sum(), [0.1, 0.2, 0.7], atol=0.01)
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_invalid_weights(weights):
+    with pytest.raises(AssertionError):
+        AliasTable(weights)
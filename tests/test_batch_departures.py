@@ -0,0 +1,22 @@
+from src.ControlPlane import ControlPlane
+from conftest import stdout_digest
+
+BATCHED = '<scheduler batch-departures="true"/>'
+
+
+def test_batched_departures_change_nothing(simulate, monkeypatch):
+    batches = []
+    flows_departed = ControlPlane.flows_departed
+
+    def count(self, events):
+        batches.append(len(events))
+        flows_departed(self, events)
+
+    monkeypatch.setattr(ControlPlane, "flows_departed", count)
+    statistics, decisions, stdout = simulate("FIPPFlex", 500, 150)
+    assert batches == []
+    batched_statistics, batched_decisions, batched_stdout = simulate("FIPPFlex", 500, 150, BATCHED)
+    assert batches and max(batches) > 1
+    assert batched_statistics == statistics
+    assert batched_decisions == decisions
+    assert stdout_digest(batched_stdout) == stdout_digest(stdout)
@@ -0,0 +1,73 @@
+import glob
+import os
+
+import pytest
+
+from src.Checkpoint import Checkpoint
+from src.util.ConfidenceStop import ConfidenceStop
+
+
+def graph_files(directory):
+    files = {}
+    for path in sorted(glob.glob(os.path.join(str(directory), "*.dat"))):
+        with open(path) as f:
+            files[os.path.basename(path)] = f.read()
+        os.remove(path)
+    return files
+
+
+@pytest.mark.parametrize("streaming", ["false", "true"])
+def test_resumed_run_ends_like_an_uninterrupted_one(simulate, tmp_path, monkeypatch, streaming):
+    traffic = {"traffic": 'streaming="' + streaming + '"'}
+    statistics, decisions, _ = simulate("FIPPFlex", 500, 150, attributes=traffic)
+    graphs = graph_files(tmp_path)
+    assert graphs
+
+    saves = []
+    save = Checkpoint.save
+
+    def crash_at_third(self, events_done):
+        save(self, events_done)
+        saves.append(events_done)
+        if len(saves) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(Checkpoint, "save", crash_at_third)
+    with pytest.raises(KeyboardInterrupt):
+        simulate("FIPPFlex", 500, 150, '<checkpoint every="150"/>', attributes=traffic)
+    assert saves == [150, 300, 450]
+    assert glob.glob(str(tmp_path / "*.ckpt"))
+    graph_files(tmp_path)
+
+    resumed_statistics, resumed_decisions, stdout = simulate("FIPPFlex", 500, 150, '<checkpoint every="150"/>', attributes=traffic)
+    assert resumed_statistics == statistics
+    assert resumed_decisions == decisions[len(decisions) - len(resumed_decisions):]
+    assert 0 < len(resumed_decisions) < len(decisions)
+    assert graph_files(tmp_path) == graphs
+    assert glob.glob(str(tmp_path / "*.ckpt")) == []
+
+
+def test_listed_state_round_trips_with_its_types():
+    stopping = ConfidenceStop(0.1, 100, 2)
+    stopping.bp_batches = [0.25, 0.5]
+    stopping.batch_start = [200, 30, 4000, 600]
+    stopping.stopped = True
+    arrays = {}
+    Checkpoint.put_state(arrays, "stopping", stopping)
+    restored = ConfidenceStop(0.1, 100, 2)
+    Checkpoint.get_state(arrays, "stopping", restored)
+    assert vars(restored) == vars(stopping)
+    assert restored.stopped is True
+
+
+def test_state_that_cannot_be_saved_fails():
+    stopping = ConfidenceStop(0.1)
+    stopping.extra = 1
+    with pytest.raises(TypeError, match="extra"):
+        Checkpoint.put_state({}, "stopping", stopping)
+    stopping = ConfidenceStop(0.1)
+    stopping.bp_batches = [0.5, None]
+    with pytest.raises(TypeError, match="bp_batches"):
+        Checkpoint.put_state({}, "stopping", stopping)
+    with pytest.raises(TypeError, match="object"):
+        Checkpoint.put_state({}, "x", object())
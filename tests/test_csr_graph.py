@@ -0,0 +1,100 @@
+import itertools
+
+import networkx as nx
+import pytest
+
+from src.PhysicalTopology import PhysicalTopology
+from src.util.CSRGraph import CSRGraph
+from conftest import nfs_element
+
+
+@pytest.fixture(params=["nfs.xml", "ccl.xml"])
+def graph(request):
+    return PhysicalTopology(nfs_element("physical-topology", request.param), False).get_graph()
+
+
+@pytest.fixture
+def shuffled(graph):
+    """`graph` with its edges added in reverse, so that its adjacency order is not its edges() order"""
+    shuffled = nx.Graph()
+    shuffled.add_nodes_from(graph.nodes())
+    shuffled.add_edges_from(reversed(list(graph.edges(data=True))))
+    return shuffled
+
+
+def rebuilt(graph, links=None):
+    """The graph the RSA modules build by adding the edges of `graph` (those of `links` only) one by one"""
+    rebuilt = nx.Graph()
+    rebuilt.add_edges_from((u, v, data) for u, v, data in graph.edges(data=True)
+                           if links is None or data["id"] in links)
+    return rebuilt
+
+
+def check_k_shortest(graph, csr, k, weight):
+    for src, dst in itertools.permutations(list(graph.nodes())[:10], 2):
+        assert csr.k_shortest_paths(src, dst, k, weight) == list(
+            itertools.islice(nx.shortest_simple_paths(graph, src, dst, weight), k))
+
+
+@pytest.mark.parametrize("weight", [None, "weight"])
+def test_k_shortest_paths_match_networkx(graph, shuffled, weight):
+    check_k_shortest(graph, CSRGraph(graph), 6, weight)
+    check_k_shortest(shuffled, CSRGraph(shuffled), 6, weight)
+    check_k_shortest(rebuilt(shuffled), CSRGraph(shuffled).edge_ordered(), 6, weight)
+
+
+def test_path_tables_answer_like_the_search(shuffled):
+    csr = CSRGraph(shuffled)
+    searched = {pair: csr.edge_ordered().k_shortest_paths(*pair, 4, "weight")
+                for pair in itertools.permutations(shuffled.nodes(), 2)}
+    csr.build_path_table(4, "weight")
+    cached = CSRGraph.from_arrays(csr.get_arrays())
+    for pair, paths in searched.items():
+        assert csr.edge_ordered().k_shortest_paths(*pair, 4, "weight") == paths
+        assert cached.edge_ordered().k_shortest_paths(*pair, 3, "weight") == paths[:3]
+
+
+def test_shortest_paths_and_masks(graph):
+    csr = CSRGraph(graph)
+    links = sorted(data["id"] for _, _, data in graph.edges(data=True))
+    allowed = set(links[::2])
+    mask = csr.edge_mask_from_links(allowed)
+    masked = nx.Graph()
+    masked.add_nodes_from(graph.nodes())
+    masked.add_edges_from((u, v, data) for u, v, data in graph.edges(data=True) if data["id"] in allowed)
+    assert {frozenset(e) for e in csr.to_networkx(mask).edges()} == {frozenset(e) for e in masked.edges()}
+    for src, dst in itertools.permutations(list(graph.nodes())[:8], 2):
+        assert len(csr.bfs(src, dst)) - 1 == nx.shortest_path_length(graph, src, dst)
+        assert csr.dijkstra(src, dst)[0] == pytest.approx(nx.shortest_path_length(graph, src, dst, "weight"))
+        expected = {tuple(p) for p in nx.all_simple_paths(masked, src, dst)}
+        assert {tuple(p) for p in csr.simple_paths(src, dst, mask)} == expected
+        if not nx.has_path(masked, src, dst):
+            assert csr.bfs(src, dst, mask) == [] and csr.k_shortest_paths(src, dst, 3, None, mask) == []
+
+
+@pytest.mark.parametrize("weight", [None, "weight"])
+def test_shortest_path_breaks_ties_like_networkx(shuffled, weight):
+    csr = CSRGraph(shuffled)
+    links = sorted(data["id"] for _, _, data in shuffled.edges(data=True))
+    allowed = set(links) - set(links[::3])
+    mask = csr.edge_mask_from_links(allowed)
+    masked = rebuilt(shuffled, allowed)
+    for src, dst in itertools.permutations(shuffled.nodes(), 2):
+        assert csr.shortest_path(src, dst, weight)[1] == nx.shortest_path(shuffled, src, dst, weight)
+        if masked.has_node(src) and masked.has_node(dst) and nx.has_path(masked, src, dst):
+            expected = nx.shortest_path(masked, src, dst, weight)
+            assert csr.edge_ordered().shortest_path(src, dst, weight, mask)[1] == expected
+        else:
+            assert csr.edge_ordered().shortest_path(src, dst, weight, mask) == (float("inf"), [])
+
+
+def test_reordered_simple_paths_come_in_networkx_order(graph):
+    csr = CSRGraph(graph)
+    links = [data["id"] for _, _, data in graph.edges(data=True)][::-2]
+    rank = {link: position for position, link in enumerate(links)}
+    reordered = csr.reordered([rank.get(link, len(links)) for link in csr.edge_ids.tolist()])
+    added = nx.Graph()
+    added.add_edges_from((u, v) for link in links for u, v, data in graph.edges(data=True) if data["id"] == link)
+    for src, dst in itertools.permutations(added.nodes(), 2):
+        expected = list(nx.all_simple_paths(added, src, dst))
+        assert reordered.simple_paths(src, dst, csr.edge_mask_from_links(links)) == expected
@@ -0,0 +1,148 @@
+import random
+
+import pytest
+
+from conftest import stdout_digest
+from src.CalendarEventScheduler import CalendarEventScheduler
+from src.EventScheduler import EventScheduler
+from src.FlowDepartureEvent import FlowDepartureEvent
+
+SCHEDULERS = [EventScheduler, CalendarEventScheduler]
+
+
+def event(time: float, id: int) -> FlowDepartureEvent:
+    return FlowDepartureEvent(time, id, None)
+
+
+def drain(scheduler):
+    ids = []
+    e = scheduler.pop_event()
+    while e is not None:
+        ids.append(e.get_id())
+        e = scheduler.pop_event()
+    return ids
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_time_order_then_insertion_order(scheduler_class):
+    scheduler = scheduler_class()
+    for id, time in enumerate([3.0, 1.0, 2.0, 1.0, 0.5, 2.0]):
+        scheduler.add_event(event(time, id))
+    assert len(scheduler) == 6
+    assert scheduler.peek().get_id() == 4
+    assert drain(scheduler) == [4, 1, 3, 2, 5, 0]
+    assert scheduler.pop_event() is None and scheduler.peek() is None
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_add_events_matches_add_event(scheduler_class):
+    times = [random.Random(5).choice([0.1, 0.2, 0.3]) * k for k in range(200)]
+    one, batch = scheduler_class(), scheduler_class()
+    for id, time in enumerate(times):
+        one.add_event(event(time, id))
+    batch.add_events(event(time, id) for id, time in enumerate(times))
+    assert drain(one) == drain(batch)
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_stream_is_pulled_when_due(scheduler_class):
+    pulled = []
+
+    def groups():
+        for k in range(100):
+            pulled.append(k)
+            yield [event(float(k), 2 * k), event(k + 2.5, 2 * k + 1)]
+
+    scheduler = scheduler_class()
+    scheduler.add_stream(groups())
+    first = [scheduler.pop_event().get_id() for _ in range(3)]
+    assert first == [0, 2, 4]
+    assert len(pulled) <= 4
+    expected = sorted(range(200), key=lambda id: (id // 2 + 2.5 * (id % 2), id))
+    assert first + drain(scheduler) == expected
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_pop_until_and_clear(scheduler_class):
+    scheduler = scheduler_class()
+    scheduler.add_stream([event(float(k), k)] for k in range(10))
+    scheduler.add_event(event(2.0, 100))
+    # event 100 is queued before the stream reaches time 2
+    assert [e.get_id() for e in scheduler.pop_until(3.0)] == [0, 1, 100, 2, 3]
+    assert scheduler.peek().get_id() == 4
+    scheduler.clear()
+    assert scheduler.pop_event() is None
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_cancelled_events_are_dropped(scheduler_class):
+    scheduler = scheduler_class()
+    events = [event(float(k), k) for k in range(8)]
+    scheduler.add_events(events)
+    for k in (0, 3, 4, 7):
+        events[k].cancel()
+    assert scheduler.peek().get_id() == 1
+    assert scheduler.pop_event().get_id() == 1
+    assert [e.get_id() for e in scheduler.pop_until(5.0)] == [2, 5]
+    assert drain(scheduler) == [6]
+    assert scheduler.peek() is None
+
+
+@pytest.mark.parametrize("scheduler_class", SCHEDULERS)
+def test_restore_keeps_the_order(scheduler_class):
+    scheduler = scheduler_class()
+    for id in range(20):
+        scheduler.add_event(event(float(id % 4), id))
+    for _ in range(5):
+        scheduler.pop_event()
+    restored = scheduler_class()
+    restored.restore(scheduler.entries(), scheduler.next_seq())
+    scheduler.add_event(event(2.0, 50))
+    restored.add_event(event(2.0, 50))
+    assert drain(restored) == drain(scheduler)
+
+
+def test_calendar_matches_the_heap_under_hold_traffic():
+    # arrivals one exponential gap apart, each scheduling a departure, with bursts and far-off events that
+    # make the calendar resize, move back to an earlier day and jump over empty years
+    rng = random.Random(1)
+    heap, calendar = EventScheduler(), CalendarEventScheduler()
+    popped_heap, popped_calendar = [], []
+    now = 0.0
+    id = 0
+    for step in range(20000):
+        if step % 3 != 2:
+            times = [now + rng.expovariate(1.0)]
+            if step % 500 == 0:
+                times += [now + rng.uniform(0, 1e-3) for _ in range(100)] + [now + 1e4]
+            for time in times:
+                heap.add_event(event(time, id))
+                calendar.add_event(event(time, id))
+                id += 1
+        else:
+            e = heap.pop_event()
+            popped_heap.append(e.get_id())
+            popped_calendar.append(calendar.pop_event().get_id())
+            now = e.get_time()
+        assert len(heap) == len(calendar)
+    assert popped_heap == popped_calendar
+    assert drain(heap) == drain(calendar)
+
+
+def test_calendar_simulation_matches_the_heap(simulate, monkeypatch):
+    created = []
+    init = CalendarEventScheduler.__init__
+
+    def record(self):
+        created.append(self)
+        init(self)
+
+    monkeypatch.setattr(CalendarEventScheduler, "__init__", record)
+    statistics, decisions, stdout = simulate("FIPPFlex", 500, 150)
+    assert created == []
+    calendar_statistics, calendar_decisions, calendar_stdout = simulate("FIPPFlex", 500, 150,
+                                                                        '<scheduler type="calendar"/>')
+    assert len(created) == 1
+    assert calendar_statistics == statistics
+    assert calendar_decisions == decisions
+    assert stdout_digest(calendar_stdout) == stdout_digest(stdout)
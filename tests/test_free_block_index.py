@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from src.util.FreeBlockIndex import FreeBlockIndex
+
+
+def check(index: FreeBlockIndex, free: int):
+    """Compares every query of `index` with the same query answered from the free mask"""
+    blocks = FreeBlockIndex.blocks_in_mask(free)
+    assert index.blocks() == blocks
+    assert index.stats() == (bin(free).count("1"), max((length for _, length in blocks), default=0), len(blocks))
+    for demand in range(0, index.slots + 2):
+        assert index.first_fit(demand) == FreeBlockIndex.first_fit_in_mask(free, max(demand, 1))
+        fitting = [(length, start) for start, length in blocks if length >= demand]
+        assert index.best_fit(demand) == (min(fitting)[1] if fitting else -1)
+        exact = [start for start, length in blocks if length == demand]
+        assert index.exact_fit(demand) == (exact[0] if exact else -1)
+
+
+@pytest.mark.parametrize("slots", [1, 7, 64, 240])
+def test_queries_follow_reserve_and_release(slots):
+    rng = random.Random(slots)
+    index = FreeBlockIndex(slots)
+    full = (1 << slots) - 1
+    free = full
+    check(index, free)
+    for _ in range(300):
+        first = rng.randrange(slots)
+        last = min(slots, first + rng.randint(1, 12))
+        mask = ((1 << (last - first)) - 1) << first
+        if rng.random() < 0.55:
+            changed = mask & free
+            free &= ~mask
+            index.update(changed, True)
+        else:
+            changed = mask & ~free & full
+            free |= mask
+            index.update(changed, False)
+        check(index, free)
+
+
+def test_reserve_and_release_span_several_blocks():
+    index = FreeBlockIndex(20)
+    index.reserve(2, 4)
+    index.reserve(8, 10)
+    index.reserve(1, 15)
+    assert index.blocks() == [(0, 1), (15, 5)]
+    index.release(3, 16)
+    assert index.blocks() == [(0, 1), (3, 17)]
+    index.release(0, 20)
+    assert index.blocks() == [(0, 20)] and index.stats() == (20, 20, 1)
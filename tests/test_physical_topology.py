@@ -0,0 +1,57 @@
+from src.Flow import Flow
+from src.Slot import Slot
+from src.TrafficInfo import TrafficInfo
+from src.VirtualTopology import VirtualTopology
+from conftest import nfs_element
+
+
+def slots(first: int, last: int, core: int = 0):
+    return [Slot(core, s) for s in range(first, last)]
+
+
+def test_reserve_path_reserves_all_the_links_or_none(pt):
+    assert pt.reserve_path([0], slots(0, 4))
+    # link 1 is free, link 0 has slots 2 and 3 taken
+    assert not pt.reserve_path([1, 0], slots(2, 8))
+    assert not pt.reserve_path([1, 1000], slots(10, 12))
+    assert pt.occupied[0][0] == 0x0f and pt.occupied[1][0] == 0
+    assert pt.reserved_slots == 4
+    assert pt.get_num_free_slots(*pt.get_endpoints([1])[0]) == pt.slots
+    assert pt.get_free_blocks(1, 0) == [(0, pt.slots)]
+    assert pt.reserve_path([0, 1], slots(4, 8))
+    assert pt.occupied[0][0] == 0xff and pt.occupied[1][0] == 0xf0
+    pt.release_path([0, 1], slots(0, 8))
+    assert pt.occupied[0][0] == pt.occupied[1][0] == 0
+    assert pt.reserved_slots == 0
+
+
+def test_snapshot_reserve_path_matches_the_topology(pt):
+    pt.reserve_path([0], slots(0, 4))
+    trial = pt.snapshot()
+    assert not trial.reserve_path([1, 0], slots(2, 8))
+    assert 1 not in trial.changes
+    assert trial.reserve_path([0, 1], slots(4, 8))
+    assert not trial.reserve_path([1], slots(6, 10))
+    assert trial.get_occupied(0)[0] == 0xff and trial.get_occupied(1)[0] == 0xf0
+    assert pt.occupied[0][0] == 0x0f
+    trial.commit()
+    assert pt.occupied[0][0] == 0xff and pt.occupied[1][0] == 0xf0
+
+
+def test_create_light_path_refuses_taken_slots_and_unknown_links(pt):
+    vt = VirtualTopology(nfs_element("virtual-topology"), pt)
+    flow = Flow(0, 0, 2, 0.0, 20, 1.0, 1, 0.0)
+    assert vt.create_light_path(flow, [1], slots(0, 4), 0) == 0
+    assert vt.create_light_path(flow, [2, 1], slots(3, 6), 0) == -1
+    assert vt.create_light_path(flow, [1000], slots(10, 14), 0) == -1
+    assert pt.occupied[1][0] == 0x0f and pt.occupied[2][0] == 0
+    assert vt.has_light_path(vt.get_light_path(0)) and vt.get_light_path(1) is None
+
+
+def test_fragmentation_ratio_reads_the_free_blocks(pt):
+    # free blocks of 2 and pt.slots - 6 slots on link 0
+    pt.reserve_path([0], slots(0, 2) + slots(4, 6))
+    src, dst = pt.get_endpoints([0])[0]
+    calls = [TrafficInfo(1.0, rate, 0, 1.0) for rate in (10, 30, 50, 70)]
+    # with 10 per slot, the calls need 1, 3, 5 and 7 slots
+    assert pt.get_fragmentation_ratio(src, dst, calls, 10.0) == (0.75 + 0.0) / 2
@@ -0,0 +1,84 @@
+import pytest
+
+from src.util.Distribution import Distribution
+from src.util.JavaRandom import Random
+
+
+@pytest.mark.parametrize("k", [0, 1, 2, 3, 1000, 4097])
+def test_jump_matches_stepping(k):
+    stepped, jumped = Random(42), Random(42)
+    for _ in range(k):
+        stepped.next(32)
+    jumped.jump(k)
+    assert jumped.get_state() == stepped.get_state()
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 1000])
+@pytest.mark.parametrize("bits", [1, 27, 31, 32])
+def test_next_block_matches_next(n, bits):
+    scalar, block = Random(7), Random(7)
+    expected = [scalar.next(bits) for _ in range(n)]
+    assert block.next_block(n, bits).tolist() == expected
+    assert block.get_state() == scalar.get_state()
+
+
+@pytest.mark.parametrize("bound", [1, 2, 64, 3, 25, 1000, (1 << 31) - 1])
+def test_next_int_block_matches_next_int(bound):
+    scalar, block = Random(3), Random(3)
+    expected = [scalar.next_int(bound) for _ in range(500)]
+    assert block.next_int_block(500, bound).tolist() == expected
+    assert block.get_state() == scalar.get_state()
+
+
+def test_next_double_block_matches_next_double():
+    scalar, block = Random(11), Random(11)
+    expected = [scalar.next_double() for _ in range(1000)]
+    assert block.next_double_block(1000).tolist() == expected
+    assert block.get_state() == scalar.get_state()
+    assert block.next_block(0, 31).size == 0
+
+
+def test_next_exponential_block_matches_next_exponential():
+    scalar, block = Distribution(1, 1), Distribution(1, 1)
+    means = [0.5 + i % 7 for i in range(300)]
+    expected = [scalar.next_exponential(b) for b in means]
+    assert block.next_exponential_block(300, means).tolist() == expected
+    assert block.next_exponential_block(5, 2.0).tolist() == [scalar.next_exponential(2.0) for _ in range(5)]
+
+
+@pytest.mark.parametrize("index", [0, 1, 24, 25, 57, 99])
+def test_seeds_table_is_one_million_values_apart(index):
+    random = Random(0)
+    random.set_state((0, None))
+    random.jump(index * 1000000)
+    assert random.get_state()[0] == Distribution.seeds[index]
+
+
+def test_start_state_keeps_the_table_and_jumps_past_it():
+    assert Distribution.start_state(1, 1) == Distribution.seeds[0]
+    assert Distribution.start_state(4, 25) == Distribution.seeds[99]
+    assert Distribution.start_state(2, 3) == Distribution.seeds[27]
+
+    random = Random(0)
+    random.set_state((0, None))
+    random.jump(Distribution.SPACING * (1 + 25 * Distribution.STREAMS + 4))
+    assert Distribution.start_state(5, 26) == random.get_state()[0]
+
+    states = {Distribution.start_state(seq, seed) for seq in range(1, Distribution.STREAMS + 1) for seed in range(1, 40)}
+    assert len(states) == Distribution.STREAMS * 39
+
+
+def test_start_state_rejects_streams_past_the_period():
+    last = (Random.MASK + 1) // (Distribution.SPACING * Distribution.STREAMS)
+    Distribution.start_state(Distribution.STREAMS - 1, last)
+    with pytest.raises(ValueError):
+        Distribution.start_state(Distribution.STREAMS, last)
+    with pytest.raises(ValueError):
+        Distribution(Distribution.STREAMS + 1, 1)
+
+
+def test_distribution_seeds_from_the_start_state():
+    distribution = Distribution(2, 3)
+    random = Random(0)
+    random.set_state((Distribution.start_state(2, 3), None))
+    assert distribution.get_state()[0] == random.get_state()[0]
@@ -0,0 +1,122 @@
+import pytest
+
+from conftest import digest, stdout_digest
+
+# accepted and blocked calls, the digest of the decisions and the digest of what was printed by the original
+# simulator (only the imports fixed), less the departure listings, on xml/nfs.xml, 500 calls at load 150 with seed 1
+BASELINE = {
+    "FIPPBFS": (475, 25, "98abe1a0efd22e704ddd1bc8fb670aa48f537a51", "5c923af0fae551a076808f643bc7b8e18076552e"),
+    "FIPPFlex": (358, 142, "1c2e62d36738b587ce779e57db4aaeeab304d56f", "34c4f2b8727e2b67239f769e7ae3091e53a2d565"),
+}
+BASELINE_SIM_TIME = 2.0427241025383074
+
+# accepted and blocked calls and the digest of the decisions of the original simulator, with the stand-ins of
+# missing_apis, on xml/nfs.xml, 1500 calls at load 150 with seed 1
+BASELINE_MISSING_APIS = {
+    "NewRSA": (607, 893, "3db17a91bffc49c2edced7cac4ea5ab9fda74322"),
+    "PP": (1469, 31, "ce742b8489b922e49478866d9a0771a9d909b936"),
+    "ImageRCSA": (1492, 8, "2e539c7ac91d120e8bda07e1087b3a684b141b9a"),
+    "BfsRSA": (979, 521, "1b81c5c08a6399939b25e4efd79e04c97826526c"),
+    "SIFIPPBFS": (982, 518, "ae8e951b19b65408e4f39f1b7623d657672a9760"),
+}
+BASELINE_MISSING_APIS_SIM_TIME = 3.340789978827937
+
+
+def test_rsa_modules_import():
+    from src.ControlPlane import ControlPlane
+    assert set(ControlPlane.RSA_MODULES) == {"ImageRCSA", "PP", "NewRSA", "BfsRSA", "FIPPFlex", "FIPPBFS",
+                                             "SIFIPPBFS"}
+
+
+@pytest.fixture
+def missing_apis(monkeypatch):
+    """
+    Stand-ins for what NewRSA, PP, ImageRCSA, BfsRSA and SIFIPPBFS call but the simulator does not have, as
+    the baseline was recorded with: lightpaths created without their flow are created for the arriving one,
+    accept_flow() defaults to no p-cycle reuse, PCycle.get_nodes() and can_reuse_with_slots(), lightpaths
+    without a p-cycle leave none behind, and the log NewRSA appends to goes to os.devnull.
+    Request it before `simulate`, which wraps accept_flow()
+    """
+    import builtins
+    import os
+    import src.rsa.NewRSA
+    from src.ControlPlane import ControlPlane
+    from src.PCycle import PCycle
+    from src.VirtualTopology import VirtualTopology
+
+    arriving = []
+    new_flow, accept_flow = ControlPlane.new_flow, ControlPlane.accept_flow
+    create_light_path, remove_lp_p_cycle = VirtualTopology.create_light_path, VirtualTopology.remove_lp_p_cycle
+
+    def arrived(self, flow):
+        arriving[:] = [flow]
+        return new_flow(self, flow)
+
+    def create(self, *args):
+        if isinstance(args[0], list):
+            args = (arriving[0],) + args
+        return create_light_path(self, *args)
+
+    def remove(self, lp, *args):
+        if lp.get_p_cycle() is not None:
+            remove_lp_p_cycle(self, lp, *args)
+
+    monkeypatch.setattr(ControlPlane, "new_flow", arrived)
+    monkeypatch.setattr(ControlPlane, "accept_flow",
+                        lambda self, id, lp, p_reuse=False: accept_flow(self, id, lp, p_reuse))
+    monkeypatch.setattr(VirtualTopology, "create_light_path", create)
+    monkeypatch.setattr(VirtualTopology, "remove_lp_p_cycle", remove)
+    monkeypatch.setattr(PCycle, "get_nodes", lambda self: self.nodes, raising=False)
+    monkeypatch.setattr(PCycle, "can_reuse_with_slots",
+                        lambda self, links, slots: bool(self.can_add_links_disjoint(links)), raising=False)
+    monkeypatch.setattr(src.rsa.NewRSA, "open", lambda path, *args, **kwargs: builtins.open(
+        os.devnull if path.startswith("C:/") else path, *args, **kwargs), raising=False)
+
+
+@pytest.mark.parametrize("module", sorted(BASELINE_MISSING_APIS))
+def test_allocations_match_baseline_with_missing_apis(missing_apis, simulate, module):
+    accepted, blocked, decisions = BASELINE_MISSING_APIS[module]
+    statistics, made, _ = simulate(module, 1500, 150)
+    assert statistics["arrivals"] == statistics["departures"] == 1500
+    assert (statistics["accepted"], statistics["blocked"]) == (accepted, blocked)
+    assert statistics["sim_time"] == BASELINE_MISSING_APIS_SIM_TIME
+    assert len(made) == 1500
+    assert digest(made) == decisions
+
+
+@pytest.mark.parametrize("module", sorted(BASELINE))
+def test_allocations_match_baseline(simulate, module):
+    accepted, blocked, decisions, printed = BASELINE[module]
+    statistics, made, stdout = simulate(module, 500, 150)
+    assert statistics["arrivals"] == statistics["departures"] == 500
+    assert (statistics["accepted"], statistics["blocked"]) == (accepted, blocked)
+    assert statistics["sim_time"] == BASELINE_SIM_TIME
+    assert len(made) == 500
+    assert digest(made) == decisions
+    # the departures of blocked flows are no longer delivered, so only the accepted flows list the lightpaths
+    assert stdout.splitlines().count("Flow departed") == accepted
+    assert stdout_digest(without_departures(stdout)) == printed
+
+
+def without_departures(stdout: str) -> str:
+    """`stdout` less the "Flow departed" lines and the three lines of lightpath counts that follow each"""
+    lines = stdout.splitlines()
+    kept = []
+    i = 0
+    while i < len(lines):
+        if lines[i] == "Flow departed":
+            i += 4
+        else:
+            kept.append(lines[i])
+            i += 1
+    return "\n".join(kept)
+
+
+def test_blocked_flows_depart_in_the_trace(simulate, tmp_path):
+    statistics, _, _ = simulate("FIPPFlex", 500, 150, trace=True)
+    with open(tmp_path / "trace.fr") as f:
+        trace = f.read().splitlines()
+    blocked = {line.split()[2] for line in trace if line.startswith("flow-blocked")}
+    departed = {line.split()[2] for line in trace if line.startswith("flow-departed")}
+    assert len(blocked) == statistics["blocked"] > 0
+    assert len(departed) == 500 and blocked <= departed
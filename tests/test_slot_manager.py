@@ -0,0 +1,38 @@
+import networkx as nx
+
+from src.SlotManager import SlotManager
+
+
+def graph(cores: int, slots: int = 16) -> nx.Graph:
+    g = nx.Graph()
+    g.add_edge(0, 1, cores=cores, slots=slots, reserved_slots=set())
+    return g
+
+
+def test_reserve_and_release_slots():
+    sm = SlotManager(graph(1))
+    assert sm.reserve_slots(0, 1, [(0, 3), (0, 4)])
+    assert not sm.are_slots_available(1, 0, [(0, 4)])
+    assert not sm.reserve_slots(0, 1, [(0, 4), (0, 5)])
+    assert sm.are_slots_available(0, 1, [(0, 5)])
+    assert sm.get_spectrum(0, 1)[0][:6] == [True, True, True, False, False, True]
+    assert sm.get_num_free_slots(0, 1) == 14
+    # one core, so no neighbour is ever in use
+    assert sm.get_coupled_fibers_in_use(0, 1, 0, 3) == []
+    sm.release_slots(0, 1, [(0, 3)])
+    assert sm.get_num_free_slots(0, 1) == 15
+    assert sm.get_num_free_slots(0, 2) == 0
+    assert not sm.reserve_slots(0, 2, [(0, 0)])
+
+
+def test_coupled_fibers_follow_the_core_layout():
+    sm = SlotManager(graph(7))
+    assert sm.reserve_slots(0, 1, [(core, 7) for core in range(7)])
+    # the centre core touches the six outer ones, each outer core the centre and its two neighbours
+    assert sorted(sm.get_coupled_fibers_in_use(0, 1, 0, 7)) == [(core, 7) for core in range(1, 7)]
+    assert len(sm.get_coupled_fibers_in_use(0, 1, 1, 7)) == 3
+    assert sm.get_coupled_fibers_in_use(0, 1, 0, 8) == []
+
+    ring = SlotManager(graph(4))
+    assert ring.reserve_slots(0, 1, [(core, 2) for core in range(4)])
+    assert sorted(ring.get_coupled_fibers_in_use(0, 1, 0, 2)) == [(1, 2), (3, 2)]
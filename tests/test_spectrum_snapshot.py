@@ -0,0 +1,60 @@
+import copy
+
+import numpy as np
+
+from src.PhysicalTopology import PhysicalTopology
+from src.Slot import Slot
+from conftest import nfs_element
+
+
+def slots(first: int, last: int, core: int = 0):
+    return [Slot(core, s) for s in range(first, last)]
+
+
+def state(pt):
+    links = sorted(pt.occupied)
+    return (copy.deepcopy(pt.occupied), pt.reserved_slots, dict(pt.adjacent_occupied),
+            [[pt.get_free_block_stats(link, core) for core in range(pt.cores)] for link in links])
+
+
+def test_reads_fall_through_until_written(pt):
+    pt.reserve_path([0, 1], slots(0, 3))
+    trial = pt.snapshot()
+    assert trial.get_occupied(0) is pt.occupied[0]
+    assert np.array_equal(trial.paths_free_spectrum([[0, 1], [2]]), pt.paths_free_spectrum([[0, 1], [2]]))
+    trial.reserve_path([1], slots(3, 5))
+    assert list(trial.changes) == [1]
+    assert trial.get_occupied(0) is pt.occupied[0]
+    assert trial.path_first_fit([0, 1], 0, 2) == 5
+    assert pt.path_first_fit([0, 1], 0, 2) == 3
+    assert trial.path_spectrum([1])[0][:6] == [False] * 5 + [True]
+
+
+def test_discard_leaves_the_topology_untouched(pt):
+    pt.reserve_path([0, 1], slots(0, 3))
+    before = state(pt)
+    trial = pt.snapshot()
+    trial.reserve_path([0, 2], slots(5, 9))
+    trial.release_path([1], slots(0, 3))
+    trial.discard()
+    assert trial.changes == {}
+    assert state(pt) == before
+
+
+def test_commit_is_the_same_as_updating_the_topology():
+    committed = PhysicalTopology(nfs_element("physical-topology", "ccl.xml"), False)
+    direct = PhysicalTopology(nfs_element("physical-topology", "ccl.xml"), False)
+    links = sorted(committed.occupied)[:4]
+    for pt in (committed, direct):
+        pt.reserve_path(links[:2], slots(0, 6, 0) + slots(2, 4, 1))
+
+    trial = committed.snapshot()
+    trial.reserve_path(links[1:], slots(10, 12, 0) + slots(3, 8, 3))
+    trial.release_path(links[:1], slots(0, 2, 0))
+    trial.commit()
+    assert trial.changes == {}
+
+    direct.reserve_path(links[1:], slots(10, 12, 0) + slots(3, 8, 3))
+    direct.release_path(links[:1], slots(0, 2, 0))
+    assert state(committed) == state(direct)
+    assert committed.adjacent_occupied[links[1]] > 0
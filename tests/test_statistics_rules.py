@@ -0,0 +1,104 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.util.ConfidenceStop import ConfidenceStop
+from src.util.WarmupDetector import WarmupDetector
+
+
+def mser_brute_force(means):
+    n = len(means)
+    if n <= WarmupDetector.BATCH:
+        return 0
+    stats = []
+    for d in range(n - WarmupDetector.BATCH):
+        rest = np.array(means[d:])
+        stats.append(((rest - rest.mean()) ** 2).sum() / len(rest) ** 2)
+    return int(np.argmin(stats))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mser_matches_its_definition(seed):
+    rng = random.Random(seed)
+    means = [1.0 / (1 + i) + rng.gauss(0, 0.05) for i in range(rng.randint(1, 120))]
+    assert WarmupDetector.mser(means) == mser_brute_force(means)
+
+
+def test_mser_finds_the_transient():
+    rng = random.Random(0)
+    means = [1.0 - i / 30 for i in range(30)] + [0.1 + rng.gauss(0, 0.01) for _ in range(170)]
+    assert 25 <= WarmupDetector.mser(means) <= 32
+
+
+def test_warmup_detector_on_a_filling_network():
+    rng = random.Random(1)
+    detector = WarmupDetector()
+    detected_at = None
+    for arrival in range(1, 5000):
+        utilization = min(arrival / 500, 1.0) * 0.6 + rng.gauss(0, 0.01)
+        if rng.random() < (0.2 if arrival > 500 else 0.0):
+            detector.block()
+        if detector.arrival(utilization):
+            detected_at = arrival
+            break
+    assert detected_at is not None and detected_at > 500
+    assert 0 < detector.cutoff < detected_at
+    assert detector.running()
+    detector.finish(detected_at)
+    assert not detector.running() and detector.start == detected_at
+
+
+def test_warmup_detector_stopped_early():
+    detector = WarmupDetector()
+    for arrival in range(50):
+        assert not detector.arrival(0.5)
+    detector.finish(51)
+    assert detector.cutoff == 50 and detector.start == 51
+
+
+def test_mean_half_width():
+    batches = [0.1, 0.12, 0.09, 0.11, 0.1]
+    mean, half_width = ConfidenceStop.mean_half_width(batches)
+    assert mean == pytest.approx(0.104)
+    assert half_width == pytest.approx(2.776 * np.std(batches, ddof=1) / math.sqrt(5))
+    assert ConfidenceStop.t_975(100) == 1.96
+
+
+def test_confidence_stop_batches_and_stops():
+    stop = ConfidenceStop(0.05, batch_size=100, min_batches=10)
+    rng = random.Random(2)
+    arrivals = blocked = 0
+    stopped_at = None
+    while arrivals < 200000:
+        arrivals += 1
+        blocked += rng.random() < 0.3
+        if stop.update(arrivals, blocked, 10 * arrivals, 10 * blocked):
+            stopped_at = arrivals
+            break
+    assert stopped_at is not None and stopped_at % 100 == 0 and stopped_at >= 1000
+    assert len(stop.bp_batches) == stopped_at // 100
+    assert stop.relative_half_width() <= 0.05
+    assert stop.bbr_batches == pytest.approx(stop.bp_batches)
+
+
+def test_confidence_stop_without_blocking_and_with_bbr():
+    stop = ConfidenceStop(0.01, batch_size=10, min_batches=3)
+    assert math.isnan(stop.relative_half_width())
+    assert not stop.update(10, 0, 100, 0) and not stop.update(20, 0, 200, 0)
+    assert stop.update(30, 0, 300, 0)
+    assert math.isnan(stop.relative_half_width())
+
+    # precise blocking probability but not bandwidth blocking ratio
+    stop = ConfidenceStop(0.01, batch_size=10, min_batches=3, use_bbr=True)
+    for k, blocked_bandwidth in enumerate([10, 100, 140], start=1):
+        result = stop.update(10 * k, 5 * k, 100 * k, blocked_bandwidth)
+    assert stop.is_precise(stop.bp_batches) and not result
+
+
+def test_confidence_stop_checks_its_arguments():
+    with pytest.raises(AssertionError):
+        ConfidenceStop(0)
+    with pytest.raises(AssertionError):
+        ConfidenceStop(0.1, min_batches=1)
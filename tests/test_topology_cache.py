@@ -0,0 +1,13 @@
+import glob
+
+from conftest import digest
+
+
+def test_topology_cache_is_opt_in(simulate, tmp_path):
+    _, decisions, _ = simulate("FIPPBFS", 500, 150)
+    assert glob.glob(str(tmp_path / "*.topo-*")) == []
+
+    _, compiled, _ = simulate("FIPPBFS", 500, 150, attributes={"physical-topology": 'cache="true"'})
+    assert len(glob.glob(str(tmp_path / "sim.topo-*"))) == 1
+    _, cached, _ = simulate("FIPPBFS", 500, 150, attributes={"physical-topology": 'cache="true"'})
+    assert digest(compiled) == digest(cached) == digest(decisions)
@@ -0,0 +1,12 @@
+from src.Tracer import Tracer
+
+
+def test_finish_closes_the_trace_and_resets_the_singleton(tmp_path, monkeypatch):
+    monkeypatch.setattr(Tracer, "singleton_object", None)
+    tr = Tracer.get_tracer_object()
+    tr.set_trace_file(str(tmp_path / "trace.fr"))
+    tr.add("first line")
+    tr.finish()
+    assert tr.trace.closed
+    assert Tracer.get_tracer_object() is not tr
+    assert (tmp_path / "trace.fr").read_text() == "first line\n"
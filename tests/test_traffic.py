@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.EventScheduler import EventScheduler
+from src.FlowArrivalEvent import FlowArrivalEvent
+from src.TraceReplay import TraceReplay
+from src.TrafficGenerator import TrafficGenerator
+from src.util.Distribution import Distribution
+from src.util.TrafficCache import TrafficCache
+from conftest import nfs_element
+
+CALLS = 2500
+LOAD = 150
+SEED = 1
+
+
+def traffic_element(calls: int = CALLS, **attributes):
+    xml = nfs_element("traffic")
+    xml.set("calls", str(calls))
+    for name, value in attributes.items():
+        xml.set(name.replace("_", "-"), value)
+    return xml
+
+
+def reference_flows(traffic: TrafficGenerator, num_nodes: int, seed: int):
+    """(id, src, dst, rate, cos, arrival, holding, departure) of every call, drawn one by one as the original generator did"""
+    weight_vector = [i for i, info in enumerate(traffic.calls_types_info) for _ in range(info.get_weight())]
+    mean_arrival_time = (traffic.mean_holding_time * (traffic.mean_rate * 1.0 / traffic.max_rate)) / traffic.load
+    dist1, dist2, dist3, dist4 = (Distribution(i, seed) for i in range(1, 5))
+    time = 0.0
+    flows = []
+    for id in range(traffic.calls):
+        info = traffic.calls_types_info[weight_vector[dist1.next_int(traffic.total_weight)]]
+        src = dst = dist2.next_int(num_nodes)
+        while src == dst:
+            dst = dist2.next_int(num_nodes)
+        holding_time = dist4.next_exponential(info.get_holding_time())
+        arrival = time
+        time += dist3.next_exponential(mean_arrival_time)
+        flows.append((id, src, dst, info.get_rate(), info.get_cos(), arrival, holding_time, time + holding_time))
+    return flows, [dist.get_state() for dist in (dist1, dist2, dist3, dist4)]
+
+
+def event_flows(pairs):
+    flows = []
+    for arrival, departure in pairs:
+        flow = arrival.get_flow()
+        assert departure.get_flow() is flow and departure.get_id() == flow.get_id()
+        flows.append((flow.get_id(), flow.get_source(), flow.get_destination(), flow.get_rate(), flow.get_cos(),
+                      arrival.get_time(), flow.get_duration(), departure.get_time()))
+    return flows
+
+
+def test_block_generation_matches_the_scalar_generator(pt):
+    traffic = TrafficGenerator(traffic_element(), LOAD, False)
+    expected, _ = reference_flows(traffic, pt.get_num_nodes(), SEED)
+    assert event_flows(traffic.flow_events(pt, SEED)) == expected
+
+
+def test_streaming_gives_the_same_event_order(pt):
+    orders = []
+    for streaming in ("false", "true"):
+        traffic = TrafficGenerator(traffic_element(streaming=streaming), LOAD, False)
+        events = EventScheduler()
+        traffic.generate_traffic(pt, events, SEED)
+        order = []
+        event = events.pop_event()
+        while event is not None:
+            order.append((type(event) is FlowArrivalEvent, event.get_time(), event.get_flow().get_id()))
+            event = events.pop_event()
+        orders.append(order)
+    assert orders[0] == orders[1] and len(orders[0]) == 2 * CALLS
+
+
+@pytest.mark.parametrize("calls", [1, 700, TrafficGenerator.CHUNK, 1500])
+def test_distribution_states_match_drawing_call_by_call(pt, calls):
+    traffic = TrafficGenerator(traffic_element(), LOAD, False)
+    events = traffic.flow_events(pt, SEED)
+    for _ in range(calls):
+        next(events)
+    reference = TrafficGenerator(traffic_element(calls), LOAD, False)
+    _, states = reference_flows(reference, pt.get_num_nodes(), SEED)
+    assert traffic.distribution_states() == states
+
+    # resuming from them continues the stream exactly
+    resumed = TrafficGenerator(traffic_element(), LOAD, False)
+    rest = resumed.flow_events(pt, SEED, (traffic.stream_position[0], traffic.stream_position[1], states))
+    assert event_flows(rest) == event_flows(events)
+
+
+def test_alias_sampled_call_types_and_demands(pt):
+    xml = traffic_element()
+    for calls in xml.findall("calls"):
+        calls.set("weight", "1.5")
+    for src, dst, weight in ((0, 1, "3"), (2, 5, "1"), (7, 3, "0")):
+        demand = xml.makeelement("demand", {"src": str(src), "dst": str(dst), "weight": weight})
+        xml.append(demand)
+    traffic = TrafficGenerator(xml, LOAD, False)
+    assert traffic.types_alias is not None
+    flows = event_flows(traffic.flow_events(pt, SEED))
+    pairs = [(src, dst) for _, src, dst, *_ in flows]
+    assert set(pairs) == {(0, 1), (2, 5)}
+    assert 0.7 < pairs.count((0, 1)) / len(pairs) < 0.8
+    assert {rate for _, _, _, rate, *_ in flows} == {20, 60, 100}
+
+
+def test_traffic_cache_key():
+    base = TrafficCache.key(TrafficGenerator(traffic_element(), LOAD, False), 14, SEED)
+    assert TrafficCache.key(TrafficGenerator(traffic_element(streaming="true", cache="true"), LOAD, False), 14, SEED) == base
+    assert TrafficCache.key(TrafficGenerator(traffic_element(), LOAD + 10, False), 14, SEED) != base
+    assert TrafficCache.key(TrafficGenerator(traffic_element(), LOAD, False), 14, SEED + 1) != base
+    assert TrafficCache.key(TrafficGenerator(traffic_element(), LOAD, False), 15, SEED) != base
+    assert TrafficCache.key(TrafficGenerator(traffic_element(CALLS + 1), LOAD, False), 14, SEED) != base
+    xml = traffic_element()
+    xml.find("calls").set("holding-time", "0.4")
+    assert TrafficCache.key(TrafficGenerator(xml, LOAD, False), 14, SEED) != base
+
+
+def test_traffic_cache_writes_atomically(tmp_path, monkeypatch):
+    cache = TrafficCache(str(tmp_path / "sim.xml"))
+    assert cache.directory == str(tmp_path / "traffic-cache")
+    assert cache.load("k") is None
+    columns = {"id": np.arange(3, dtype=np.int64), "arrival": np.array([0.0, 0.5, 1.0, 1.5])}
+    cache.save("k", columns)
+    assert sorted(os.listdir(cache.directory)) == ["k"]
+    loaded = cache.load("k")
+    assert {name: column.tolist() for name, column in loaded.items()} == {name: column.tolist() for name, column in columns.items()}
+
+    # a directory without its index, as left by an interrupted write, is never loaded
+    os.makedirs(os.path.join(cache.directory, "partial"))
+    np.save(os.path.join(cache.directory, "partial", "id.npy"), columns["id"])
+    assert cache.load("partial") is None
+
+    # a failed write leaves nothing behind and still returns the columns
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "save", fail)
+    assert cache.save("other", columns) is columns
+    assert sorted(os.listdir(cache.directory)) == ["k", "partial"]
+
+
+def test_cached_traffic_matches_the_generated_one(pt, tmp_path):
+    generated = event_flows(TrafficGenerator(traffic_element(), LOAD, False).flow_events(pt, SEED))
+    for _ in range(2):
+        traffic = TrafficGenerator(traffic_element(), LOAD, False)
+        traffic.cache = TrafficCache(str(tmp_path / "sim.xml"))
+        assert event_flows(traffic.flow_events(pt, SEED)) == generated
+        assert traffic.distribution_states() == []
+    assert len(os.listdir(tmp_path / "traffic-cache")) == 1
+
+
+def write_trace(path, flows):
+    with open(path, "w") as f:
+        for id, src, dst, rate, cos, arrival, holding, departure in flows:
+            f.write(f"flow-arrived {arrival} {id + 100} {src} {dst} {rate} {holding} {cos}\n")
+            f.write(f"flow-blocked - {id + 100} {src} {dst} {rate} {holding} {cos}\n")
+            f.write(f"flow-departed {departure} {id + 100} - - - - -\n")
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1024])
+def test_trace_replay_gives_back_the_traced_flows(pt, tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(TraceReplay, "CHUNK", chunk)
+    flows, _ = reference_flows(TrafficGenerator(traffic_element(50), LOAD, False), pt.get_num_nodes(), SEED)
+    write_trace(tmp_path / "trace.fr", flows)
+
+    traffic = TrafficGenerator(traffic_element(40), LOAD, False)
+    traffic.replay = TraceReplay(str(tmp_path / "trace.fr"))
+    assert event_flows(traffic.flow_events(pt, SEED)) == flows[:40]
+
+    # resumed from a call, renumbered from 0 whatever the ids of the trace
+    traffic.replay = TraceReplay(str(tmp_path / "trace.fr"))
+    assert event_flows(traffic.flow_events(pt, SEED, (13, 0.0, []))) == flows[13:40]
+
+
+def test_last_call_of_a_trace_departs_after_its_own_arrival(pt, tmp_path, monkeypatch):
+    monkeypatch.setattr(TraceReplay, "CHUNK", 4)
+    flows, _ = reference_flows(TrafficGenerator(traffic_element(10), LOAD, False), pt.get_num_nodes(), SEED)
+    write_trace(tmp_path / "trace.fr", flows)
+    traffic = TrafficGenerator(traffic_element(20), LOAD, False)
+    traffic.replay = TraceReplay(str(tmp_path / "trace.fr"))
+    replayed = event_flows(traffic.flow_events(pt, SEED))
+    assert replayed[:9] == flows[:9]
+    id, src, dst, rate, cos, arrival, holding, _ = flows[9]
+    assert replayed[9] == (id, src, dst, rate, cos, arrival, holding, arrival + holding)
+
+
+def test_trace_replay_of_traffic_columns(pt, tmp_path):
+    generator = TrafficGenerator(traffic_element(), LOAD, False)
+    generator.cache = TrafficCache(str(tmp_path / "sim.xml"))
+    generated = event_flows(generator.flow_events(pt, SEED))
+    key = TrafficCache.key(generator, pt.get_num_nodes(), SEED)
+
+    traffic = TrafficGenerator(traffic_element(1000), LOAD, False)
+    traffic.replay = TraceReplay(str(tmp_path / "traffic-cache" / key))
+    assert event_flows(traffic.flow_events(pt, SEED)) == generated[:1000]